@@ -0,0 +1,43 @@
+import sys
+import json
+import argparse
+
+from src.benchmark import CIPHER_SIZES, POPULATION_SIZES, BENCHMARK_SEED, REGRESSION_TOLERANCE, compare, run_benchmarks
+
+
+def main(output: str, baseline: str, cipher_sizes, populations, repeats: int, seed: int, tolerance: float) -> int:
+    results = run_benchmarks(cipher_sizes, populations, repeats, seed)
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if not baseline:
+        return 0
+
+    with open(baseline) as f:
+        comparison = compare(results, json.load(f), tolerance)
+
+    for c in comparison:
+        flag = ' REGRESSED' if c['regressed'] else ''
+        print(f"{c['name']:<20} {c['cipher_bytes']:>9}B {c['population']:>6}: "
+              f"{c['baseline_s'] * 1000:10.3f}ms -> {c['median_s'] * 1000:10.3f}ms "
+              f"(x{c['speedup']:.2f}){flag}", file=sys.stderr)
+    return 1 if any(c['regressed'] for c in comparison) else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-o', help='Set the JSON results file (prints to stdout if not set)', default=None)
+    parser.add_argument('-b', help='Set a saved results file to compare to, exits with 1 on a regression', default=None)
+    parser.add_argument('-cs', help='Set the synthetic cipher sizes in bytes', default=list(CIPHER_SIZES), type=int, nargs='+')
+    parser.add_argument('-ps', help='Set the population sizes', default=list(POPULATION_SIZES), type=int, nargs='+')
+    parser.add_argument('-r', help='Set number of repeats of every case', default=5, type=int)
+    parser.add_argument('-s', help='Set the random seed', default=BENCHMARK_SEED, type=int)
+    parser.add_argument('-tol', help='Set the allowed relative slowdown of the median time', default=REGRESSION_TOLERANCE, type=float)
+
+    args = parser.parse_args()
+    sys.exit(main(args.o, args.b, args.cs, args.ps, args.r, args.s, args.tol))
@@ -1,16 +1,58 @@
 import argparse
+import cProfile
+import pstats
 
+from src.checkpoint import CHECKPOINT_PATH, Checkpointer
+from src.evolver import CrossoverType, MutationType
+from src.local_search import LocalSearchType
+from src.memory import MemoryBackend
+from src.metrics import MetricsType, get_metrics
+from src.operator_bandit import OperatorSelection
+from src.progress import ProgressType, get_observer
+from src.selector import SelectionType
 from src.simulator import Simulator, SimulationArgs, GeneticAlgorithmType
 
 
-def main(n_iter: int, alg: GeneticAlgorithmType, population_size: int, fitness_goal: float):
+def main(n_iter: int, alg: GeneticAlgorithmType, population_size: int, fitness_goal: float, bigram_weight: float,
+         workers: int, run_workers: int, cache_size: int, memory_backend: str, local_search: str,
+         local_search_rounds: int, crossover_type: str, mutation_type: str, selection_type: str,
+         tournament_size: int, progress: str, fidelity_min_fraction: float, metrics_type: str = MetricsType.NONE,
+         metrics_path: str = None, profile_path: str = None, checkpoint_generations: int = 0,
+         checkpoint_seconds: float = 0.0, checkpoint_path: str = CHECKPOINT_PATH, resume: bool = False,
+         seed_random_fraction: float = 1.0, operator_selection: str = OperatorSelection.FIXED,
+         diversity_threshold: float = 0.0, max_restarts: int = 3):
     args: SimulationArgs = SimulationArgs(fitness_goal, elite_percentile=0.9, mutation_percentage=0.2,
                                           mutation_decay=1e-3, mutation_min_percentage=0.2,
-                                          generation_tolerance=50, generation_tolerance_percentage=0.01)
-    simulator: Simulator = Simulator(alg, population_size, args)
+                                          generation_tolerance=50, generation_tolerance_percentage=0.01,
+                                          bigram_weight=bigram_weight, workers=workers,
+                                          run_workers=run_workers, fitness_cache_size=cache_size,
+                                          memory_backend=memory_backend, local_search=local_search,
+                                          local_search_rounds=local_search_rounds, crossover_type=crossover_type,
+                                          mutation_type=mutation_type, selection_type=selection_type,
+                                          tournament_size=tournament_size, fidelity_min_fraction=fidelity_min_fraction,
+                                          seed_random_fraction=seed_random_fraction,
+                                          operator_selection=operator_selection,
+                                          diversity_threshold=diversity_threshold, max_restarts=max_restarts)
+    observer = get_observer(progress)
+    metrics = get_metrics(metrics_type, metrics_path)
+    checkpointer = None
+    if checkpoint_generations > 0 or checkpoint_seconds > 0 or resume:
+        checkpointer = Checkpointer(checkpoint_path, checkpoint_generations, checkpoint_seconds)
+    simulator: Simulator = Simulator(alg, population_size, args, observer, metrics=metrics, checkpointer=checkpointer)
 
-    dict = {}
-    simulator.run_multiple(num_runs=n_iter, **dict)
+    dict = {'resume': resume}
+    profiler = cProfile.Profile() if profile_path else None
+    try:
+        if profiler is not None:
+            profiler.runcall(simulator.run_multiple, num_runs=n_iter, **dict)
+        else:
+            simulator.run_multiple(num_runs=n_iter, **dict)
+    finally:
+        observer.close()
+        metrics.close()
+        if profiler is not None:
+            profiler.dump_stats(profile_path)
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
 
 
 if __name__ == '__main__':
@@ -18,11 +60,47 @@ if __name__ == '__main__':
     parser.add_argument('-n', help='Set number of iterations to run (>1)', default=10, type=int)
     parser.add_argument('-ps', help='Set number of population size (>1)', default=300, type=int)
     parser.add_argument('-acc', help='Set the fitness accuracy goal [0-1]', default=0.99, type=float)
+    parser.add_argument('-bw', help='Set the weight of the bigram fitness term [0-1]', default=0.0, type=float)
+    parser.add_argument('-w', help='Set number of worker processes for fitness evaluation', default=1, type=int)
+    parser.add_argument('-rw', help='Set number of iterations to run concurrently', default=1, type=int)
+    parser.add_argument('-mb', help='Set the offspring memory backend', default=MemoryBackend.EXACT,
+                        choices=[MemoryBackend.EXACT, MemoryBackend.BLOOM])
+    parser.add_argument('-co', help='Set the crossover operator', default=CrossoverType.PMX,
+                        choices=[CrossoverType.PMX, CrossoverType.ORDER, CrossoverType.ONE_POINT])
+    parser.add_argument('-mt', help='Set the mutation operator', default=MutationType.SWAP,
+                        choices=[MutationType.SWAP, MutationType.SCRAMBLE])
+    parser.add_argument('-os', help='Set the operator selection, the -co and -mt operators or adaptive shares of all of them with a mutation rate raised on stagnation',
+                        default=OperatorSelection.FIXED, choices=[OperatorSelection.FIXED, OperatorSelection.ADAPTIVE])
+    parser.add_argument('-st', help='Set the parent selection', default=SelectionType.ROULETTE,
+                        choices=[SelectionType.ROULETTE, SelectionType.RANK, SelectionType.TOURNAMENT])
+    parser.add_argument('-ts', help='Set the tournament size of the tournament selection', default=3, type=int)
+    parser.add_argument('-p', help='Set the progress output, a live plot, the final plot as PNG or none',
+                        default=ProgressType.LIVE, choices=[ProgressType.LIVE, ProgressType.PNG, ProgressType.HEADLESS])
+    parser.add_argument('-ls', help='Set the local search of the darwin and lamarck GA', default=LocalSearchType.RANDOM,
+                        choices=[LocalSearchType.RANDOM, LocalSearchType.FIRST, LocalSearchType.STEEPEST])
+    parser.add_argument('-lr', help='Set max number of local search rounds of the first and steepest searches', default=1, type=int)
+    parser.add_argument('-mf', help='Set the starting fraction of cipher words offspring are first scored on (0 scores the full text) [0-1]',
+                        default=0.0, type=float)
+    parser.add_argument('-sr', help='Set the fraction of the initial population that is random, the rest is seeded from the letters frequencies and word patterns [0-1]',
+                        default=1.0, type=float)
+    parser.add_argument('-dt', help='Set the population diversity under which the elites are kept and the rest is seeded again (0 disables it) [0-1]',
+                        default=0.0, type=float)
+    parser.add_argument('-mr', help='Set max number of partial restarts of a run', default=3, type=int)
+    parser.add_argument('-cs', help='Set max number of cached fitness scores (0 disables the cache)', default=100000, type=int)
+    parser.add_argument('-me', help='Set the per generation metrics output, JSON lines or a Prometheus textfile', default=MetricsType.NONE,
+                        choices=[MetricsType.NONE, MetricsType.JSONL, MetricsType.PROMETHEUS])
+    parser.add_argument('-mo', help='Set the metrics file (output/metrics.jsonl or output/metrics.prom by default)', default=None)
+    parser.add_argument('--profile', help='Profile the run with cProfile and write the stats to this file', default=None)
+    parser.add_argument('-cg', help='Set number of generations between checkpoints (0 disables them)', default=0, type=int)
+    parser.add_argument('-ct', help='Set number of seconds between checkpoints (0 disables them)', default=0.0, type=float)
+    parser.add_argument('-ck', help='Set the checkpoint file', default=CHECKPOINT_PATH)
+    parser.add_argument('--resume', help='Continue from the checkpoint file, with the same flags as the interrupted run', action='store_true')
 
     group = parser.add_mutually_exclusive_group()
     group.add_argument('-r', help='Run regular GA', action='store_true')
     group.add_argument('-d', help='Run darwin GA', action='store_true')
     group.add_argument('-l', help='Run lamarck GA', action='store_true')
+    group.add_argument('-i', help='Run island GA', action='store_true')
 
     args = parser.parse_args()
 
@@ -30,8 +108,12 @@ if __name__ == '__main__':
         alg = GeneticAlgorithmType.DARWIN
     elif args.l:
         alg = GeneticAlgorithmType.LAMARCK
+    elif args.i:
+        alg = GeneticAlgorithmType.ISLAND
     elif args.r:
         alg = GeneticAlgorithmType.REGULAR
     else:
-        raise ValueError('Please pick GA to run [-r/-d/-l]')
-    main(args.n, alg, args.ps, args.acc)
+        raise ValueError('Please pick GA to run [-r/-d/-l/-i]')
+    main(args.n, alg, args.ps, args.acc, args.bw, args.w, args.rw, args.cs, args.mb, args.ls, args.lr, args.co, args.mt, args.st, args.ts, args.p, args.mf,
+         args.me, args.mo, args.profile, args.cg, args.ct, args.ck, args.resume,
+         args.sr, args.os, args.dt, args.mr)
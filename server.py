@@ -0,0 +1,32 @@
+import asyncio
+import argparse
+
+from src.corpus import load_language
+from src.job_server import JOBS_DIR_PATH, JobServer
+
+
+async def serve(workers: int, socket_path: str, port: int, spool_dir: str, jobs_dir: str) -> None:
+    async with JobServer(load_language(), workers, jobs_dir) as server:
+        tasks = []
+        if socket_path is not None or port is not None:
+            socket_server = await server.serve_socket(socket_path, port=port)
+            tasks.append(socket_server.serve_forever())
+            print(f'Accepting jobs on {socket_path or f"127.0.0.1:{port}"}')
+        if spool_dir is not None:
+            tasks.append(server.watch_spool(spool_dir))
+            print(f'Watching {spool_dir} for jobs')
+        await asyncio.gather(*tasks)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-w', help='Set number of worker processes running jobs (all cores by default)', default=None, type=int)
+    parser.add_argument('-s', help='Set the unix socket to accept jobs on', default=None)
+    parser.add_argument('-port', help='Set the local TCP port to accept jobs on', default=None, type=int)
+    parser.add_argument('-spool', help='Set the directory to watch for job files', default=None)
+    parser.add_argument('-jd', help='Set the directory of the running jobs files', default=JOBS_DIR_PATH)
+
+    args = parser.parse_args()
+    if args.s is None and args.port is None and args.spool is None:
+        raise ValueError('Please pick where jobs come from [-s/-port/-spool]')
+    asyncio.run(serve(args.w, args.s, args.port, args.spool, args.jd))
@@ -0,0 +1,230 @@
+import os
+import sys
+import time
+import random
+import platform
+import statistics
+import contextlib
+import numpy as np
+from string import ascii_lowercase
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from src.cipher_text import CipherStats
+from src.corpus import Corpus
+from src.evolver import Evolver
+from src.files_parser import parse_dict, parse_letters_freq
+from src.generator import generate_random
+from src.population import Population
+from src.selector import SelectionEngine, Selector
+from src.simulator import SimulationArgs, Simulator
+from src.strategy import BaseStrategy, GeneticAlgorithmType
+
+
+CIPHER_SIZES = (1 << 10, 100 << 10, 10 << 20)
+POPULATION_SIZES = (100, 1000, 10000)
+BENCHMARK_SEED = 1234
+# A case regresses when its median time grows by more than this ratio of the baseline
+REGRESSION_TOLERANCE = 0.1
+
+# Identifies a result: (case name, cipher bytes, population size)
+ResultKey = Tuple[str, int, int]
+
+
+class BenchmarkCase:
+    FITNESS = 'fitness'
+    PMX_CROSSOVER = 'pmx_crossover'
+    BATCH_PMX_CROSSOVER = 'batch_pmx_crossover'
+    SWAP_MUTATION = 'swap_mutation'
+    BATCH_SWAP_MUTATION = 'batch_swap_mutation'
+    SELECTION = 'selection'
+    GENERATION = 'generation'
+
+
+def synthetic_cipher(dictionary: Sequence[str], n_bytes: int, seed: int = BENCHMARK_SEED) -> str:
+    """
+    Encode random dictionary words with a random key, until the text is n_bytes long.
+
+    :param dictionary: Words to draw from
+    :param n_bytes: Length of the text
+    :param seed: Seed of the words and the key
+    :return: str: encoded text
+    """
+    rng = np.random.default_rng(seed)
+    words = np.asarray(sorted(dictionary))
+    # Enough words on average, the text is cut to its exact length
+    mean_len = np.mean([len(w) for w in words]) + 1
+    text = ' '.join(words[rng.integers(0, len(words), int(n_bytes / mean_len) + 100)])
+
+    while len(text) < n_bytes:
+        text += ' ' + ' '.join(words[rng.integers(0, len(words), 100)])
+
+    key = ''.join(rng.permutation(list(ascii_lowercase)))
+    return text[:n_bytes].rstrip().translate(str.maketrans(ascii_lowercase, key))
+
+
+def synthetic_corpus(n_bytes: int, dict_path: str = 'dict.txt', unigram_path: str = 'Letter_Freq.txt',
+                     bigram_path: str = 'Letter2_Freq.txt', seed: int = BENCHMARK_SEED) -> Corpus:
+    """
+    The corpus of the input files with a synthetic encoded text instead of enc.txt.
+    """
+    dictionary = set(parse_dict(dict_path))
+    cipher = CipherStats.from_text(synthetic_cipher([w for w in dictionary if w], n_bytes, seed))
+    return Corpus(os.devnull, cipher, dictionary, parse_letters_freq(unigram_path), parse_letters_freq(bigram_path))
+
+
+def _seed(seed: int) -> None:
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def time_case(setup: Callable[[], tuple], func: Callable, repeats: int, seed: int) -> List[float]:
+    """
+    Time func on the arguments setup returns, which are prepared again with the same seed before every repeat.
+
+    :return: List[float]: seconds of every repeat
+    """
+    times = []
+    for _ in range(repeats):
+        _seed(seed)
+        args = setup()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+class Benchmark:
+    """
+    Times the fitness, the genetic operators and a whole generation on a synthetic cipher, with fixed seeds.
+    """
+    def __init__(self, corpus: Corpus, cipher_bytes: int, repeats: int = 5, seed: int = BENCHMARK_SEED) -> None:
+        self.__corpus = corpus
+        self.__cipher_bytes = cipher_bytes
+        self.__repeats = repeats
+        self.__seed = seed
+        self.__letters = sorted(corpus.unigram_freq.keys())
+        # The cache would score repeats for free
+        self.__args = SimulationArgs(1.0, elite_percentile=0.9, mutation_percentage=0.2, mutation_decay=1e-3,
+                                     mutation_min_percentage=0.2, generation_tolerance=50,
+                                     generation_tolerance_percentage=0.01, fitness_cache_size=0)
+
+    def __result(self, name: str, population: int, times: List[float]) -> Dict:
+        return {'name': name, 'cipher_bytes': self.__cipher_bytes, 'population': population,
+                'repeats': len(times), 'min_s': min(times), 'median_s': statistics.median(times)}
+
+    def __strategy(self) -> BaseStrategy:
+        corpus = self.__corpus
+        return GeneticAlgorithmType.get_strategy(GeneticAlgorithmType.REGULAR, corpus.dictionary, corpus.cipher,
+                                                 self.__letters, corpus.unigram_freq, corpus.bigram_freq)
+
+    def fitness(self, population: int) -> Dict:
+        strategy = self.__strategy()
+        times = time_case(lambda: (generate_random(self.__letters, population),), strategy.fitness,
+                          self.__repeats, self.__seed)
+        return self.__result(BenchmarkCase.FITNESS, population, times)
+
+    def generation(self, population: int) -> Dict:
+        strategy = self.__strategy()
+
+        # Every repeat breeds from the same scored population, into a new offspring memory
+        def setup():
+            simulator = Simulator(GeneticAlgorithmType.REGULAR, population, self.__args, corpus=self.__corpus)
+            samples = generate_random(self.__letters, population)
+            return simulator, Population(self.__letters, Population.from_samples(self.__letters, samples).perms,
+                                         strategy.fitness(samples))
+
+        def step(simulator: Simulator, scored: Population):
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                simulator.generation(0, scored)
+
+        times = time_case(setup, step, self.__repeats, self.__seed)
+        return self.__result(BenchmarkCase.GENERATION, population, times)
+
+    def operators(self, population: int) -> List[Dict]:
+        """
+        Time the operators, which do not depend on the cipher, on a population of random keys.
+        """
+        letters = self.__letters
+        evolver = Evolver(letters)
+
+        def samples():
+            s = generate_random(letters, population)
+            return s, [random.random() for _ in s]
+
+        def strings():
+            s, _ = samples()
+            return [x.decode_string for x in s], [x.decode_string for x in reversed(s)]
+
+        def perms():
+            return Population.from_samples(letters, samples()[0]).perms,
+
+        def pmx(p1: List[str], p2: List[str]):
+            for s1, s2 in zip(p1, p2):
+                evolver.pmx_crossover(s1, s2)
+
+        def swap(s: List, _):
+            for x in s:
+                evolver.swap_mutation(x.dec_map)
+
+        def select(s: List, fitness_scores: List[float]):
+            SelectionEngine(fitness_scores).draw((population, 2))
+            Selector.select_elite(s, fitness_scores, self.__args.elite_percentile)
+
+        cases = [
+            (BenchmarkCase.PMX_CROSSOVER, strings, pmx),
+            (BenchmarkCase.BATCH_PMX_CROSSOVER, perms, lambda p: evolver.batch_pmx_crossover(p, p[::-1])),
+            (BenchmarkCase.SWAP_MUTATION, samples, swap),
+            (BenchmarkCase.BATCH_SWAP_MUTATION, perms, evolver.batch_swap_mutation),
+            (BenchmarkCase.SELECTION, samples, select),
+        ]
+        return [self.__result(name, population, time_case(setup, func, self.__repeats, self.__seed))
+                for name, setup, func in cases]
+
+
+def run_benchmarks(cipher_sizes: Sequence[int] = CIPHER_SIZES, populations: Sequence[int] = POPULATION_SIZES,
+                   repeats: int = 5, seed: int = BENCHMARK_SEED) -> Dict:
+    """
+    Run every case on every cipher size and population size.
+    The operators do not read the cipher, so they only run with the smallest cipher.
+
+    :return: Dict: the machine and the results, ready to be dumped as JSON
+    """
+    results = []
+    for i, n_bytes in enumerate(cipher_sizes):
+        benchmark = Benchmark(synthetic_corpus(n_bytes, seed=seed), n_bytes, repeats, seed)
+        for population in populations:
+            results.append(benchmark.fitness(population))
+            results.append(benchmark.generation(population))
+            if i == 0:
+                results.extend(benchmark.operators(population))
+
+    meta = {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+            'cpu_count': os.cpu_count(), 'seed': seed, 'repeats': repeats, 'argv': sys.argv[1:]}
+    return {'meta': meta, 'results': results}
+
+
+def _key(result: Dict) -> ResultKey:
+    return result['name'], result['cipher_bytes'], result['population']
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float = REGRESSION_TOLERANCE) -> List[Dict]:
+    """
+    Compare the median times of the cases that appear in both runs.
+
+    :param results: Current run
+    :param baseline: Saved run to compare to
+    :param tolerance: Allowed relative slowdown
+    :return: List[Dict]: every common case with its speedup and whether it regressed
+    """
+    base = {_key(r): r for r in baseline['results']}
+    comparison = []
+    for r in results['results']:
+        b = base.get(_key(r))
+        if b is None:
+            continue
+        ratio = r['median_s'] / b['median_s'] if b['median_s'] > 0 else 1.0
+        comparison.append({'name': r['name'], 'cipher_bytes': r['cipher_bytes'], 'population': r['population'],
+                           'baseline_s': b['median_s'], 'median_s': r['median_s'],
+                           'speedup': 1 / ratio if ratio > 0 else float('inf'),
+                           'regressed': ratio > 1 + tolerance})
+    return comparison
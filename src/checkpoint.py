@@ -0,0 +1,97 @@
+import os
+import time
+import pickle
+import tempfile
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+from src.memory import Memory
+
+
+# Bump when the checkpointed fields change, older checkpoints are then refused
+CHECKPOINT_VERSION = 3
+CHECKPOINT_PATH = os.path.join('output', 'checkpoint.pkl')
+
+
+class RunState:
+    """
+    An unfinished run at the end of a generation: its population as a permutation matrix and its history.
+    """
+    def __init__(self, iteration: int, step: int, perms: np.ndarray, scores: np.ndarray, history) -> None:
+        self.iteration = iteration
+        self.step = step
+        self.perms = perms
+        self.scores = scores
+        self.history = history
+
+
+class Checkpoint:
+    """
+    Everything a serial simulation needs to continue on the same trajectory: the finished runs' best result,
+    the unfinished run, the offspring memory, the strategy's counters and cache, the operator selection and
+    mutation scheduler, and the random states.
+    """
+    def __init__(self, config: tuple, completed_runs: int, best_perms: np.ndarray, best_scores: List[float],
+                 best_history, run: Optional[RunState], memory: Memory, strategy_state: Dict[str, Any],
+                 random_state: tuple, np_random_state: tuple, operators: tuple = ()) -> None:
+        self.config = config
+        self.completed_runs = completed_runs
+        self.best_perms = best_perms
+        self.best_scores = best_scores
+        self.best_history = best_history
+        self.run = run
+        self.memory = memory
+        self.strategy_state = strategy_state
+        self.random_state = random_state
+        self.np_random_state = np_random_state
+        self.operators = operators
+
+
+class Checkpointer:
+    """
+    Writes checkpoints every few generations or seconds, whichever comes first. A checkpoint is written aside and
+    renamed over the previous one, so an interruption at any point leaves a complete checkpoint behind.
+    """
+    def __init__(self, path: str = CHECKPOINT_PATH, every_generations: int = 10, every_seconds: float = 0.0) -> None:
+        self.path = path
+        self.__every_generations = every_generations
+        self.__every_seconds = every_seconds
+        self.__last_save = time.monotonic()
+
+    def due(self, step: int) -> bool:
+        if self.__every_generations > 0 and step % self.__every_generations == 0:
+            return True
+        return self.__every_seconds > 0 and time.monotonic() - self.__last_save >= self.__every_seconds
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((CHECKPOINT_VERSION, checkpoint), f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.__last_save = time.monotonic()
+
+    def load(self) -> Optional[Checkpoint]:
+        """
+        :return: Checkpoint: the last checkpoint, None if there is none
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                version, checkpoint = pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+        if version != CHECKPOINT_VERSION:
+            raise ValueError(f'Checkpoint {self.path} has version {version}, expected {CHECKPOINT_VERSION}')
+        return checkpoint
+
+    def remove(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,85 @@
+import mmap
+import codecs
+from collections import Counter
+from string import punctuation
+from typing import Dict, Iterator
+
+
+CHUNK_SIZE = 1 << 20
+_REMOVED = str.maketrans('', '', f'{punctuation}\n\r')
+
+
+def clean_text(enc: str) -> str:
+    """
+    Strip the text and remove punctuation and line breaks, the same way the decoded text is cleaned before scoring.
+    """
+    return enc.strip().translate(_REMOVED)
+
+
+class CipherStats:
+    """
+    Everything fitness needs from the encoded text: its cleaned words and how often each of them appears.
+    The letters and bigrams counts follow from the words, so the size does not depend on the text length.
+    """
+    def __init__(self, words_count: Dict[str, int]) -> None:
+        self.words_count = words_count
+
+    @property
+    def n_words(self) -> int:
+        return sum(self.words_count.values())
+
+    @staticmethod
+    def from_text(enc: str) -> 'CipherStats':
+        return CipherStats(Counter(clean_text(enc).split(' ')))
+
+
+def _chunks(file_path: str, chunk_size: int) -> Iterator[str]:
+    # UTF-8 characters split between chunks are completed by the incremental decoder
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    with open(file_path, 'rb') as f:
+        if f.seek(0, 2) == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            for start in range(0, len(m), chunk_size):
+                yield decoder.decode(m[start:start + chunk_size])
+    yield decoder.decode(b'', final=True)
+
+
+def stream_cipher_stats(file_path: str, chunk_size: int = CHUNK_SIZE) -> CipherStats:
+    """
+    Count the cleaned, lower case words of an encoded text file in one pass over a memory map,
+    with the same words as CipherStats.from_text on the whole text.
+
+    :param file_path: Encoded text file
+    :param chunk_size: Bytes decoded at a time
+    :return: CipherStats: words counts of the text
+    """
+    words_count = Counter()
+    # The unfinished last word of the previous chunk, and the whitespace that is stripped if the text ends with it
+    word, whitespace = '', ''
+    started = False
+
+    for chunk in _chunks(file_path, chunk_size):
+        chunk = chunk.lower()
+        if not started:
+            chunk = chunk.lstrip()
+            started = bool(chunk)
+
+        chunk = whitespace + chunk
+        body = chunk.rstrip()
+        whitespace = chunk[len(body):]
+
+        words = (word + body.translate(_REMOVED)).split(' ')
+        words_count.update(words[:-1])
+        word = words[-1]
+
+    words_count[word] += 1
+    return CipherStats(words_count)
+
+
+def decode_chunks(file_path: str, dec_map: Dict[int, int], chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """
+    Decode the lower case text of an encoded text file, a chunk at a time.
+    """
+    for chunk in _chunks(file_path, chunk_size):
+        yield chunk.lower().translate(dec_map)
@@ -0,0 +1,110 @@
+import os
+import pickle
+import hashlib
+import tempfile
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.cipher_text import CipherStats, stream_cipher_stats
+from src.files_parser import parse_dict, parse_letters_freq
+
+
+# Bump when the parsing or the cached fields change, older caches are then rebuilt
+CORPUS_CACHE_VERSION = 2
+CORPUS_CACHE_PATH = '.corpus_cache.pkl'
+
+# (mtime_ns, size, sha256) of a source file
+Fingerprint = Tuple[int, int, str]
+
+
+class Corpus:
+    """
+    The parsed input files: the encoded text's words counts, the dictionary and the letters and bigrams corpus
+    frequencies. The encoded text itself stays in its file, which is only streamed again to write the decoded text.
+    """
+    def __init__(self, enc_path: str, cipher: CipherStats, dictionary: Set[str], unigram_freq: Dict[str, float],
+                 bigram_freq: Dict[str, float]) -> None:
+        self.enc_path = enc_path
+        self.cipher = cipher
+        self.dictionary = dictionary
+        self.unigram_freq = unigram_freq
+        self.bigram_freq = bigram_freq
+
+    def with_cipher(self, enc_path: str) -> 'Corpus':
+        """
+        The same language files with another encoded text.
+        """
+        return Corpus(enc_path, stream_cipher_stats(enc_path), self.dictionary, self.unigram_freq, self.bigram_freq)
+
+
+def _digest(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _fingerprint(path: str) -> Fingerprint:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size, _digest(path)
+
+
+def _is_fresh(path: str, fingerprint: Fingerprint) -> bool:
+    # Unchanged mtime and size are trusted, otherwise the content decides
+    st = os.stat(path)
+    if (st.st_mtime_ns, st.st_size) == fingerprint[:2]:
+        return True
+    return st.st_size == fingerprint[1] and _digest(path) == fingerprint[2]
+
+
+def _read_cache(cache_path: str, sources: List[str]) -> Optional[Corpus]:
+    try:
+        with open(cache_path, 'rb') as f:
+            version, fingerprints, corpus = pickle.load(f)
+    except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+        return None
+
+    if version != CORPUS_CACHE_VERSION or list(fingerprints.keys()) != sources:
+        return None
+    if not all(_is_fresh(path, fingerprint) for path, fingerprint in fingerprints.items()):
+        return None
+    return corpus
+
+
+def _write_cache(cache_path: str, sources: List[str], corpus: Corpus) -> None:
+    fingerprints = {path: _fingerprint(path) for path in sources}
+    directory = os.path.dirname(os.path.abspath(cache_path))
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((CORPUS_CACHE_VERSION, fingerprints, corpus), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # The cache is only an optimization, a read only directory just parses every time
+        pass
+
+
+def load_corpus(enc_path: str = 'enc.txt', dict_path: str = 'dict.txt', unigram_path: str = 'Letter_Freq.txt',
+                bigram_path: str = 'Letter2_Freq.txt', cache_path: Optional[str] = CORPUS_CACHE_PATH) -> Corpus:
+    """
+    Parse the input files, or load them from a binary cache that is valid while none of the files changed.
+
+    :param cache_path: Path of the cache file, None parses the files without a cache
+    :return: Corpus: the parsed files
+    """
+    sources = [os.path.abspath(p) for p in (enc_path, dict_path, unigram_path, bigram_path)]
+    if cache_path is not None:
+        corpus = _read_cache(cache_path, sources)
+        if corpus is not None:
+            return corpus
+
+    corpus = Corpus(enc_path, stream_cipher_stats(enc_path), set(parse_dict(dict_path)),
+                    parse_letters_freq(unigram_path), parse_letters_freq(bigram_path))
+    if cache_path is not None:
+        _write_cache(cache_path, sources, corpus)
+    return corpus
+
+
+def load_language(dict_path: str = 'dict.txt', unigram_path: str = 'Letter_Freq.txt',
+                  bigram_path: str = 'Letter2_Freq.txt') -> Corpus:
+    """
+    Parse only the dictionary and the frequency files, for decoding several encoded texts with with_cipher.
+    """
+    return Corpus(None, None, set(parse_dict(dict_path)), parse_letters_freq(unigram_path), parse_letters_freq(bigram_path))
@@ -1,3 +1,4 @@
+import numpy as np
 from typing import Dict, List, Tuple
 from random import randint, shuffle
 from copy import deepcopy
@@ -7,6 +8,17 @@ from src.sample import Sample
 from src.selector import Selector
 
 
+class CrossoverType:
+    PMX = 'pmx'
+    ORDER = 'order'
+    ONE_POINT = 'one_point'
+
+
+class MutationType:
+    SWAP = 'swap'
+    SCRAMBLE = 'scramble'
+
+
 class Evolver:
     def __init__(self, enc_letters: List[str]):
         self.__length = len(enc_letters)
@@ -92,7 +104,7 @@ class Evolver:
     def generate_pmx_crossover(self, samples: List[Sample], fitness_scores: List[float]) -> List[str]:
         # Choose 2 samples for crossover
         s1, s2 = Selector.choose_n_weighted_random(samples, fitness_scores, 2)
-        co = self.pmx_crossover(''.join(s1.decode_letters), ''.join(s2.decode_letters))
+        co = self.pmx_crossover(s1.decode_string, s2.decode_string)
         return [co]
 
     def order_crossover(self, s1: str, s2: str) -> Tuple[str, str]:
@@ -112,23 +124,159 @@ class Evolver:
         return cross1, cross2
 
     def generate_order_crossover(self, samples: List[Sample], fitness_scores: List[float]) -> List[str]:
-        # Choose 2 samples for crossover
+        # Choose 2 samples for crossover, order crossover children are always valid
         s1, s2 = Selector.choose_n_weighted_random(samples, fitness_scores, 2)
-        co1, co2 = self.order_crossover(''.join(s1.decode_letters), ''.join(s2.decode_letters))
-
-        while not is_valid(co1) or not is_valid(co2):
-            s1, s2 = Selector.choose_n_weighted_random(samples, fitness_scores, 2)
-            co1, co2 = self.order_crossover(''.join(s1.decode_letters), ''.join(s2.decode_letters))
-
+        co1, co2 = self.order_crossover(s1.decode_string, s2.decode_string)
         return [co1, co2]
 
+    @staticmethod
+    def __repair(child: str, parent: str) -> str:
+        # Replace the second occurrence of every repeated letter with the missing letters, in the parent's order
+        missing = iter([c for c in parent if c not in child])
+        seen = set()
+        repaired = ''
+        for c in child:
+            repaired += next(missing) if c in seen else c
+            seen.add(c)
+        return repaired
+
     def generate_valid_crossover(self, samples: List[Sample], fitness_scores: List[float]) -> List[str]:
         # Choose 2 samples for crossover
         s1, s2 = Selector.choose_n_weighted_random(samples, fitness_scores, 2)
-        co1, co2 = self.one_point_crossover(''.join(s1.decode_letters), ''.join(s2.decode_letters))
+        co1, co2 = self.one_point_crossover(s1.decode_string, s2.decode_string)
+
+        # One point crossover children are rarely permutations, repair them instead of drawing again
+        if not is_valid(co1) or not is_valid(co2):
+            co1, co2 = self.__repair(co1, s2.decode_string), self.__repair(co2, s1.decode_string)
 
-        while not is_valid(co1) or not is_valid(co2):
-            s1, s2 = Selector.choose_n_weighted_random(samples, fitness_scores, 2)
-            co1, co2 = self.one_point_crossover(''.join(s1.decode_letters), ''.join(s2.decode_letters))
-        
         return [co1, co2]
+
+    def __segments(self, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Random [i, j) segment of every row, at least 2 long and shorter than the whole row
+        i = np.random.randint(0, self.__length - 1, size=k)
+        j = np.random.randint(i + 2, self.__length + 1 - (i == 0))
+        return i, j
+
+    def __segment_mask(self, k: int) -> np.ndarray:
+        i, j = self.__segments(k)
+        positions = np.arange(self.__length)
+        return (positions >= i[:, None]) & (positions < j[:, None])
+
+    def batch_pmx_crossover(self, p1: np.ndarray, p2: np.ndarray) -> np.ndarray:
+        """
+        Partially mapped crossover of every pair of rows: the child keeps a random segment of p1, and every other
+        position takes p2's value, mapped through the segment until it is not in the segment.
+
+        :param p1: (k, n_letters) first parents permutation matrix
+        :param p2: (k, n_letters) second parents permutation matrix
+        :return: np.ndarray: (k, n_letters) children permutation matrix
+        """
+        k = len(p1)
+        rows = np.arange(k)[:, None]
+        in_segment = self.__segment_mask(k)
+
+        # Position of every value in p1, and whether the value is in p1's segment
+        p1_index = np.argsort(p1, axis=1)
+        value_in_segment = in_segment[rows, p1_index]
+
+        values = p2.copy()
+        for _ in range(self.__length):
+            mapped = value_in_segment[rows, values] & ~in_segment
+            if not mapped.any():
+                break
+            values = np.where(mapped, p2[rows, p1_index[rows, values]], values)
+
+        return np.where(in_segment, p1, values).astype(np.uint8)
+
+    def batch_order_crossover(self, p1: np.ndarray, p2: np.ndarray) -> np.ndarray:
+        """
+        Order crossover of every pair of rows: the child keeps a random segment of p1,
+        and the other positions take the remaining values in the order they appear in p2.
+
+        :param p1: (k, n_letters) first parents permutation matrix
+        :param p2: (k, n_letters) second parents permutation matrix
+        :return: np.ndarray: (k, n_letters) children permutation matrix
+        """
+        k = len(p1)
+        rows = np.arange(k)[:, None]
+        in_segment = self.__segment_mask(k)
+
+        value_in_segment = in_segment[rows, np.argsort(p1, axis=1)]
+        # Stable sorts move p2's remaining values and the free positions to the front, both in order
+        remaining = p2[rows, np.argsort(value_in_segment[rows, p2], axis=1, kind='stable')]
+        free = np.argsort(in_segment, axis=1, kind='stable')
+
+        child = p1.copy()
+        fill = np.arange(self.__length) < (self.__length - in_segment.sum(axis=1))[:, None]
+        child[np.broadcast_to(rows, fill.shape)[fill], free[fill]] = remaining[fill]
+        return child
+
+    def batch_one_point_crossover(self, p1: np.ndarray, p2: np.ndarray) -> np.ndarray:
+        """
+        One point crossover of every pair of rows: the child takes p1 up to a random point and p2 after it.
+        Values repeated after the point are replaced by the missing values, in the order they appear in p2.
+
+        :param p1: (k, n_letters) first parents permutation matrix
+        :param p2: (k, n_letters) second parents permutation matrix
+        :return: np.ndarray: (k, n_letters) children permutation matrix
+        """
+        k = len(p1)
+        rows = np.arange(k)[:, None]
+        positions = np.arange(self.__length)
+        i = np.random.randint(self.__crossover_min_thresh, self.__crossover_max_thresh + 1, size=k)[:, None]
+        head = positions < i
+
+        # Whether every value is in p1's head
+        value_in_head = np.take_along_axis(head, np.argsort(p1, axis=1), axis=1)
+        child = np.where(head, p1, p2)
+        repeated = ~head & value_in_head[rows, p2]
+        missing = head & ~value_in_head[rows, p2]
+
+        # Stable sorts move the repeated positions and p2's missing values to the front, both in order
+        repeated_positions = np.argsort(~repeated, axis=1, kind='stable')
+        missing_values = p2[rows, np.argsort(~missing, axis=1, kind='stable')]
+        fill = positions < repeated.sum(axis=1)[:, None]
+        child[np.broadcast_to(rows, fill.shape)[fill], repeated_positions[fill]] = missing_values[fill]
+        return child
+
+    def batch_swap_mutation(self, perms: np.ndarray) -> np.ndarray:
+        """
+        :return: np.ndarray: copy of the permutation matrix with two random positions of every row swapped
+        """
+        k = len(perms)
+        rows = np.arange(k)
+        i = np.random.randint(0, self.__length, size=k)
+        j = (i + np.random.randint(1, self.__length, size=k)) % self.__length
+
+        mutated = perms.copy()
+        mutated[rows, i], mutated[rows, j] = perms[rows, j], perms[rows, i]
+        return mutated
+
+    def batch_scramble_mutation(self, perms: np.ndarray) -> np.ndarray:
+        """
+        :return: np.ndarray: copy of the permutation matrix with a random segment of every row shuffled
+        """
+        k = len(perms)
+        i, j = self.__segments(k)
+        positions = np.arange(self.__length)
+        in_segment = (positions >= i[:, None]) & (positions < j[:, None])
+
+        # Positions in the segment get random sort keys inside the segment, the others keep their place
+        keys = np.where(in_segment, i[:, None] + np.random.random((k, self.__length)) * (j - i)[:, None], positions)
+        return np.take_along_axis(perms, np.argsort(keys, axis=1), axis=1)
+
+    def batch_crossover(self, crossover_type: str, p1: np.ndarray, p2: np.ndarray) -> np.ndarray:
+        if crossover_type == CrossoverType.PMX:
+            return self.batch_pmx_crossover(p1, p2)
+        if crossover_type == CrossoverType.ORDER:
+            return self.batch_order_crossover(p1, p2)
+        if crossover_type == CrossoverType.ONE_POINT:
+            return self.batch_one_point_crossover(p1, p2)
+        raise ValueError(f'Unknown crossover type: {crossover_type}')
+
+    def batch_mutation(self, mutation_type: str, perms: np.ndarray) -> np.ndarray:
+        if mutation_type == MutationType.SWAP:
+            return self.batch_swap_mutation(perms)
+        if mutation_type == MutationType.SCRAMBLE:
+            return self.batch_scramble_mutation(perms)
+        raise ValueError(f'Unknown mutation type: {mutation_type}')
@@ -12,8 +12,8 @@ def parse_dict(file_path: str) -> List[str]:
 
 def parse_letters_freq(file_path: str) -> Dict[str, float]:
     with open(file_path, 'r', encoding='utf-8') as f:
-        d = {word.split('\t')[1].lower().strip(): float(word.split('\t')[0].strip())
-             for word in f.readlines() if word not in whitespace and word != '\t#REF!\n'}
+        fields = (word.split('\t') for word in f.readlines() if word not in whitespace and word != '\t#REF!\n')
+        d = {key.lower().strip(): float(freq.strip()) for freq, key, *_ in fields}
 
     return d
 
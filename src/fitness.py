@@ -1,6 +1,7 @@
 import numpy as np
-from typing import List, Dict, Callable, Set, Tuple
+from typing import List, Dict, Callable, Iterable, Set
 from collections import Counter
+from itertools import repeat
 
 
 def check_words_in_dict_ratio(dec: List[str], corpus: Set[str]) -> float:
@@ -43,11 +44,7 @@ def word_correctness_by_len(dec: List[str], corpus: Set[str]) -> float:
 
 def get_let_freq(dec: str):
     counter = Counter(dec)
-
-    try:
-        counter.pop(' ')
-    finally:
-        pass
+    counter.pop(' ', None)
 
     return { k: v / counter.total() for k, v in counter.items() }
 
@@ -71,31 +68,90 @@ def letters_freq_ratio(dec: str, corpus_letters_freq: Dict[str, float], measurem
     return measurement_func(freq1, freq2)
 
 
-def MSE(freq1: List[float], freq2: List[float], rooted: bool = False) -> float:
-    n_freqs = len(freq2)
-    res = 0
+def permute_letters_count(letters_count: np.ndarray, perms: np.ndarray) -> np.ndarray:
+    """
+    Compute the decoded letters count of every permutation from the encoded letters count.
+    A substitution only relabels letters, so decoded letter perm[i] appears as often as encoded letter i.
+
+    :param letters_count: Encoded letters count vector
+    :param perms: (pop_size, n_letters) permutation matrix
+    :return: np.ndarray: (pop_size, n_letters) decoded letters counts
+    """
+    counts = np.empty(perms.shape, dtype=letters_count.dtype)
+    np.put_along_axis(counts, perms.astype(np.intp), np.broadcast_to(letters_count, perms.shape), axis=-1)
+    return counts
+
+
+def count_bigrams(words: List[str], letters: List[str], words_count: Iterable[int] = None) -> np.ndarray:
+    """
+    Count the occurrences of each pair of adjacent letters inside the words.
+
+    :param words: Words to count
+    :param letters: Letters to count, in the order of the result rows and columns
+    :param words_count: Number of times each word appears, once if not given
+    :return: np.ndarray: (n_letters, n_letters) counts matrix
+    """
+    letter_index = {c: i for i, c in enumerate(letters)}
+    counter = Counter()
+    for w, n in zip(words, words_count if words_count is not None else repeat(1)):
+        for b in zip(w, w[1:]):
+            counter[b] += n
+
+    counts = np.zeros((len(letters), len(letters)), dtype=np.int64)
+    for (c1, c2), v in counter.items():
+        if c1 in letter_index and c2 in letter_index:
+            counts[letter_index[c1], letter_index[c2]] = v
+    return counts
+
+
+def bigrams_matrix(bigram_freq: Dict[str, float], letters: List[str]) -> np.ndarray:
+    """
+    Convert the corpus bigram frequencies into a normalized (n_letters, n_letters) matrix.
+    """
+    letter_index = {c: i for i, c in enumerate(letters)}
+    freq = np.zeros((len(letters), len(letters)), dtype=np.float64)
+    for k, v in bigram_freq.items():
+        if len(k) == 2 and k[0] in letter_index and k[1] in letter_index:
+            freq[letter_index[k[0]], letter_index[k[1]]] = v
+    return freq / freq.sum()
 
-    for dec_freq, corpus_freq in zip(freq1, freq2):
-        val = (dec_freq - corpus_freq) ** 2
-        res += val / n_freqs
+
+def permute_bigrams_freq(bigram_freq: np.ndarray, perms: np.ndarray) -> np.ndarray:
+    """
+    Reorder the corpus bigram matrix by the rows and columns of every permutation, so entry [i, j] of
+    permutation k is the corpus frequency of the bigram the encoded bigram (i, j) decodes to.
+
+    :param bigram_freq: (n_letters, n_letters) corpus bigram matrix
+    :param perms: (pop_size, n_letters) permutation matrix
+    :return: np.ndarray: (pop_size, n_letters, n_letters) permuted matrices
+    """
+    perms = perms.astype(np.intp)
+    return bigram_freq[perms[:, :, None], perms[:, None, :]]
+
+
+def MSE(freq1, freq2, rooted: bool = False):
+    res = np.mean((np.asarray(freq1) - np.asarray(freq2)) ** 2, axis=-1)
 
     if rooted:
         res = res ** 0.5
     return res
 
 
-def NMSE(freq1: List[float], freq2: List[float]) -> float:
-    n_freqs = len(freq1)
-    res = sum([(dec_freq - corpus_freq) ** 2 for dec_freq, corpus_freq in zip(freq1, freq2)])
+def NMSE(freq1, freq2):
+    res = np.sum((np.asarray(freq1) - np.asarray(freq2)) ** 2, axis=-1)
     res /= np.var(freq2)
 
-    return res / n_freqs
+    return res / np.shape(freq1)[-1]
+
+
+def abs_diff(freq1, freq2):
+    return np.sum(np.abs(np.asarray(freq1) - np.asarray(freq2)), axis=-1)
 
 
-def abs_diff(freq1: List[float], freq2: List[float]) -> float:
-    return sum([abs(f1 - f2) for f1, f2 in zip(freq1, freq2)])
+def minus_freq_diff(freq1, freq2):
+    length = np.shape(freq2)[-1]
+    return np.sum(1 - np.abs(np.asarray(freq1) - np.asarray(freq2)), axis=-1) / length
 
 
-def minus_freq_diff(freq1: List[float], freq2: List[float]) -> float:
-    length = len(freq2)
-    return sum([1 - abs(f1 - f2) for f1, f2 in zip(freq1, freq2)]) / length
+def minus_total_variation(freq1, freq2):
+    return 1 - abs_diff(freq1, freq2) / 2
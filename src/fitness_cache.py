@@ -0,0 +1,31 @@
+from collections import OrderedDict
+from typing import Optional
+
+
+class FitnessCache:
+    """
+    Bounded fitness cache keyed by the permutation bytes, evicting the least recently used entry when full.
+    """
+    def __init__(self, max_size: int) -> None:
+        self.__max_size = max_size
+        self.__records: OrderedDict[bytes, float] = OrderedDict()
+
+    @property
+    def max_size(self) -> int:
+        return self.__max_size
+
+    def get(self, key: bytes) -> Optional[float]:
+        value = self.__records.get(key)
+        if value is not None:
+            self.__records.move_to_end(key)
+        return value
+
+    def put(self, key: bytes, value: float) -> None:
+        self.__records[key] = value
+        self.__records.move_to_end(key)
+
+        if len(self.__records) > self.__max_size:
+            self.__records.popitem(last=False)
+
+    def __len__(self):
+        return len(self.__records)
@@ -0,0 +1,317 @@
+import numpy as np
+from typing import Callable, Dict, List, Set, Sequence, Union
+
+from src.cipher_text import CipherStats
+from src.fitness import abs_diff, bigrams_matrix, count_bigrams, minus_freq_diff, minus_total_variation, \
+    permute_bigrams_freq, permute_letters_count
+from src.population import Population
+from src.sample import Sample
+
+
+class FitnessState:
+    """
+    Incremental scoring state of a single permutation, updated in place by FitnessEngine.swap:
+    the words found in the dictionary, the decoded letters count, the unigram term and the bigrams total difference.
+    """
+    def __init__(self, perm: np.ndarray, found: np.ndarray, found_count: int, letters_count: np.ndarray,
+                 unigram: float, bigram_diff: float, fitness: float) -> None:
+        self.perm = perm
+        self.found = found
+        self.found_count = found_count
+        self.letters_count = letters_count
+        self.unigram = unigram
+        self.bigram_diff = bigram_diff
+        self.fitness = fitness
+
+
+class FitnessEngine:
+    """
+    Scores a whole population at once.
+
+    The population is a (pop_size, n_letters) uint8 matrix where row k maps the i-th encoded letter to the
+    index of its decoded letter. The ciphertext is given as its unique words and their counts, which are
+    encoded into a padded (n_unique_words, width) matrix of symbols, so decoding the whole population is a single
+    table lookup and every distinct word is checked against the dictionary once per permutation.
+    The encoded letters and bigrams counts are computed once as well, and the unigram and bigram terms only permute them.
+    """
+    CHUNK_SIZE = 2048
+
+    def __init__(self, dictionary: Set[str], enc: Union[str, CipherStats], enc_letters: List[str], unigram_freq: Dict[str, float],
+                 bigram_freq: Dict[str, float] = None, bigram_weight: float = 0.0,
+                 unigram_measure: Callable = minus_freq_diff) -> None:
+        self.__letters = enc_letters
+        letter_index: Dict[str, int] = {c: i for i, c in enumerate(enc_letters)}
+
+        cipher = CipherStats.from_text(enc) if isinstance(enc, str) else enc
+        words = list(cipher.words_count.keys())
+
+        # Symbol 0 is padding, letters are 1..n_letters and any other character of the text follows them
+        self.__symbols: Dict[str, int] = {c: i + 1 for i, c in enumerate(enc_letters)}
+        for c in sorted(set().union(*words) - set(enc_letters)):
+            self.__symbols[c] = len(self.__symbols) + 1
+
+        if len(self.__symbols) > np.iinfo(np.uint8).max:
+            raise ValueError(f'Too many distinct characters in the encoded text: {len(self.__symbols)}')
+
+        # Words are padded to a whole number of 64 bit chunks so they can be compared as integers
+        max_len = max(1, max(len(w) for w in words))
+        self.__width = -(-max_len // 8) * 8
+        self.__words = self.__encode_words(words)
+        self.__words_count = np.array(list(cipher.words_count.values()), dtype=np.int64)
+        self.__n_words = int(self.__words_count.sum())
+        self.__strata: List[np.ndarray] = None
+        self.__init_dictionary(dictionary)
+
+        # Inverted index from each encoded letter to the unique words that contain it
+        self.__letter_words: List[np.ndarray] = [np.nonzero((self.__words == i + 1).any(axis=1))[0]
+                                                 for i in range(len(enc_letters))]
+
+        # Letters counts of the whole text, from the symbols of every unique word times its count
+        symbols_count = np.bincount(self.__words.ravel(), weights=np.repeat(self.__words_count, self.__width),
+                                    minlength=len(self.__symbols) + 1).astype(np.int64)
+        self.__letters_count = symbols_count[1:len(enc_letters) + 1]
+        self.__n_chars = int(symbols_count[1:].sum())
+        self.__freq_order = np.array([letter_index[c] for c in unigram_freq.keys()], dtype=np.intp)
+        # Position of every decoded letter in the corpus unigram frequencies
+        self.__freq_position = np.empty(len(enc_letters), dtype=np.intp)
+        self.__freq_position[self.__freq_order] = np.arange(len(self.__freq_order))
+        self.__corpus_freq = np.array(list(unigram_freq.values()), dtype=np.float64)
+        self.__unigram_measure = unigram_measure
+        # Frequencies a swap's unigram change is measured on, equal to the corpus frequencies between swaps
+        self.__swap_freqs = np.tile(self.__corpus_freq, (2, 1))
+        # Rows and columns of the bigram matrices a swap of encoded letters i and j moves, by (i, j)
+        self.__swap_lines: Dict[tuple, tuple] = {}
+
+        self.__bigram_weight = bigram_weight
+        if bigram_weight:
+            bigrams_count = count_bigrams(words, enc_letters, cipher.words_count.values())
+            self.__bigrams_freq = bigrams_count / max(1, bigrams_count.sum())
+            self.__corpus_bigrams_freq = bigrams_matrix(bigram_freq, enc_letters)
+
+    def __encode_words(self, words: List[str]) -> np.ndarray:
+        # Characters are translated to their symbols, so every word is encoded by a single C level call
+        table = {ord(c): v for c, v in self.__symbols.items()}
+        buffer = b''.join(w.translate(table).encode('latin-1').ljust(self.__width, b'\0') for w in words)
+        return np.frombuffer(buffer, dtype=np.uint8).reshape(len(words), self.__width).copy()
+
+    @staticmethod
+    def __hash(keys: np.ndarray) -> np.ndarray:
+        h = keys[..., 0].copy()
+        for i in range(1, keys.shape[-1]):
+            h = h * np.uint64(1099511628211) + keys[..., i]
+        return h
+
+    def __init_dictionary(self, dictionary: Set[str]) -> None:
+        # Words that are longer than any encoded word or use unknown characters can never be matched
+        symbols = self.__symbols.keys()
+        keys = self.__encode_words([w for w in dictionary if len(w) <= self.__width and symbols >= set(w)])
+        keys = keys.view(np.uint64)
+
+        hashes = self.__hash(keys)
+        order = np.argsort(hashes)
+        self.__dict_hashes = hashes[order]
+        self.__dict_keys = keys[order]
+        self.__dict_collisions = len(np.unique(hashes)) != len(hashes)
+
+    def encode(self, samples: List[Sample]) -> np.ndarray:
+        """
+        Convert samples into a (pop_size, n_letters) permutation matrix.
+        """
+        return Population.from_samples(self.__letters, samples).perms
+
+    def decode_words(self, perms: np.ndarray, words: np.ndarray = None) -> np.ndarray:
+        """
+        Decode the encoded words for every permutation.
+
+        :param perms: (pop_size, n_letters) permutation matrix
+        :param words: Indices of the unique words to decode, all of them by default
+        :return: (pop_size, n_unique_words, width / 8) array of decoded words packed as uint64 keys
+        """
+        n, n_letters = perms.shape
+        table = np.empty((n, len(self.__symbols) + 1), dtype=np.uint8)
+        table[:, 0] = 0
+        table[:, 1:n_letters + 1] = perms + 1
+        table[:, n_letters + 1:] = np.arange(n_letters + 1, len(self.__symbols) + 1, dtype=np.uint8)
+
+        encoded = self.__words if words is None else self.__words[words]
+        decoded = table[np.arange(n)[:, None, None], encoded[None]]
+        return decoded.view(np.uint64)
+
+    def words_in_dict(self, perms: np.ndarray, words: np.ndarray = None) -> np.ndarray:
+        """
+        :return: (pop_size, n_unique_words) boolean matrix of decoded words found in the dictionary
+        """
+        keys = self.decode_words(perms, words)
+        if len(self.__dict_hashes) == 0:
+            return np.zeros(keys.shape[:-1], dtype=bool)
+
+        if self.__dict_collisions:
+            str_type = f'S{self.__width}'
+            return np.isin(keys.view(str_type)[..., 0], self.__dict_keys.view(str_type)[..., 0])
+
+        hashes = self.__hash(keys)
+        idx = np.searchsorted(self.__dict_hashes, hashes)
+        idx[idx == len(self.__dict_hashes)] = 0
+        return (self.__dict_hashes[idx] == hashes) & (self.__dict_keys[idx] == keys).all(axis=-1)
+
+    def words_in_dict_ratio(self, perms: np.ndarray) -> np.ndarray:
+        found = self.words_in_dict(perms)
+        return (found @ self.__words_count) / self.__n_words
+
+    def letters_freq(self, perms: np.ndarray) -> np.ndarray:
+        """
+        Decoded letter frequencies, ordered like the corpus unigram frequencies.
+        """
+        counts = permute_letters_count(self.__letters_count, perms)
+        return counts[:, self.__freq_order] / self.__n_chars
+
+    def letters_freq_ratio(self, perms: np.ndarray) -> np.ndarray:
+        return self.__unigram_measure(self.letters_freq(perms), self.__corpus_freq)
+
+    def bigrams_freq_ratio(self, perms: np.ndarray) -> np.ndarray:
+        """
+        Similarity between the encoded bigrams and the corpus bigrams they decode to, in O(n_letters^2) per permutation.
+        """
+        corpus_freq = permute_bigrams_freq(self.__corpus_bigrams_freq, perms).reshape(len(perms), -1)
+        return minus_total_variation(self.__bigrams_freq.ravel(), corpus_freq)
+
+    def __unigram(self, letters_count: np.ndarray) -> np.ndarray:
+        return self.__unigram_measure(letters_count[:, self.__freq_order] / self.__n_chars, self.__corpus_freq)
+
+    def __bigram_diff(self, perms: np.ndarray) -> np.ndarray:
+        if not self.__bigram_weight:
+            return np.zeros(len(perms))
+        corpus_freq = permute_bigrams_freq(self.__corpus_bigrams_freq, perms).reshape(len(perms), -1)
+        return abs_diff(self.__bigrams_freq.ravel(), corpus_freq)
+
+    def __combine(self, found_count: np.ndarray, unigram: np.ndarray, bigram_diff: np.ndarray, n_words: int = None) -> np.ndarray:
+        words_in_dict_measure = found_count / (n_words or self.__n_words)
+        fitness_scores = (words_in_dict_measure * 9 + unigram * 1) / 10
+
+        if self.__bigram_weight:
+            bigrams_measure = 1 - bigram_diff / 2
+            fitness_scores = fitness_scores * (1 - self.__bigram_weight) + bigrams_measure * self.__bigram_weight
+
+        return fitness_scores
+
+    def __score(self, found_count: np.ndarray, letters_count: np.ndarray, perms: np.ndarray, n_words: int = None) -> np.ndarray:
+        return self.__combine(found_count, self.__unigram(letters_count), self.__bigram_diff(perms), n_words)
+
+    def fitness(self, perms: np.ndarray, words: np.ndarray = None) -> np.ndarray:
+        """
+        :param perms: (pop_size, n_letters) permutation matrix
+        :param words: Indices of the unique words the dictionary ratio is estimated on, all of them by default
+        :return: np.ndarray: fitness scores
+        """
+        words_count = self.__words_count if words is None else self.__words_count[words]
+        n_words = int(words_count.sum())
+
+        # Large batches, like a whole neighbourhood, are scored in chunks to bound the decoded words matrix
+        fitness_scores = np.empty(len(perms), dtype=np.float64)
+        for start in range(0, len(perms), self.CHUNK_SIZE):
+            chunk = perms[start:start + self.CHUNK_SIZE]
+            found_count = self.words_in_dict(chunk, words) @ words_count
+            fitness_scores[start:start + len(chunk)] = self.__score(found_count, permute_letters_count(self.__letters_count, chunk), chunk, n_words)
+        return fitness_scores
+
+    @property
+    def n_unique_words(self) -> int:
+        return len(self.__words)
+
+    def stratified_words(self, fraction: float, seed: int = 0) -> np.ndarray:
+        """
+        Fixed sample of the unique words, stratified by word length. Every stratum keeps a random order,
+        drawn once and weighted by the word counts, so a larger fraction extends a smaller one.
+
+        :param fraction: Fraction of the unique words of every stratum to take, at least one
+        :return: np.ndarray: indices of the sampled unique words
+        """
+        if self.__strata is None:
+            rng = np.random.default_rng(seed)
+            # Weighted random order: the words sorted by u ^ (1 / count)
+            keys = rng.random(len(self.__words)) ** (1 / self.__words_count)
+            lengths = (self.__words != 0).sum(axis=1)
+            self.__strata = [idx[np.argsort(-keys[idx])] for idx in (np.nonzero(lengths == n)[0] for n in np.unique(lengths))]
+
+        return np.sort(np.concatenate([idx[:max(1, int(np.ceil(fraction * len(idx))))] for idx in self.__strata]))
+
+    def states(self, perms: np.ndarray) -> List[FitnessState]:
+        """
+        Score the permutations and keep what is needed to update each score incrementally.
+        """
+        found = self.words_in_dict(perms)
+        found_count = found @ self.__words_count
+        letters_count = permute_letters_count(self.__letters_count, perms)
+        unigram = self.__unigram(letters_count)
+        bigram_diff = self.__bigram_diff(perms)
+        fitness_scores = self.__combine(found_count, unigram, bigram_diff)
+
+        return [FitnessState(perms[k].copy(), found[k].copy(), int(found_count[k]), letters_count[k].copy(),
+                             float(unigram[k]), float(bigram_diff[k]), float(fitness_scores[k]))
+                for k in range(len(perms))]
+
+    def __unigram_change(self, counts: np.ndarray, a: int, b: int) -> float:
+        # The unigram measures are sums of per letter terms, so the change only depends on the two exchanged counts:
+        # both rows equal the corpus frequencies elsewhere, where their terms cancel out
+        pa, pb = self.__freq_position[a], self.__freq_position[b]
+        fa, fb = counts[a] / self.__n_chars, counts[b] / self.__n_chars
+        freqs = self.__swap_freqs
+        freqs[0, pa], freqs[0, pb], freqs[1, pa], freqs[1, pb] = fa, fb, fb, fa
+        before, after = self.__unigram_measure(freqs, self.__corpus_freq)
+        freqs[:, pa], freqs[:, pb] = self.__corpus_freq[pa], self.__corpus_freq[pb]
+        return float(after - before)
+
+    def __lines(self, i: int, j: int) -> tuple:
+        lines = self.__swap_lines.get((i, j))
+        if lines is None:
+            n_letters = len(self.__letters)
+            mask = np.zeros((n_letters, n_letters), dtype=bool)
+            mask[[i, j], :] = True
+            mask[:, [i, j]] = True
+            rows, cols = np.nonzero(mask)
+            lines = self.__swap_lines[(i, j)] = (rows, cols, self.__bigrams_freq[rows, cols])
+        return lines
+
+    def __bigram_change(self, perm: np.ndarray, i: int, j: int) -> float:
+        # Only rows i and j and columns i and j of the permuted corpus matrix change
+        rows, cols, enc_freq = self.__lines(i, j)
+        before = self.__corpus_bigrams_freq[perm[rows], perm[cols]]
+        swapped = perm.copy()
+        swapped[i], swapped[j] = perm[j], perm[i]
+        after = self.__corpus_bigrams_freq[swapped[rows], swapped[cols]]
+        return float(np.abs(enc_freq - after).sum() - np.abs(enc_freq - before).sum())
+
+    def swap(self, state: FitnessState, swaps: Sequence[Sequence[int]]) -> float:
+        """
+        Swap the decoded letters of pairs of encoded letters and update the state's fitness.
+        Only the words containing a swapped letter are decoded and looked up again, the unigram term is updated from
+        the two exchanged letters counts, and the bigrams difference from the swapped rows and columns.
+
+        :param state: State to update in place
+        :param swaps: Pairs of encoded letter indices
+        :return: float: fitness change
+        """
+        prev_fitness = state.fitness
+        perm, counts = state.perm, state.letters_count
+        affected = []
+
+        for i, j in swaps:
+            if i == j:
+                continue
+            a, b = perm[i], perm[j]
+            state.unigram += self.__unigram_change(counts, a, b)
+            if self.__bigram_weight:
+                state.bigram_diff += self.__bigram_change(perm, i, j)
+            perm[i], perm[j] = b, a
+            counts[a], counts[b] = counts[b], counts[a]
+            affected.append(self.__letter_words[i])
+            affected.append(self.__letter_words[j])
+
+        words = np.unique(np.concatenate(affected)) if affected else np.empty(0, dtype=np.intp)
+        if len(words):
+            found = self.words_in_dict(perm[None], words)[0]
+            state.found_count += int((found.astype(np.int64) - state.found[words]) @ self.__words_count[words])
+            state.found[words] = found
+
+        state.fitness = float(self.__combine(state.found_count, state.unigram, state.bigram_diff))
+        return state.fitness - prev_fitness
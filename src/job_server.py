@@ -0,0 +1,298 @@
+import os
+import re
+import json
+import uuid
+import random
+import shutil
+import asyncio
+import tempfile
+import contextlib
+import numpy as np
+from typing import AsyncIterator, Dict, List, Optional
+
+from src.corpus import Corpus
+from src.progress import ProgressObserver
+from src.simulator import SimulationArgs, Simulator
+from src.strategy import GeneticAlgorithmType
+
+
+JOBS_DIR_PATH = 'jobs'
+# The arguments main.py runs with, a job's args override them
+DEFAULT_JOB_ARGS = {'fitness_goal': 0.99, 'elite_percentile': 0.9, 'mutation_percentage': 0.2, 'mutation_decay': 1e-3,
+                    'mutation_min_percentage': 0.2, 'generation_tolerance': 50,
+                    'generation_tolerance_percentage': 0.01}
+# Job ids label events and spool files, they never name a path on their own
+JOB_ID_PATTERN = re.compile(r'[A-Za-z0-9_-][A-Za-z0-9_.-]{0,127}')
+
+
+class JobEvent:
+    QUEUED = 'queued'
+    PROGRESS = 'progress'
+    DONE = 'done'
+    ERROR = 'error'
+
+
+class Job:
+    """
+    A ciphertext to decode, with the simulation to decode it with. Built from a JSON object of the form
+    {"id": ..., "cipher": ..., "algorithm": "regular", "population": 300, "runs": 1, "seed": ..., "args": {...}},
+    where only the cipher is required and args holds SimulationArgs keyword arguments.
+    """
+    def __init__(self, cipher: str, algorithm: str = 'regular', population: int = 300, runs: int = 1,
+                 seed: int = None, args: Dict = None, job_id: str = None) -> None:
+        if job_id is not None and not JOB_ID_PATTERN.fullmatch(job_id):
+            raise ValueError(f'Job id {job_id!r} is not a token of letters, digits, "_", "-" and "."')
+        self.id = job_id if job_id is not None else uuid.uuid4().hex
+        self.cipher = cipher
+        self.algo_type = GeneticAlgorithmType[algorithm.upper()]
+        self.population = population
+        self.runs = runs
+        self.seed = seed
+        self.args = {**DEFAULT_JOB_ARGS, **(args or {})}
+        # Fails here, before the job is queued, on unknown arguments
+        SimulationArgs(**self.args)
+
+    @staticmethod
+    def from_json(message: Dict) -> 'Job':
+        if not isinstance(message.get('cipher'), str):
+            raise ValueError('A job needs a "cipher" string')
+        job_id = message.get('id')
+        return Job(message['cipher'], message.get('algorithm', 'regular'), int(message.get('population', 300)),
+                   int(message.get('runs', 1)), message.get('seed'), message.get('args'),
+                   str(job_id) if job_id is not None else None)
+
+
+class QueueObserver(ProgressObserver):
+    """
+    Sends the best, average and worst fitness and the diversity of every generation of a job to the server.
+    """
+    def __init__(self, job_id: str, queue) -> None:
+        self.__job_id = job_id
+        self.__queue = queue
+
+    def update(self, title: str, history) -> None:
+        self.__queue.put((self.__job_id, {'generation': len(history) - 1, 'best': history.best[-1],
+                                          'average': history.average[-1], 'worst': history.worst[-1],
+                                          'diversity': history.diversity[-1]}))
+
+
+_language: Corpus = None
+_progress = None
+
+
+def _init_job_worker(language: Corpus, progress) -> None:
+    global _language, _progress
+    _language = language
+    _progress = progress
+
+
+def _warm_up() -> None:
+    pass
+
+
+def _run_job(job: Job, job_dir: str) -> Dict:
+    if job.seed is not None:
+        random.seed(job.seed)
+        np.random.seed(job.seed % 2 ** 32)
+
+    enc_path = os.path.join(job_dir, 'enc.txt')
+    with open(enc_path, 'wt', encoding='utf-8') as f:
+        f.write(job.cipher)
+
+    try:
+        simulator = Simulator(job.algo_type, job.population, SimulationArgs(**job.args),
+                              QueueObserver(job.id, _progress), corpus=_language.with_cipher(enc_path),
+                              output_dir=job_dir)
+        try:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                _, fitness_scores = simulator.run_multiple(job.runs)
+        finally:
+            simulator.close()
+    finally:
+        # Follows the job's last progress on the queue
+        _progress.put((job.id, None))
+
+    with open(os.path.join(job_dir, 'perm.txt'), encoding='utf-8') as f:
+        perm = f.read()
+    with open(os.path.join(job_dir, 'plain.txt'), encoding='utf-8') as f:
+        plain = f.read()
+    return {'fitness': max(fitness_scores), 'fitness_calls': simulator.counters['fitness_calls'],
+            'perm': perm, 'plain': plain}
+
+
+class JobServer:
+    """
+    Decodes jobs in a bounded pool of worker processes that parse the language files once, when they start.
+    Jobs arrive as JSON lines over a local socket, or as JSON files in a spool directory, and their progress
+    is streamed back while they run.
+    """
+    def __init__(self, language: Corpus, workers: int = None, jobs_dir: str = JOBS_DIR_PATH) -> None:
+        self.__language = language
+        self.__workers = workers or os.cpu_count()
+        self.__jobs_dir = jobs_dir
+        self.__executor = None
+        self.__progress = None
+        self.__pump: asyncio.Task = None
+        self.__listeners: Dict[str, asyncio.Queue] = {}
+
+    async def __aenter__(self) -> 'JobServer':
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        context = multiprocessing.get_context('forkserver' if os.name == 'posix' else 'spawn')
+        self.__progress = context.Queue()
+        self.__executor = ProcessPoolExecutor(max_workers=self.__workers, mp_context=context,
+                                              initializer=_init_job_worker, initargs=(self.__language, self.__progress))
+        self.__pump = asyncio.get_running_loop().create_task(self.__pump_progress())
+        # Start every worker now, so no job waits for a process to start and parse the language files
+        await asyncio.gather(*(asyncio.wrap_future(self.__executor.submit(_warm_up)) for _ in range(self.__workers)))
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.__progress.put(None)
+        await self.__pump
+        await asyncio.get_running_loop().run_in_executor(None, self.__executor.shutdown)
+
+    async def __pump_progress(self) -> None:
+        # The workers' progress queue is read in a thread, and every message goes to its job's listener
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(None, self.__progress.get)
+            if message is None:
+                return
+            job_id, progress = message
+            listener = self.__listeners.get(job_id)
+            if listener is not None:
+                listener.put_nowait(progress)
+
+    async def submit(self, job: Job) -> AsyncIterator[Dict]:
+        """
+        Queue a job and yield its events: queued, then progress of every generation, then done or error.
+        """
+        if job.id in self.__listeners:
+            raise ValueError(f'Job {job.id} is already running')
+
+        listener: asyncio.Queue = asyncio.Queue()
+        self.__listeners[job.id] = listener
+        # The job runs in a directory of its own, whatever its id
+        os.makedirs(self.__jobs_dir, exist_ok=True)
+        job_dir = tempfile.mkdtemp(prefix='job-', dir=self.__jobs_dir)
+        future = asyncio.wrap_future(self.__executor.submit(_run_job, job, job_dir))
+        try:
+            yield {'job': job.id, 'event': JobEvent.QUEUED}
+            while True:
+                getter = asyncio.ensure_future(listener.get())
+                await asyncio.wait([getter, future], return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done() and future.exception() is not None:
+                    # A job that could not reach a worker sends no progress
+                    getter.cancel()
+                    break
+                progress = await getter
+                if progress is None:
+                    break
+                yield {'job': job.id, 'event': JobEvent.PROGRESS, **progress}
+
+            try:
+                yield {'job': job.id, 'event': JobEvent.DONE, **(await future)}
+            except Exception as e:
+                yield {'job': job.id, 'event': JobEvent.ERROR, 'error': f'{type(e).__name__}: {e}'}
+        finally:
+            del self.__listeners[job.id]
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    async def __handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        lock = asyncio.Lock()
+        tasks: List[asyncio.Task] = []
+
+        async def send(event: Dict) -> None:
+            async with lock:
+                writer.write(json.dumps(event).encode('utf-8') + b'\n')
+                await writer.drain()
+
+        async def run(job: Job) -> None:
+            try:
+                async for event in self.submit(job):
+                    await send(event)
+            except (ValueError, RuntimeError) as e:
+                await send({'job': job.id, 'event': JobEvent.ERROR, 'error': f'{type(e).__name__}: {e}'})
+
+        try:
+            # Every line is a job, the jobs of a connection run concurrently and their events interleave
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    job = Job.from_json(json.loads(line))
+                except (ValueError, KeyError, TypeError) as e:
+                    await send({'event': JobEvent.ERROR, 'error': f'{type(e).__name__}: {e}'})
+                    continue
+                tasks.append(asyncio.get_running_loop().create_task(run(job)))
+            await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def serve_socket(self, path: str = None, host: str = '127.0.0.1', port: int = None) -> asyncio.AbstractServer:
+        """
+        Accept jobs on a unix socket if a path is given, otherwise on a local TCP port.
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self.__handle_client, path=path)
+        return await asyncio.start_server(self.__handle_client, host=host, port=port)
+
+    async def __run_spooled(self, spool_dir: str, name: str) -> None:
+        path = os.path.join(spool_dir, f'{name}.running')
+        stem = name[:-len('.json')]
+        done_dir = os.path.join(spool_dir, 'done')
+        os.makedirs(done_dir, exist_ok=True)
+
+        with open(os.path.join(done_dir, f'{stem}.jsonl'), 'wt', encoding='utf-8') as log:
+            try:
+                # An unreadable job file, or a job id that is already running, ends the job with an error event
+                with open(path, encoding='utf-8') as f:
+                    message = json.load(f)
+                # The file name is the job id, whatever id the job file holds
+                job = Job.from_json({**message, 'id': stem})
+                async for event in self.submit(job):
+                    if event['event'] == JobEvent.DONE:
+                        for key in ('perm', 'plain'):
+                            with open(os.path.join(done_dir, f'{stem}.{key}.txt'), 'wt', encoding='utf-8') as f:
+                                f.write(event.pop(key))
+                    log.write(json.dumps(event) + '\n')
+            except (ValueError, KeyError, TypeError, RuntimeError) as e:
+                log.write(json.dumps({'job': stem, 'event': JobEvent.ERROR, 'error': f'{type(e).__name__}: {e}'}) + '\n')
+
+    async def watch_spool(self, spool_dir: str, interval: float = 1.0, stop: Optional[asyncio.Event] = None) -> None:
+        """
+        Run every <name>.json job file that appears in the spool directory. A job is claimed by renaming it to
+        <name>.json.running, and when it ends its events, perm.txt and plain.txt are written to the done directory
+        as <name>.jsonl, <name>.perm.txt and <name>.plain.txt.
+        """
+        os.makedirs(spool_dir, exist_ok=True)
+        tasks = set()
+
+        async def run(name: str) -> None:
+            try:
+                await self.__run_spooled(spool_dir, name)
+            finally:
+                os.replace(os.path.join(spool_dir, f'{name}.running'), os.path.join(spool_dir, 'done', name))
+
+        while stop is None or not stop.is_set():
+            for name in sorted(os.listdir(spool_dir)):
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    os.rename(os.path.join(spool_dir, name), os.path.join(spool_dir, f'{name}.running'))
+                except OSError:
+                    # Claimed by another server
+                    continue
+                task = asyncio.get_running_loop().create_task(run(name))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if stop is None:
+                await asyncio.sleep(interval)
+            else:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(stop.wait(), interval)
+
+        await asyncio.gather(*tasks)
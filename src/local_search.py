@@ -0,0 +1,115 @@
+import numpy as np
+from typing import Callable, Tuple
+
+
+class LocalSearchType:
+    # Blind walk of random swaps, scored incrementally
+    RANDOM = 'random'
+    # Move to the first improving swap, trying the swaps in a random order
+    FIRST = 'first'
+    # Move to the best of all the pairwise swaps
+    STEEPEST = 'steepest'
+
+
+def pair_swaps(n_letters: int) -> np.ndarray:
+    """
+    :return: np.ndarray: (n_letters * (n_letters - 1) / 2, 2) array of all pairs of letter indices
+    """
+    return np.stack(np.triu_indices(n_letters, 1), axis=1)
+
+
+def neighbours(perms: np.ndarray, swaps: np.ndarray) -> np.ndarray:
+    """
+    Apply swaps to copies of the permutations.
+
+    :param perms: (pop_size, n_letters) permutation matrix
+    :param swaps: (n_swaps, 2) swaps applied to every permutation, or (pop_size, n_swaps, 2) swaps per permutation
+    :return: np.ndarray: (pop_size, n_swaps, n_letters) neighbour permutations
+    """
+    n = len(perms)
+    swaps = np.broadcast_to(swaps, (n,) + swaps.shape[-2:])
+    rows = np.arange(n)[:, None]
+    cols = np.arange(swaps.shape[1])[None, :]
+    a, b = swaps[..., 0], swaps[..., 1]
+
+    result = np.repeat(perms[:, None, :], swaps.shape[1], axis=1)
+    result[rows, cols, a] = perms[rows, b]
+    result[rows, cols, b] = perms[rows, a]
+    return result
+
+
+class BatchLocalSearch:
+    """
+    Hill climbing over the swap neighbourhood of a whole population at once.
+    Every round builds the candidate neighbours of all the individuals that are still searching
+    and scores them with a single call of the batch fitness function.
+    """
+    def __init__(self, evaluate: Callable[[np.ndarray], np.ndarray], n_letters: int, search_type: str, rounds: int,
+                 block_size: int = None) -> None:
+        if search_type not in (LocalSearchType.FIRST, LocalSearchType.STEEPEST):
+            raise ValueError(f'Unknown batch local search type: {search_type}')
+
+        self.__evaluate = evaluate
+        self.__swaps = pair_swaps(n_letters)
+        self.__search_type = search_type
+        self.__rounds = rounds
+        self.__block_size = block_size or n_letters
+
+    def __steepest_round(self, perms: np.ndarray, scores: np.ndarray) -> np.ndarray:
+        candidates = neighbours(perms, self.__swaps)
+        candidates_scores = self.__evaluate(candidates.reshape(-1, perms.shape[1])).reshape(len(perms), -1)
+
+        best = np.argmax(candidates_scores, axis=1)
+        best_scores = candidates_scores[np.arange(len(perms)), best]
+        improved = best_scores > scores
+
+        perms[improved] = candidates[improved, best[improved]]
+        scores[improved] = best_scores[improved]
+        return improved
+
+    def __first_round(self, perms: np.ndarray, scores: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        # Every individual tries the swaps in its own random order, a block at a time
+        order = rng.permuted(np.tile(np.arange(len(self.__swaps)), (len(perms), 1)), axis=1)
+        searching = np.ones(len(perms), dtype=bool)
+        improved = np.zeros(len(perms), dtype=bool)
+
+        for start in range(0, len(self.__swaps), self.__block_size):
+            idx = np.nonzero(searching)[0]
+            if len(idx) == 0:
+                break
+
+            swaps = self.__swaps[order[idx, start:start + self.__block_size]]
+            candidates = neighbours(perms[idx], swaps)
+            candidates_scores = self.__evaluate(candidates.reshape(-1, perms.shape[1])).reshape(len(idx), -1)
+
+            better = candidates_scores > scores[idx, None]
+            found = better.any(axis=1)
+            first = np.argmax(better, axis=1)
+
+            moved = idx[found]
+            perms[moved] = candidates[found, first[found]]
+            scores[moved] = candidates_scores[found, first[found]]
+            searching[moved] = False
+            improved[moved] = True
+
+        return improved
+
+    def run(self, perms: np.ndarray, scores: np.ndarray, seed: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param perms: (pop_size, n_letters) permutation matrix
+        :param scores: Fitness scores of the permutations
+        :return: the improved permutations and their scores, the inputs are not changed
+        """
+        perms, scores = perms.copy(), np.array(scores, dtype=np.float64)
+        rng = np.random.default_rng(seed)
+
+        for _ in range(self.__rounds):
+            if self.__search_type == LocalSearchType.STEEPEST:
+                improved = self.__steepest_round(perms, scores)
+            else:
+                improved = self.__first_round(perms, scores, rng)
+
+            if not improved.any():
+                break
+
+        return perms, scores
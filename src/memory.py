@@ -1,12 +1,152 @@
-from typing import Dict
+import math
+import numpy as np
+from typing import Dict, List, Set, Union
 
 
-class Memory:
+# A permutation as its decoded letters, or as the bytes of its permutation matrix row
+Record = Union[str, bytes]
+
+_FNV_OFFSET = np.uint64(14695981039346656037)
+_FNV_PRIME = np.uint64(1099511628211)
+
+
+def hash_rows(rows: np.ndarray, seed: int = 0) -> np.ndarray:
+    """
+    64 bit hash of every row of a uint8 matrix: FNV-1a over 8 byte words, then the splitmix64 finalizer.
+
+    :param rows: (n, width) uint8 matrix
+    :param seed: Hashes with different seeds are independent
+    :return: np.ndarray: (n,) uint64 hashes
+    """
+    n, width = rows.shape
+    padded = np.zeros((n, -(-width // 8) * 8), dtype=np.uint8)
+    padded[:, :width] = rows
+    words = padded.view(np.uint64)
+
+    h = np.full(n, _FNV_OFFSET ^ np.uint64(seed), dtype=np.uint64)
+    for i in range(words.shape[1]):
+        h = (h ^ words[:, i]) * _FNV_PRIME
+
+    h ^= h >> np.uint64(30)
+    h *= np.uint64(0xbf58476d1ce4e5b9)
+    h ^= h >> np.uint64(27)
+    h *= np.uint64(0x94d049bb133111eb)
+    h ^= h >> np.uint64(31)
+    return h
+
+
+class MemoryBackend:
+    EXACT = 'exact'
+    BLOOM = 'bloom'
+
+
+class ExactMemory:
+    """
+    Exact set of every record, growing with the number of distinct records.
+    """
     def __init__(self) -> None:
-        self.__records: Dict[int, str] = dict()
-    
-    def add(self, record: str):
-        self.__records[hash(record)] = record
-    
-    def __contains__(self, item):
-        return hash(item) in self.__records
+        self.__records: Set[bytes] = set()
+
+    def add_rows(self, rows: np.ndarray):
+        self.__records.update(r.tobytes() for r in rows)
+
+    def contains_rows(self, rows: np.ndarray) -> np.ndarray:
+        return np.fromiter((r.tobytes() in self.__records for r in rows), dtype=bool, count=len(rows))
+
+    def __len__(self):
+        return len(self.__records)
+
+    def __getstate__(self):
+        # Records of one length are pickled as a single buffer instead of a set of small objects
+        widths = {len(r) for r in self.__records}
+        if len(widths) == 1:
+            return widths.pop(), b''.join(self.__records)
+        return None, self.__records
+
+    def __setstate__(self, state):
+        width, records = state
+        if width is not None:
+            records = {records[i:i + width] for i in range(0, len(records), width)}
+        self.__records = records
+
+
+class BloomMemory:
+    """
+    Fixed size Bloom filter. Lookups may return false positives at about the configured rate
+    while the number of records stays under the capacity, and never return false negatives.
+    """
+    def __init__(self, capacity: int, false_positive_rate: float) -> None:
+        self.__n_bits = max(8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.__n_hashes = max(1, round(self.__n_bits / capacity * math.log(2)))
+        self.__bits = np.zeros((self.__n_bits + 7) // 8, dtype=np.uint8)
+        self.__count = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self.__bits.nbytes
+
+    def __positions(self, rows: np.ndarray) -> np.ndarray:
+        # Double hashing: the k positions of every row are h1 + i * h2
+        h1 = hash_rows(rows, seed=1)
+        h2 = hash_rows(rows, seed=2) | np.uint64(1)
+        positions = h1[:, None] + np.arange(self.__n_hashes, dtype=np.uint64) * h2[:, None]
+        return (positions % np.uint64(self.__n_bits)).astype(np.int64)
+
+    def add_rows(self, rows: np.ndarray):
+        positions = self.__positions(rows)
+        np.bitwise_or.at(self.__bits, positions >> 3, (1 << (positions & 7)).astype(np.uint8))
+        self.__count += len(rows)
+
+    def contains_rows(self, rows: np.ndarray) -> np.ndarray:
+        positions = self.__positions(rows)
+        return ((self.__bits[positions >> 3] >> (positions & 7)) & 1).all(axis=1)
+
+    def __len__(self):
+        return self.__count
+
+
+class Memory:
+    def __init__(self, backend: str = MemoryBackend.EXACT, capacity: int = 1000000, false_positive_rate: float = 0.001,
+                 letters: List[str] = None) -> None:
+        # Index of every letter in the permutation rows, for records given as strings
+        self.__index: Dict[str, int] = None if letters is None else {c: i for i, c in enumerate(letters)}
+        if backend == MemoryBackend.EXACT:
+            self.__records = ExactMemory()
+        elif backend == MemoryBackend.BLOOM:
+            self.__records = BloomMemory(capacity, false_positive_rate)
+        else:
+            raise ValueError(f'Unknown memory backend: {backend}')
+
+    def __row(self, record: Record) -> np.ndarray:
+        if isinstance(record, str):
+            if self.__index is None:
+                raise ValueError('String records need the letters of the permutations')
+            record = bytes(self.__index[c] for c in record)
+        return np.frombuffer(bytes(record), dtype=np.uint8)[None]
+
+    def add(self, record: Record):
+        self.__records.add_rows(self.__row(record))
+
+    def add_new(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Add the rows of a permutation matrix that are not in the memory yet.
+        Rows repeating an earlier row of the batch are not new either.
+
+        :param rows: (n, n_letters) uint8 permutation matrix
+        :return: np.ndarray: (n,) mask of the new rows
+        """
+        rows = np.ascontiguousarray(rows, dtype=np.uint8)
+        _, first = np.unique(rows, axis=0, return_index=True)
+        new = np.zeros(len(rows), dtype=bool)
+        new[first] = True
+
+        candidates = np.nonzero(new)[0]
+        new[candidates] = ~self.__records.contains_rows(rows[candidates])
+        self.__records.add_rows(rows[new])
+        return new
+
+    def __contains__(self, item: Record):
+        return bool(self.__records.contains_rows(self.__row(item))[0])
+
+    def __len__(self):
+        return len(self.__records)
@@ -0,0 +1,236 @@
+import os
+import json
+import time
+import contextlib
+import statistics
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Dict, List
+
+
+class MetricsType:
+    NONE = 'none'
+    JSONL = 'jsonl'
+    PROMETHEUS = 'prometheus'
+
+
+class Phase:
+    SELECTION = 'selection'
+    CROSSOVER = 'crossover'
+    MUTATION = 'mutation'
+    LOCAL_SEARCH = 'local_search'
+    FITNESS = 'fitness'
+
+
+class Count:
+    DEDUP_REJECTIONS = 'dedup_rejections'
+    RANDOM_FILLS = 'random_fills'
+    PARTIAL_RESTARTS = 'partial_restarts'
+
+
+# Shared by every disabled phase, entering it does nothing
+_NULL_PHASE = contextlib.nullcontext()
+
+
+class Metrics:
+    """
+    Receives the phases and counters of every generation. The base metrics ignore them, so a disabled
+    instrumentation only costs a method call per phase.
+    """
+    def phase(self, name: str):
+        """
+        Context manager that times one call of a phase of the generation.
+        """
+        return _NULL_PHASE
+
+    def count(self, name: str, n: int) -> None:
+        pass
+
+    def start_run(self, run: int, counters: Dict[str, int]) -> None:
+        """
+        Called before a run scores its initial population, with the strategy's cumulative counters.
+        """
+
+    def end_generation(self, generation: int, fitness_scores: List[float], counters: Dict[str, int]) -> None:
+        """
+        Called after every generation with its fitness scores and the strategy's cumulative counters.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class _PhaseTimer:
+    __slots__ = ('__metrics', '__name', '__start')
+
+    def __init__(self, metrics: 'GenerationMetrics', name: str) -> None:
+        self.__metrics = metrics
+        self.__name = name
+        self.__start = 0.0
+
+    def __enter__(self):
+        self.__start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.__metrics.add_phase(self.__name, time.perf_counter() - self.__start)
+
+
+class GenerationMetrics(Metrics, ABC):
+    """
+    Collects the wall time and calls of every phase, the counters and the rate of every generation into a record,
+    and hands it to write.
+    """
+    def __init__(self) -> None:
+        self.__seconds: Dict[str, float] = defaultdict(float)
+        self.__calls: Dict[str, int] = defaultdict(int)
+        self.__counts: Dict[str, int] = defaultdict(int)
+        self.__counters: Dict[str, int] = {}
+        self.__run = 0
+        self.__run_start = 0.0
+        self.__generation_start = 0.0
+        self.__generations = 0
+
+    def phase(self, name: str):
+        return _PhaseTimer(self, name)
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        self.__seconds[name] += seconds
+        self.__calls[name] += 1
+
+    def count(self, name: str, n: int) -> None:
+        self.__counts[name] += n
+
+    def start_run(self, run: int, counters: Dict[str, int]) -> None:
+        self.__run = run
+        self.__run_start = self.__generation_start = time.perf_counter()
+        self.__generations = 0
+        self.__counters = dict(counters)
+
+    def end_generation(self, generation: int, fitness_scores: List[float], counters: Dict[str, int]) -> None:
+        now = time.perf_counter()
+        elapsed = now - self.__generation_start
+        self.__generation_start = now
+        previous = self.__counters
+        self.__counters = dict(counters)
+        self.__generations += 1
+
+        record = {
+            'time': time.time(),
+            'pid': os.getpid(),
+            'run': self.__run,
+            'generation': generation,
+            'seconds': elapsed,
+            'generations_per_second': self.__generations / (now - self.__run_start),
+            'best': max(fitness_scores),
+            'mean': statistics.mean(fitness_scores),
+            'worst': min(fitness_scores),
+            'phases': {name: {'seconds': s, 'calls': self.__calls[name]} for name, s in self.__seconds.items()},
+            'counts': {**{k: v - previous.get(k, 0) for k, v in counters.items()}, **self.__counts},
+        }
+        self.__seconds.clear()
+        self.__calls.clear()
+        self.__counts.clear()
+        self.write(record)
+
+    @abstractmethod
+    def write(self, record: Dict) -> None:
+        pass
+
+
+class JsonlMetrics(GenerationMetrics):
+    """
+    Appends every generation's record as a JSON line. Processes that run simulations concurrently append to the
+    same file, their records are told apart by pid and run.
+    """
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+        self.__file = None
+
+    def __getstate__(self):
+        # Copies in worker processes open their own file handle
+        state = self.__dict__.copy()
+        state['_JsonlMetrics__file'] = None
+        return state
+
+    def write(self, record: Dict) -> None:
+        if self.__file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self.__file = open(self.path, 'a', buffering=1)
+        self.__file.write(json.dumps(record) + '\n')
+
+    def close(self) -> None:
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+class PrometheusMetrics(GenerationMetrics):
+    """
+    Keeps running totals and the last generation's gauges in a Prometheus textfile, rewritten after every generation.
+    Worker processes write to their own file next to it, named by their pid.
+    """
+    PREFIX = 'genetic'
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+        self.__pid = os.getpid()
+        self.__totals: Dict[str, float] = {'generations': 0}
+        # Phase name: [seconds, calls]
+        self.__phase_totals: Dict[str, List[float]] = {}
+
+    @property
+    def file_path(self) -> str:
+        if os.getpid() == self.__pid:
+            return self.path
+        root, ext = os.path.splitext(self.path)
+        return f'{root}.{os.getpid()}{ext}'
+
+    def __lines(self, record: Dict) -> List[str]:
+        p = self.PREFIX
+        lines = [f'# TYPE {p}_generations_total counter', f'{p}_generations_total {self.__totals["generations"]:g}']
+
+        lines.append(f'# TYPE {p}_phase_seconds_total counter')
+        lines.extend(f'{p}_phase_seconds_total{{phase="{name}"}} {seconds!r}'
+                     for name, (seconds, _) in sorted(self.__phase_totals.items()))
+        lines.append(f'# TYPE {p}_phase_calls_total counter')
+        lines.extend(f'{p}_phase_calls_total{{phase="{name}"}} {calls:g}'
+                     for name, (_, calls) in sorted(self.__phase_totals.items()))
+
+        for name in sorted(k for k in self.__totals if k != 'generations'):
+            lines.append(f'# TYPE {p}_{name}_total counter')
+            lines.append(f'{p}_{name}_total {self.__totals[name]:g}')
+
+        for name in ('run', 'generation', 'generations_per_second', 'best', 'mean', 'worst'):
+            lines.append(f'# TYPE {p}_{name} gauge')
+            lines.append(f'{p}_{name} {record[name]!r}')
+        return lines
+
+    def write(self, record: Dict) -> None:
+        self.__totals['generations'] += 1
+        for name, n in record['counts'].items():
+            self.__totals[name] = self.__totals.get(name, 0) + n
+        for name, v in record['phases'].items():
+            totals = self.__phase_totals.setdefault(name, [0.0, 0])
+            totals[0] += v['seconds']
+            totals[1] += v['calls']
+
+        path = self.file_path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # The collector may read at any time, so the file is replaced and never partially written
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write('\n'.join(self.__lines(record)) + '\n')
+        os.replace(tmp_path, path)
+
+
+def get_metrics(metrics_type: str, path: str = None, output_dir: str = 'output') -> Metrics:
+    if metrics_type == MetricsType.NONE:
+        return Metrics()
+    if metrics_type == MetricsType.JSONL:
+        return JsonlMetrics(path or os.path.join(output_dir, 'metrics.jsonl'))
+    if metrics_type == MetricsType.PROMETHEUS:
+        return PrometheusMetrics(path or os.path.join(output_dir, 'metrics.prom'))
+    raise ValueError(f'Unknown metrics type: {metrics_type}')
@@ -0,0 +1,110 @@
+import random
+import numpy as np
+from queue import Empty
+from typing import Dict, List, Set, Tuple
+
+from src.population import Population
+
+
+class MigrationTopology:
+    RING = 'ring'
+    RANDOM = 'random'
+
+
+def migration_targets(n_islands: int, topology: str, epoch: int, seed: int) -> List[int]:
+    """
+    Map each island to the island it sends its migrants to.
+    Every island receives from exactly one other island, so the random topology is a random cycle over the islands,
+    drawn from a seed that all the islands share.
+
+    :param n_islands: Number of islands
+    :param topology: MigrationTopology value
+    :param epoch: Migration number, the random topology changes on each one
+    :param seed: Seed shared by all the islands
+    :return: List[int]: target island of every island
+    """
+    order = list(range(n_islands))
+    if topology == MigrationTopology.RANDOM:
+        random.Random(seed + epoch).shuffle(order)
+    elif topology != MigrationTopology.RING:
+        raise ValueError(f'Unknown migration topology: {topology}')
+
+    targets = [0] * n_islands
+    for k, i in enumerate(order):
+        targets[i] = order[(k + 1) % n_islands]
+    return targets
+
+
+class Migration:
+    """
+    Exchanges the best individuals of one island with its neighbour every `interval` generations.
+    Received migrants replace the worst individuals of the island. Migrants are sent with their epoch, since
+    with the random topology an island may receive the next epoch's migrants before the current epoch's.
+    An island that finished tells the others, so they stop waiting for its migrants and run to their own limits.
+    """
+    def __init__(self, island: int, inboxes: list, letters: List[str], interval: int, size: int,
+                 topology: str, seed: int, stop_event) -> None:
+        self.__island = island
+        self.__inboxes = inboxes
+        self.__letters = letters
+        self.__interval = interval
+        self.__size = size
+        self.__topology = topology
+        self.__seed = seed
+        self.__stop_event = stop_event
+        # Migrants of later epochs that arrived early
+        self.__pending: Dict[int, List[Tuple[bytes, float]]] = {}
+        # Islands that finished and send no more migrants
+        self.__finished: Set[int] = set()
+
+    def __receive(self, epoch: int, source: int) -> List[Tuple[bytes, float]]:
+        if epoch in self.__pending:
+            return self.__pending.pop(epoch)
+
+        # Messages of one island arrive in order, so a finished island sent all its migrants before
+        while source not in self.__finished and not self.__stop_event.is_set():
+            try:
+                message_epoch, sender, migrants = self.__inboxes[self.__island].get(timeout=0.1)
+            except Empty:
+                continue
+            if message_epoch is None:
+                self.__finished.add(sender)
+            elif message_epoch == epoch:
+                return migrants
+            elif message_epoch > epoch:
+                self.__pending[message_epoch] = migrants
+        return []
+
+    def finish(self) -> None:
+        """
+        Tell the other islands that this one sends no more migrants.
+        """
+        for i, inbox in enumerate(self.__inboxes):
+            if i != self.__island:
+                inbox.put((None, self.__island, None))
+
+    def __call__(self, step: int, population: Population) -> Population:
+        generation = step + 1
+        if len(self.__inboxes) < 2 or generation % self.__interval:
+            return population
+
+        epoch = generation // self.__interval
+        targets = migration_targets(len(self.__inboxes), self.__topology, epoch, self.__seed)
+        target, source = targets[self.__island], targets.index(self.__island)
+
+        size = min(self.__size, len(population))
+        order = np.argsort(population.scores)
+        migrants = [(population.perms[i].tobytes(), float(population.scores[i])) for i in order[len(order) - size:]]
+        self.__inboxes[target].put((epoch, self.__island, migrants))
+
+        received = self.__receive(epoch, source)
+        if not received:
+            return population
+
+        perms, scores, dirty = population.perms.copy(), population.scores.copy(), population.dirty.copy()
+        for i, (perm, f) in zip(order, received):
+            perms[i] = np.frombuffer(perm, dtype=np.uint8)
+            scores[i] = f
+            dirty[i] = False
+
+        return Population(self.__letters, perms, scores, dirty)
@@ -0,0 +1,36 @@
+import math
+import numpy as np
+
+
+class MultiFidelity:
+    """
+    Two level fitness: offspring are first scored on a stratified sample of the cipher words,
+    and only the ones that could enter the elite set are scored again on the full text.
+    The sample grows with the best fitness, so a converging run scores more of the text.
+    """
+    def __init__(self, elite_percentile: float, min_fraction: float = 0.2, margin: float = 0.02, steps: int = 10) -> None:
+        """
+        :param elite_percentile: Percentile of the population the elite set starts from
+        :param min_fraction: Fraction of the unique words sampled at the start of a run
+        :param margin: How far under the elite threshold a cheap score may be and still be scored in full
+        :param steps: Number of sample sizes, so the sample changes a few times a run
+        """
+        self.__elite_percentile = elite_percentile
+        self.__min_fraction = min_fraction
+        self.__margin = margin
+        self.__steps = steps
+
+    def fraction(self, best_fitness: float) -> float:
+        fraction = self.__min_fraction + (1 - self.__min_fraction) * min(1.0, max(0.0, best_fitness))
+        return min(1.0, math.ceil(fraction * self.__steps) / self.__steps)
+
+    def candidates(self, cheap_scores: np.ndarray, known_scores: np.ndarray) -> np.ndarray:
+        """
+        :param cheap_scores: Sample scores of the individuals that were not scored in full
+        :param known_scores: Full scores of the rest of the population
+        :return: np.ndarray: mask of the cheap scores that could enter the elite set
+        """
+        scores = np.concatenate([cheap_scores, known_scores])
+        start_index = min(math.floor(self.__elite_percentile * len(scores)), len(scores) - 1)
+        threshold = np.partition(scores, start_index)[start_index]
+        return cheap_scores >= threshold - self.__margin
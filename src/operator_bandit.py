@@ -0,0 +1,67 @@
+import numpy as np
+from typing import Dict, List
+
+
+class OperatorSelection:
+    FIXED = 'fixed'
+    ADAPTIVE = 'adaptive'
+
+
+class OperatorBandit:
+    """
+    Shares the offspring of a generation between operators, the arms, by adaptive pursuit: every generation the
+    shares move toward the arm with the best recent fitness improvement per CPU second, while every arm keeps a
+    minimal share so its estimate stays current.
+    """
+    def __init__(self, arms: List[str], min_share: float = 0.1, learning_rate: float = 0.3, decay: float = 0.7) -> None:
+        if (len(arms) - 1) * min_share >= 1:
+            raise ValueError(f'A minimal share of {min_share} is too large for {len(arms)} arms')
+        self.arms = list(arms)
+        self.__min_share = min_share
+        self.__learning_rate = learning_rate
+        self.__decay = decay
+        self.__shares = np.full(len(arms), 1 / len(arms))
+        # Decayed average of the improvement per CPU second of every arm
+        self.__rewards = np.zeros(len(arms))
+        # CPU seconds every arm spent producing offspring since the last update
+        self.__spent = np.zeros(len(arms))
+
+    @property
+    def shares(self) -> Dict[str, float]:
+        return dict(zip(self.arms, self.__shares.tolist()))
+
+    def allocate(self, n: int) -> np.ndarray:
+        """
+        :return: np.ndarray: the number of offspring of every arm, n in total
+        """
+        expected = self.__shares * n
+        counts = np.floor(expected).astype(np.int64)
+        # The remainder goes to the largest fractions
+        remainder = np.argsort(counts - expected, kind='stable')[:n - counts.sum()]
+        counts[remainder] += 1
+        return counts
+
+    def spend(self, arm: int, seconds: float) -> None:
+        self.__spent[arm] += seconds
+
+    def update(self, arms: np.ndarray, gains: np.ndarray, seconds_per_child: float = 0.0) -> None:
+        """
+        Credit the arms with the offspring they produced and move the shares toward the best one.
+
+        :param arms: Arm of every scored offspring, -1 for offspring no arm is credited with
+        :param gains: Fitness improvement of every scored offspring over its best parent, 0 when it is worse
+        :param seconds_per_child: CPU seconds of scoring an offspring, charged to its arm
+        """
+        for arm in range(len(self.arms)):
+            produced = arms == arm
+            n = int(produced.sum())
+            if not n:
+                continue
+            seconds = self.__spent[arm] + n * seconds_per_child
+            rate = gains[produced].sum() / seconds if seconds > 0 else 0.0
+            self.__rewards[arm] = self.__decay * self.__rewards[arm] + (1 - self.__decay) * rate
+        self.__spent[:] = 0
+
+        target = np.full(len(self.arms), self.__min_share)
+        target[np.argmax(self.__rewards)] = 1 - (len(self.arms) - 1) * self.__min_share
+        self.__shares += self.__learning_rate * (target - self.__shares)
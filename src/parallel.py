@@ -0,0 +1,163 @@
+import os
+import atexit
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+from src.fitness_engine import FitnessEngine
+
+
+# Per worker process state, set once by the pool initializer
+_engine: FitnessEngine = None
+_buffers: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _init_worker(engine: FitnessEngine) -> None:
+    global _engine
+    _engine = engine
+
+
+def _attach(perms_name: str, scores_name: str, n: int, n_letters: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Buffers that were replaced by bigger ones are no longer used
+    for name in set(_buffers) - {perms_name, scores_name}:
+        _buffers.pop(name).close()
+
+    for name in (perms_name, scores_name):
+        if name not in _buffers:
+            _buffers[name] = shared_memory.SharedMemory(name=name)
+
+    perms = np.ndarray((n, n_letters), dtype=np.uint8, buffer=_buffers[perms_name].buf)
+    scores = np.ndarray((n,), dtype=np.float64, buffer=_buffers[scores_name].buf)
+    return perms, scores
+
+
+def _fitness_chunk(perms_name: str, scores_name: str, n: int, n_letters: int, start: int, end: int,
+                   words: np.ndarray) -> None:
+    perms, scores = _attach(perms_name, scores_name, n, n_letters)
+    scores[start:end] = _engine.fitness(perms[start:end], words)
+
+
+def _optimize_chunk(perms_name: str, scores_name: str, n: int, n_letters: int, start: int, end: int,
+                    n_swaps: int, seed: int) -> None:
+    perms, scores = _attach(perms_name, scores_name, n, n_letters)
+    rng = np.random.default_rng(seed)
+
+    for k, state in enumerate(_engine.states(perms[start:end]), start):
+        for _ in range(n_swaps):
+            i, j = rng.choice(n_letters, 2, replace=False)
+            _engine.swap(state, [(i, j)])
+
+        perms[k] = state.perm
+        scores[k] = state.fitness
+
+
+class ParallelEvaluator:
+    """
+    Splits population scoring across a process pool.
+
+    Every worker receives the fitness engine once, when the pool starts. Populations are passed through
+    shared memory permutation and score buffers, which are reused between calls and grown when needed.
+    The pool is started on first use and owned by the process that started it, so an evaluator copied into
+    another process (e.g. a concurrent run) starts its own pool.
+    """
+    def __init__(self, engine: FitnessEngine, workers: int) -> None:
+        self.__engine = engine
+        self.__workers = workers
+        self.__reset()
+        atexit.register(self.close)
+
+    def __reset(self) -> None:
+        self.__owner = os.getpid()
+        self.__executor: ProcessPoolExecutor = None
+        self.__perms: shared_memory.SharedMemory = None
+        self.__scores: shared_memory.SharedMemory = None
+        self.__capacity = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for k in ('executor', 'perms', 'scores'):
+            state[f'_ParallelEvaluator__{k}'] = None
+        state['_ParallelEvaluator__capacity'] = 0
+        return state
+
+    def __pool(self) -> ProcessPoolExecutor:
+        if self.__owner != os.getpid():
+            # Copied into a forked process, the pool and buffers belong to the parent
+            self.__reset()
+
+        if self.__executor is None:
+            # Forking a process that may already run pool threads (e.g. a concurrent run) can deadlock
+            context = multiprocessing.get_context('forkserver' if os.name == 'posix' else 'spawn')
+            self.__executor = ProcessPoolExecutor(max_workers=self.__workers, mp_context=context,
+                                                  initializer=_init_worker, initargs=(self.__engine,))
+        return self.__executor
+
+    def __reserve(self, n: int, n_letters: int) -> None:
+        if n * n_letters <= self.__capacity:
+            return
+
+        # Leave room for the population to grow so the workers rarely need to attach new buffers
+        self.__release()
+        self.__capacity = 2 * n * n_letters
+        self.__perms = shared_memory.SharedMemory(create=True, size=self.__capacity)
+        self.__scores = shared_memory.SharedMemory(create=True, size=2 * n * np.dtype(np.float64).itemsize)
+
+    def __release(self) -> None:
+        for shm in (self.__perms, self.__scores):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self.__perms = self.__scores = None
+        self.__capacity = 0
+
+    def __chunks(self, n: int) -> List[Tuple[int, int]]:
+        bounds = np.linspace(0, n, min(self.__workers, n) + 1).astype(int)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def __run(self, func, perms: np.ndarray, *args, seed: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        n, n_letters = perms.shape
+        executor = self.__pool()
+        self.__reserve(n, n_letters)
+
+        shared_perms = np.ndarray((n, n_letters), dtype=np.uint8, buffer=self.__perms.buf)
+        shared_perms[:] = perms
+        names = (self.__perms.name, self.__scores.name, n, n_letters)
+
+        futures = []
+        for k, (start, end) in enumerate(self.__chunks(n)):
+            chunk_args = args if seed is None else (*args, seed + k)
+            futures.append(executor.submit(func, *names, start, end, *chunk_args))
+        for f in futures:
+            f.result()
+
+        scores = np.ndarray((n,), dtype=np.float64, buffer=self.__scores.buf)
+        return shared_perms.copy(), scores.copy()
+
+    def fitness(self, perms: np.ndarray, words: np.ndarray = None) -> np.ndarray:
+        """
+        :param words: Indices of the unique words the dictionary ratio is estimated on, all of them by default
+        """
+        if len(perms) == 0:
+            return np.empty(0, dtype=np.float64)
+        return self.__run(_fitness_chunk, perms, words)[1]
+
+    def optimize(self, perms: np.ndarray, n_swaps: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Apply n_swaps random swaps to every permutation, scoring them incrementally in the workers.
+
+        :return: the swapped permutations and their fitness scores
+        """
+        if len(perms) == 0:
+            return perms.copy(), np.empty(0, dtype=np.float64)
+        return self.__run(_optimize_chunk, perms, n_swaps, seed=seed)
+
+    def close(self) -> None:
+        if self.__owner != os.getpid():
+            return
+
+        if self.__executor is not None:
+            self.__executor.shutdown(cancel_futures=True)
+            self.__executor = None
+        self.__release()
@@ -0,0 +1,60 @@
+import numpy as np
+from typing import List
+
+from src.sample import Sample
+
+
+class Population:
+    """
+    Struct-of-arrays population: the permutations of all individuals are rows of one contiguous
+    (pop_size, n_letters) uint8 array, next to their scores and dirty flags.
+    """
+    __slots__ = ('letters', 'perms', 'scores', 'dirty')
+
+    def __init__(self, letters: List[str], perms: np.ndarray, scores: np.ndarray = None, dirty: np.ndarray = None) -> None:
+        self.letters = letters
+        self.perms = perms
+        self.scores = np.full(len(perms), np.nan) if scores is None else np.asarray(scores, dtype=np.float64)
+        # Unscored individuals, and the ones that only have a screening score
+        self.dirty = np.isnan(self.scores) if dirty is None else np.array(dirty, dtype=bool)
+
+    @staticmethod
+    def from_samples(letters: List[str], samples: List[Sample]) -> 'Population':
+        if all(s.letters is letters or s.letters == letters for s in samples):
+            buffer = b''.join(s.perm for s in samples)
+            perms = np.frombuffer(buffer, dtype=np.uint8).reshape(len(samples), len(letters)).copy()
+        else:
+            # Samples built over another letters order are mapped onto this one
+            index = {c: i for i, c in enumerate(letters)}
+            perms = np.empty((len(samples), len(letters)), dtype=np.uint8)
+            for k, s in enumerate(samples):
+                for c, d in s.dec_map.items():
+                    perms[k, index[c]] = index[d]
+
+        scores = [np.nan if s.dirty else s.score for s in samples]
+        return Population(letters, perms, scores)
+
+    def sample(self, i: int) -> Sample:
+        s = Sample(self.letters, perm=self.perms[i].tobytes())
+        if not self.dirty[i]:
+            s.set_score(float(self.scores[i]))
+        return s
+
+    def to_samples(self) -> List[Sample]:
+        return [self.sample(i) for i in range(len(self))]
+
+    def diversity(self) -> float:
+        """
+        Mean Hamming distance of all pairs of individuals, as a fraction of the letters. Counted exactly from how many
+        individuals decode every encoded letter to every letter, in O(pop_size * n_letters).
+        """
+        n, n_letters = self.perms.shape
+        if n < 2:
+            return 0.0
+        cells = (np.arange(n_letters) * n_letters + self.perms).ravel()
+        counts = np.bincount(cells, minlength=n_letters * n_letters)
+        agreeing_pairs = float((counts * (counts - 1)).sum()) / 2
+        return 1 - agreeing_pairs / (n * (n - 1) / 2 * n_letters)
+
+    def __len__(self):
+        return len(self.perms)
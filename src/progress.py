@@ -0,0 +1,155 @@
+import os
+import time
+from datetime import datetime
+from queue import Empty
+from typing import List, Tuple
+
+# (title, worst, average, best, diversity) of the history to draw
+Snapshot = Tuple[str, List[float], List[float], List[float], List[float]]
+
+
+class ProgressType:
+    HEADLESS = 'headless'
+    LIVE = 'live'
+    PNG = 'png'
+
+
+def _draw(ax, snapshot: Snapshot) -> None:
+    title, worst, average, best, diversity = snapshot
+    ax.set_title(title)
+    ax.plot(worst, label='Worst Fitness')
+    ax.plot(average, label='Avg Fitness')
+    ax.plot(best, label='Best Fitness')
+    ax.plot(diversity, label='Diversity', linestyle='--')
+    ax.set_xlabel('Generation number')
+    ax.set_ylabel('Fitness Score / Diversity %')
+    ax.legend(loc='upper right', bbox_to_anchor=(1, 1))
+
+
+def _snapshot(title: str, history) -> Snapshot:
+    return title, list(history.worst), list(history.average), list(history.best), list(history.diversity)
+
+
+class ProgressObserver:
+    """
+    Receives the fitness history of a simulation while it runs. The base observer ignores it, for headless runs.
+    """
+    def update(self, title: str, history) -> None:
+        """
+        Called after every generation with the history so far.
+        """
+
+    def finish(self, title: str, history) -> None:
+        """
+        Called once with the history of the best run.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class HeadlessObserver(ProgressObserver):
+    pass
+
+
+def _plot_loop(queue, interval: float) -> None:
+    # Runs in the plotter process, so the simulation never waits on a redraw
+    import matplotlib.pyplot as plt
+    fig = plt.figure(figsize=(8, 6), dpi=70)
+    ax = fig.gca()
+
+    while True:
+        try:
+            snapshots = [queue.get(timeout=interval)]
+        except Empty:
+            plt.pause(0.001)
+            continue
+
+        # Only the latest history is drawn
+        while True:
+            try:
+                snapshots.append(queue.get_nowait())
+            except Empty:
+                break
+
+        if None in snapshots:
+            break
+
+        ax.cla()
+        _draw(ax, snapshots[-1])
+        plt.pause(interval)
+
+    plt.close(fig)
+
+
+class LivePlotObserver(ProgressObserver):
+    """
+    Plots the history in a separate process, redrawing at most max_fps times per second.
+    Updates that arrive faster are dropped, the final history is always drawn.
+    """
+    def __init__(self, max_fps: float = 2.0) -> None:
+        self.__interval = 1 / max_fps
+        self.__last_update = 0.0
+        self.__queue = None
+        self.__process = None
+
+    def __getstate__(self):
+        # Copies in worker processes do not own the plotter
+        state = self.__dict__.copy()
+        state['_LivePlotObserver__queue'] = None
+        state['_LivePlotObserver__process'] = None
+        return state
+
+    def __send(self, snapshot: Snapshot) -> None:
+        if self.__process is None:
+            import multiprocessing
+            context = multiprocessing.get_context('spawn')
+            self.__queue = context.Queue()
+            self.__process = context.Process(target=_plot_loop, args=(self.__queue, self.__interval), daemon=True)
+            self.__process.start()
+        self.__queue.put(snapshot)
+
+    def update(self, title: str, history) -> None:
+        now = time.monotonic()
+        if now - self.__last_update < self.__interval:
+            return
+        self.__last_update = now
+        self.__send(_snapshot(title, history))
+
+    def finish(self, title: str, history) -> None:
+        self.__send(_snapshot(title, history))
+
+    def close(self) -> None:
+        if self.__process is not None:
+            self.__queue.put(None)
+            self.__process.join()
+            self.__process = None
+
+
+class PngObserver(ProgressObserver):
+    """
+    Writes only the history of the best run, to a PNG file in the output directory.
+    """
+    def __init__(self, output_dir: str = 'output') -> None:
+        self.__output_dir = output_dir
+        self.path: str = None
+
+    def finish(self, title: str, history) -> None:
+        # The figure is drawn without pyplot, so no GUI backend is loaded
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(8, 6), dpi=70)
+        _draw(fig.gca(), _snapshot(title, history))
+
+        os.makedirs(self.__output_dir, exist_ok=True)
+        self.path = os.path.join(self.__output_dir, f'plot_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.png')
+        fig.savefig(self.path, format='png')
+
+
+def get_observer(progress_type: str, max_fps: float = 2.0) -> ProgressObserver:
+    if progress_type == ProgressType.HEADLESS:
+        return HeadlessObserver()
+    if progress_type == ProgressType.LIVE:
+        return LivePlotObserver(max_fps)
+    if progress_type == ProgressType.PNG:
+        return PngObserver()
+    raise ValueError(f'Unknown progress type: {progress_type}')
@@ -3,38 +3,74 @@ from random import shuffle
 
 
 class Sample:
-    def __init__(self, letters: List[str], decode_letters: str = None):
-        if not decode_letters:
-            decode_letters = list(letters[:])
-            shuffle(decode_letters)
-        self.__dec_map: Dict[str, str] = {letters[i]: decode_letters[i] for i in range(len(letters))}
-        self.__dec_map_int: Dict[int, int] = {ord(letters[i]): ord(decode_letters[i]) for i in range(len(letters))}
+    """
+    A decoding key stored as a single permutation: byte i is the index in `letters` of the letter that
+    the i-th letter decodes to. The letters list is shared between samples, and the maps are derived on demand.
+    """
+    __slots__ = ('__letters', '__perm', '__table', 'fitness_state', 'score', 'dirty')
+
+    def __init__(self, letters: List[str], decode_letters: str = None, perm: bytes = None):
+        self.__letters = letters
+        if perm is None:
+            if not decode_letters:
+                decode_letters = list(letters[:])
+                shuffle(decode_letters)
+            index = {c: i for i, c in enumerate(letters)}
+            perm = bytes(index[c] for c in decode_letters)
+        self.__perm = bytearray(perm)
+        self.__table: Dict[int, int] = None
+        # Incremental fitness state, kept only while it matches the decoding map
+        self.fitness_state = None
+        # Last fitness score, valid while the sample is not dirty
+        self.score: float = None
+        self.dirty = True
 
     def __repr__(self):
-        return ''.join(self.decode_letters)
-    
+        return self.decode_string
+
     @property
-    def dec_map(self):
-        return self.__dec_map
-    
+    def letters(self) -> List[str]:
+        return self.__letters
+
     @property
-    def dec_map_int(self):
-        return self.__dec_map_int
+    def perm(self) -> bytearray:
+        return self.__perm
+
+    @property
+    def dec_map(self) -> Dict[str, str]:
+        return {c: self.__letters[i] for c, i in zip(self.__letters, self.__perm)}
+
+    @property
+    def dec_map_int(self) -> Dict[int, int]:
+        # str.translate table, cached until the next swap
+        if self.__table is None:
+            self.__table = {ord(c): ord(self.__letters[i]) for c, i in zip(self.__letters, self.__perm)}
+        return self.__table
 
     def get_dec_map_as_table(self, letters):
+        dec_map = self.dec_map
         s = ''
         for c in letters:
-            s += f'{c} {self.__dec_map.get(c)}\n'
+            s += f'{c} {dec_map.get(c)}\n'
 
         return s
 
     @property
     def decode_letters(self) -> List[str]:
-        return list(self.__dec_map.values())
+        return [self.__letters[i] for i in self.__perm]
+
+    @property
+    def decode_string(self) -> str:
+        return ''.join(self.decode_letters)
+
+    def set_score(self, score: float):
+        self.score = score
+        self.dirty = False
 
     def swap(self, swaps: List[Tuple[str, str]]):
+        self.fitness_state = None
+        self.__table = None
+        self.dirty = True
         for c1, c2 in swaps:
-            self.__dec_map[c1], self.__dec_map[c2] = self.__dec_map[c2], self.__dec_map[c1]
-
-            i, j = ord(c1), ord(c2)
-            self.__dec_map_int[i], self.__dec_map_int[j] = self.__dec_map_int[j], self.__dec_map_int[i]
\ No newline at end of file
+            i, j = self.__letters.index(c1), self.__letters.index(c2)
+            self.__perm[i], self.__perm[j] = self.__perm[j], self.__perm[i]
@@ -14,3 +14,41 @@ class Scheduler:
 
     def calculate(self, step: int) -> float:
         return max(self.__init_val / (1 + self.__decay * step), self.__min_val)
+
+    def observe(self, best_change: float) -> None:
+        """
+        Called after every generation with the change of the best fitness over the last generations.
+        """
+
+    def reset(self) -> None:
+        pass
+
+
+class StagnationScheduler(Scheduler):
+    """
+    The decaying rate, raised by a boost factor for every generation the best fitness changed less than the
+    threshold, up to max_val, and back to the decaying rate once the best fitness moves again.
+    """
+    def __init__(self, init_val: float, decay: float, min_val: float = 0.1, threshold: float = 0.1,
+                 boost: float = 1.5, max_val: float = 1.0):
+        super().__init__(init_val, decay, min_val=min_val)
+        self.__threshold = threshold
+        self.__boost = boost
+        self.__max_val = max_val
+        self.__factor = 1.0
+
+    @property
+    def factor(self) -> float:
+        return self.__factor
+
+    def observe(self, best_change: float) -> None:
+        if best_change < self.__threshold:
+            self.__factor = min(self.__factor * self.__boost, self.__max_val / self.min_val)
+        else:
+            self.__factor = 1.0
+
+    def reset(self) -> None:
+        self.__factor = 1.0
+
+    def calculate(self, step: int) -> float:
+        return min(super().calculate(step) * self.__factor, self.__max_val)
@@ -0,0 +1,148 @@
+import numpy as np
+from random import randint
+from typing import Dict, Iterable, List, Set, Tuple
+
+from src.cipher_text import CipherStats
+from src.generator import generate_random
+from src.sample import Sample
+
+
+def word_pattern(word: str) -> Tuple[int, ...]:
+    """
+    The letters of a word numbered by their first appearance, 'that' -> (0, 1, 2, 0).
+    """
+    index: Dict[str, int] = {}
+    return tuple(index.setdefault(c, len(index)) for c in word)
+
+
+class PatternIndex:
+    """
+    The dictionary words grouped by their letter pattern, the words an encoded word can decode to.
+    """
+    def __init__(self, dictionary: Iterable[str], letters: Iterable[str]) -> None:
+        letters = set(letters)
+        self.__words: Dict[Tuple[int, ...], List[str]] = {}
+        for w in sorted(dictionary):
+            if w and set(w) <= letters:
+                self.__words.setdefault(word_pattern(w), []).append(w)
+
+    def candidates(self, word: str) -> List[str]:
+        return self.__words.get(word_pattern(word), [])
+
+
+def letters_count(cipher: CipherStats, letters: List[str]) -> np.ndarray:
+    index = {c: i for i, c in enumerate(letters)}
+    counts = np.zeros(len(letters), dtype=np.int64)
+    for w, n in cipher.words_count.items():
+        for c in w:
+            if c in index:
+                counts[index[c]] += n
+    return counts
+
+
+class KeySeeder:
+    """
+    Builds a starting key from the letters frequencies of the encoded text, then pins the letters of its most
+    repeated words to the dictionary words with the same letter pattern, and seeds populations around that key.
+    """
+    # Candidates of a word that are compared, and the most repeated words they are compared on
+    LOOKAHEAD_CANDIDATES = 10
+    LOOKAHEAD_WORDS = 40
+
+    def __init__(self, dictionary: Set[str], cipher: CipherStats, letters: List[str], unigram_freq: Dict[str, float],
+                 max_words: int = 300) -> None:
+        self.__letters = letters
+        self.__words_count = cipher.words_count
+        index = {c: i for i, c in enumerate(letters)}
+
+        # Rank of every encoded letter by its count, and of every decoded letter by its corpus frequency
+        counts = letters_count(cipher, letters)
+        enc_order = np.argsort(-counts, kind='stable')
+        dec_order = np.array(sorted(range(len(letters)), key=lambda i: -unigram_freq.get(letters[i], 0.0)))
+        self.__enc_rank = np.empty(len(letters), dtype=np.int64)
+        self.__enc_rank[enc_order] = np.arange(len(letters))
+        self.__dec_rank = np.empty(len(letters), dtype=np.int64)
+        self.__dec_rank[dec_order] = np.arange(len(letters))
+
+        frequency_key = np.empty(len(letters), dtype=np.uint8)
+        frequency_key[enc_order] = dec_order
+        self.frequency_key = frequency_key
+
+        words = [w for w in cipher.words_count if w and all(c in index for c in w)]
+        words.sort(key=lambda w: (-cipher.words_count[w], len(w)))
+        self.key = self.__refine(PatternIndex(dictionary, letters), words[:max_words], index)
+
+    def __refine(self, patterns: PatternIndex, words: List[str], index: Dict[str, int]) -> np.ndarray:
+        n_letters = len(self.__letters)
+        # Encoded letters of every word, and the decoded letters of every dictionary word of its pattern
+        encoded = [np.array([index[c] for c in w], dtype=np.intp) for w in words]
+        candidates = [np.array([[index[c] for c in d] for d in patterns.candidates(w)], dtype=np.intp).reshape(-1, len(w))
+                      for w in words]
+        weights = np.array([self.__words_count[w] for w in words[:self.LOOKAHEAD_WORDS]], dtype=np.float64)
+
+        def consistent(k: int, key: np.ndarray, used: np.ndarray) -> np.ndarray:
+            # Pinned letters must match and the other letters must not be taken by another encoded letter
+            mapped = key[encoded[k]]
+            dec = candidates[k]
+            return np.where(mapped >= 0, dec == mapped, ~used[dec]).all(axis=1)
+
+        def support(key: np.ndarray, used: np.ndarray) -> float:
+            # Weight of the most repeated words that can still decode to a dictionary word
+            return sum(w for k, w in enumerate(weights) if consistent(k, key, used).any())
+
+        key = np.full(n_letters, -1, dtype=np.intp)
+        used = np.zeros(n_letters, dtype=bool)
+
+        for k, enc in enumerate(encoded):
+            if (key[enc] >= 0).all():
+                continue
+            options = candidates[k][consistent(k, key, used)]
+            if not len(options):
+                continue
+
+            # Closest to the frequency ranks first, then the one that keeps most other words decodable
+            new = key[enc] < 0
+            cost = np.abs(self.__enc_rank[enc][new] - self.__dec_rank[options[:, new]]).sum(axis=1)
+            options = options[np.argsort(cost, kind='stable')[:self.LOOKAHEAD_CANDIDATES]]
+
+            best, best_support = None, -1.0
+            for dec in options:
+                trial_key, trial_used = key.copy(), used.copy()
+                trial_key[enc] = dec
+                trial_used[dec] = True
+                s = support(trial_key, trial_used) if len(options) > 1 else 0.0
+                if s > best_support:
+                    best, best_support = dec, s
+
+            key[enc] = best
+            used[best] = True
+
+        # The letters no word pinned keep the frequency order
+        free_enc = sorted(np.nonzero(key < 0)[0], key=lambda e: self.__enc_rank[e])
+        free_dec = sorted(np.nonzero(~used)[0], key=lambda d: self.__dec_rank[d])
+        key[free_enc] = free_dec
+        return key.astype(np.uint8)
+
+    def population(self, n_samples: int, random_fraction: float = 0.2, max_swaps: int = 3) -> List[Sample]:
+        """
+        The key and random perturbations of it, of 1 to max_swaps letter swaps, with a fraction of random keys.
+
+        :param n_samples: Population size
+        :param random_fraction: Fraction of uniformly random keys, for diversity
+        :param max_swaps: Most swaps applied to a perturbed key
+        :return: List[Sample]: the initial population
+        """
+        n_random = int(round(n_samples * random_fraction))
+        n_seeded = n_samples - n_random
+        samples = [Sample(self.__letters, perm=self.key.tobytes())] if n_seeded else []
+
+        n_letters = len(self.__letters)
+        for _ in range(n_seeded - len(samples)):
+            perm = self.key.copy()
+            for _ in range(randint(1, max_swaps)):
+                a, b = np.random.choice(n_letters, 2, replace=False)
+                perm[[a, b]] = perm[[b, a]]
+            samples.append(Sample(self.__letters, perm=perm.tobytes()))
+
+        samples.extend(generate_random(self.__letters, n_random))
+        return samples
@@ -1,10 +1,83 @@
-from typing import List
+import numpy as np
+from typing import List, Sequence, Tuple, Union
 from math import floor
 from random import choices, sample
 
 from src.generator import Sample
 
 
+class SelectionType:
+    ROULETTE = 'roulette'
+    RANK = 'rank'
+    TOURNAMENT = 'tournament'
+
+
+def alias_table(weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build Vose's alias table, after which every weighted draw takes one uniform index and one coin flip.
+
+    :param weights: Non negative weights, not all zero
+    :return: Tuple[np.ndarray, np.ndarray]: probability of keeping each index, and the index it is replaced with
+    """
+    n = len(weights)
+    scaled = weights * (n / weights.sum())
+    prob = np.ones(n)
+    alias = np.arange(n)
+
+    small = [i for i in range(n) if scaled[i] < 1]
+    large = [i for i in range(n) if scaled[i] >= 1]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s], alias[s] = scaled[s], l
+        scaled[l] -= 1 - scaled[s]
+        (small if scaled[l] < 1 else large).append(l)
+
+    return prob, alias
+
+
+class SelectionEngine:
+    """
+    Parent selection over one generation's fitness scores. The sampling structure is built once,
+    then any number of parents is drawn in a single vectorized call.
+    """
+    def __init__(self, fitness_scores: Sequence[float], selection_type: str = SelectionType.ROULETTE,
+                 tournament_size: int = 3) -> None:
+        self.__scores = np.asarray(fitness_scores, dtype=np.float64)
+        self.__selection_type = selection_type
+        self.__tournament_size = tournament_size
+
+        if selection_type == SelectionType.ROULETTE:
+            weights = np.clip(self.__scores, 0, None)
+        elif selection_type == SelectionType.RANK:
+            # The worst sample has weight 1 and the best has weight n
+            weights = np.empty(len(self.__scores))
+            weights[np.argsort(self.__scores, kind='stable')] = np.arange(1, len(self.__scores) + 1)
+        elif selection_type == SelectionType.TOURNAMENT:
+            weights = None
+        else:
+            raise ValueError(f'Unknown selection type: {selection_type}')
+
+        if weights is not None:
+            if weights.sum() <= 0:
+                weights = np.ones(len(self.__scores))
+            self.__prob, self.__alias = alias_table(weights)
+
+    def draw(self, shape: Union[int, Tuple[int, ...]]) -> np.ndarray:
+        """
+        :param shape: Shape of the drawn indices, e.g. (n_pairs, 2)
+        :return: np.ndarray: indices of the selected samples
+        """
+        n = len(self.__scores)
+        if self.__selection_type == SelectionType.TOURNAMENT:
+            contestants = np.random.randint(0, n, size=np.append(shape, self.__tournament_size))
+            winners = np.argmax(self.__scores[contestants], axis=-1)
+            return np.take_along_axis(contestants, winners[..., None], axis=-1)[..., 0]
+
+        idx = np.random.randint(0, n, size=shape)
+        keep = np.random.random(shape) < self.__prob[idx]
+        return np.where(keep, idx, self.__alias[idx])
+
+
 class Selector:
     @staticmethod
     def select_elite(samples, fitness_scores, percentile: float) -> List[Sample]:
@@ -16,12 +89,22 @@ class Selector:
         :param percentile: Which percentile to keep
         :return:
         """
+        return [samples[i] for i in Selector.elite_indices(fitness_scores, percentile)]
+
+    @staticmethod
+    def elite_indices(fitness_scores, percentile: float) -> np.ndarray:
+        """
+        Returns the indices of the top percentile scores, by ascending fitness.
+        """
         # Calculate starting index from which to select
         start_index = floor(percentile * len(fitness_scores))
+        if start_index >= len(fitness_scores):
+            return np.empty(0, dtype=np.int64)
 
-        # Sort the samples by fitness
-        sorted_samples, fitness_scores = zip(*sorted(zip(samples, fitness_scores), key=lambda x: x[1]))
-        return sorted_samples[start_index:]
+        # Only the elites are sorted
+        scores = np.asarray(fitness_scores)
+        elite = np.argpartition(scores, start_index)[start_index:]
+        return elite[np.argsort(scores[elite], kind='stable')]
 
     @staticmethod
     def choose_n_random(arr: List, n: int) -> List[int]:
@@ -1,51 +1,118 @@
 import os
+import time
+import random
 import statistics
 import numpy as np
-import matplotlib.pyplot as plt
-from typing import Dict, List, Set
+from typing import Dict, List, Set, Tuple
 from datetime import datetime
 
-from src.fitness import check_words_in_dict_ratio
-from src.memory import Memory
-from src.decoder import Decoder
-from src.evolver import Evolver
-from src.files_parser import parse_dict, parse_encoded, parse_letters_freq
+from src.checkpoint import Checkpoint, Checkpointer, RunState
+from src.local_search import LocalSearchType
+from src.memory import Memory, MemoryBackend
+from src.metrics import Count, Metrics, Phase
+from src.migration import Migration, MigrationTopology
+from src.multi_fidelity import MultiFidelity
+from src.operator_bandit import OperatorBandit, OperatorSelection
+from src.corpus import Corpus, load_corpus
+from src.cipher_text import decode_chunks
+from src.evolver import CrossoverType, Evolver, MutationType
 from src.generator import generate_random
+from src.population import Population
+from src.progress import HeadlessObserver, ProgressObserver
 from src.sample import Sample
-from src.selector import Selector
-from src.scheduler import Scheduler
+from src.seeding import KeySeeder
+from src.selector import SelectionEngine, SelectionType, Selector
+from src.scheduler import Scheduler, StagnationScheduler
 from src.strategy import GeneticAlgorithmType
 
-plt.figure(figsize=(8, 6), dpi=70)
-
 
 OUTPUT_DIR_PATH = 'output'
 
 
 class MutationArgs:
-    def __init__(self, mutation_percentage: float, mutation_decay: float, mutation_min_percentage: float) -> None:
+    def __init__(self, mutation_percentage: float, mutation_decay: float, mutation_min_percentage: float,
+                 mutation_type: str = MutationType.SWAP) -> None:
         self.mutation_percentage = mutation_percentage
         self.mutation_decay = mutation_decay
         self.mutation_min_percentage = mutation_min_percentage
+        self.mutation_type = mutation_type
+
+
+class IslandArgs:
+    def __init__(self, island_count: int, migration_interval: int, migration_size: int, migration_topology: str) -> None:
+        self.island_count = island_count
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        self.migration_topology = migration_topology
+
+
+class MemoryArgs:
+    def __init__(self, memory_backend: str, memory_capacity: int, memory_false_positive_rate: float) -> None:
+        self.memory_backend = memory_backend
+        self.memory_capacity = memory_capacity
+        self.memory_false_positive_rate = memory_false_positive_rate
+
+
+class SelectionArgs:
+    def __init__(self, selection_type: str, tournament_size: int) -> None:
+        self.selection_type = selection_type
+        self.tournament_size = tournament_size
 
 
 class SimulationArgs:
     def __init__(self, fitness_goal: float, elite_percentile: float, 
                  mutation_percentage: float, mutation_decay: float, mutation_min_percentage: float,
-                 generation_tolerance: int, generation_tolerance_percentage: float) -> None:
+                 generation_tolerance: int, generation_tolerance_percentage: float, bigram_weight: float = 0.0,
+                 workers: int = 1, run_workers: int = 1,
+                 island_count: int = 4, migration_interval: int = 10, migration_size: int = 5,
+                 migration_topology: str = MigrationTopology.RING, fitness_cache_size: int = 100000,
+                 memory_backend: str = MemoryBackend.EXACT, memory_capacity: int = 1000000,
+                 memory_false_positive_rate: float = 0.001, local_search: str = LocalSearchType.RANDOM,
+                 local_search_rounds: int = 1, crossover_type: str = CrossoverType.PMX,
+                 mutation_type: str = MutationType.SWAP, selection_type: str = SelectionType.ROULETTE,
+                 tournament_size: int = 3, fidelity_min_fraction: float = 0.0, fidelity_margin: float = 0.02,
+                 seed_random_fraction: float = 1.0, seed_max_swaps: int = 3,
+                 operator_selection: str = OperatorSelection.FIXED, diversity_threshold: float = 0.0,
+                 max_restarts: int = 3) -> None:
         self.fitness_goal = fitness_goal
         self.elite_percentile = elite_percentile
-        self.mutation = MutationArgs(mutation_percentage, mutation_decay, mutation_min_percentage)
+        self.mutation = MutationArgs(mutation_percentage, mutation_decay, mutation_min_percentage, mutation_type)
+        self.crossover_type = crossover_type
+        # Adaptive selection picks the crossover and mutation operators, and raises the mutation rate on stagnation
+        self.operator_selection = operator_selection
+        self.selection = SelectionArgs(selection_type, tournament_size)
+        # Multi-fidelity fitness is off while the minimal sample fraction is 0
+        self.fidelity_min_fraction = fidelity_min_fraction
+        self.fidelity_margin = fidelity_margin
+        # The initial population is seeded from the letters frequencies and word patterns while some of it is not random
+        self.seed_random_fraction = seed_random_fraction
+        self.seed_max_swaps = seed_max_swaps
+        # Up to max_restarts times a run, a population whose diversity fell under the threshold, or that stagnated,
+        # keeps its elites and the rest of it is seeded again. Partial restarts are off while the threshold is 0
+        self.diversity_threshold = diversity_threshold * 100
+        self.max_restarts = max_restarts
 
         self.generation_tolerance = generation_tolerance
         self.generation_tolerance_percentage = generation_tolerance_percentage * 100
 
+        self.bigram_weight = bigram_weight
+        self.workers = workers
+        self.run_workers = run_workers
+        self.fitness_cache_size = fitness_cache_size
+        self.island = IslandArgs(island_count, migration_interval, migration_size, migration_topology)
+        self.memory = MemoryArgs(memory_backend, memory_capacity, memory_false_positive_rate)
+        self.local_search = local_search
+        self.local_search_rounds = local_search_rounds
+
 
 class SimulationHistory:
     def __init__(self) -> None:
         self.__worst: List[float] = []
         self.__average: List[float] = []
         self.__best: List[float] = []
+        self.__diversity: List[float] = []
+        # Generations after which the population was partially restarted
+        self.__restarts: List[int] = []
 
     @property
     def worst(self) -> List[float]:
@@ -58,11 +125,23 @@ class SimulationHistory:
     @property
     def best(self) -> List[float]:
         return self.__best
+
+    @property
+    def diversity(self) -> List[float]:
+        return self.__diversity
+
+    @property
+    def restarts(self) -> List[int]:
+        return self.__restarts
     
-    def add(self, worst, average, best) -> None:
+    def add(self, worst, average, best, diversity=0.0) -> None:
         self.__worst.append(worst)
         self.__average.append(average)
         self.__best.append(best)
+        self.__diversity.append(diversity)
+
+    def add_restart(self, generation: int) -> None:
+        self.__restarts.append(generation)
     
     def last_n_best_change(self, n: int) -> float:
         last_n = self.__best[-n:]
@@ -71,89 +150,300 @@ class SimulationHistory:
     def __len__(self):
         return len(self.__average)
 
+    @staticmethod
+    def combine(histories: List['SimulationHistory']) -> 'SimulationHistory':
+        """
+        Combine the histories of populations that evolved side by side, up to the shortest of them.
+        """
+        combined = SimulationHistory()
+        for i in range(min(len(h) for h in histories)):
+            combined.add(min(h.worst[i] for h in histories),
+                         statistics.mean(h.average[i] for h in histories),
+                         max(h.best[i] for h in histories),
+                         statistics.mean(h.diversity[i] for h in histories))
+        for generation in sorted(set().union(*(h.restarts for h in histories))):
+            combined.add_restart(generation)
+        return combined
+
+
+_simulator: 'Simulator' = None
+_stop_event = None
+
+
+def _init_run_worker(simulator: 'Simulator', stop_event) -> None:
+    global _simulator, _stop_event
+    _simulator = simulator
+    _stop_event = stop_event
+
+
+def _run_worker(iteration: int, seed: int, kwargs: dict):
+    # Every run gets its own random stream
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+
+    counters = _simulator.counters
+    try:
+        fitness_scores, samples, history = _simulator.run(iteration, stop_event=_stop_event, plot=False, **kwargs)
+    finally:
+        # Worker processes do not run exit handlers, and would wait on the fitness pool forever
+        _simulator.close()
+
+    # Let the other runs stop as soon as one of them reaches the goal
+    if max(fitness_scores) >= _simulator.fitness_goal:
+        _stop_event.set()
+
+    return fitness_scores, samples, history, _simulator.counters_since(counters)
+
+
+_inboxes: list = None
+
+
+def _init_island_worker(simulator: 'Simulator', stop_event, inboxes: list) -> None:
+    global _inboxes
+    _init_run_worker(simulator, stop_event)
+    _inboxes = inboxes
+
+
+def _island_worker(island: int, seed: int, topology_seed: int, kwargs: dict):
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+
+    island_args = _simulator.args.island
+    migration = Migration(island, _inboxes, _simulator.letters, island_args.migration_interval,
+                          island_args.migration_size, island_args.migration_topology, topology_seed, _stop_event)
+
+    counters = _simulator.counters
+    try:
+        fitness_scores, samples, history = _simulator.run(island + 1, stop_event=_stop_event, plot=False,
+                                                          migration=migration, **kwargs)
+    except BaseException:
+        # An interrupted island stops all of them
+        _stop_event.set()
+        raise
+    finally:
+        # The other islands stop waiting for this one's migrants
+        migration.finish()
+        _simulator.close()
+
+    # Reaching the goal stops all the islands, any other limit only this one
+    if max(fitness_scores) >= _simulator.fitness_goal:
+        _stop_event.set()
+
+    return fitness_scores, samples, history, _simulator.counters_since(counters)
+
 
 class Simulator:
-    def __init__(self, algo_type: GeneticAlgorithmType, num_samples: int, simulation_args: SimulationArgs) -> None:
-        self.enc = parse_encoded('enc.txt')
-        self.dictionary: Set[str] = set(parse_dict('dict.txt'))
-        freq_1_letter: Dict[str, float] = parse_letters_freq('Letter_Freq.txt')
-        freq_2_letter: Dict[str, float] = parse_letters_freq('Letter2_Freq.txt')
+    # Rounds of mutating already generated children before filling the population with random ones
+    MAX_OFFSPRING_ROUNDS = 100
+    # Generations the best fitness change is measured over by the adaptive mutation rate
+    STAGNATION_WINDOW = 5
+
+    def __init__(self, algo_type: GeneticAlgorithmType, num_samples: int, simulation_args: SimulationArgs,
+                 observer: ProgressObserver = None, corpus: Corpus = None, metrics: Metrics = None,
+                 checkpointer: Checkpointer = None, output_dir: str = '.') -> None:
+        if corpus is None:
+            corpus = load_corpus()
+        self.enc_path = corpus.enc_path
+        self.dictionary: Set[str] = corpus.dictionary
+        freq_1_letter: Dict[str, float] = corpus.unigram_freq
+        freq_2_letter: Dict[str, float] = corpus.bigram_freq
 
         self.__args: SimulationArgs = simulation_args
+        self.__observer: ProgressObserver = observer if observer is not None else HeadlessObserver()
         self.__letters = list(sorted(freq_1_letter.keys()))
         self.__fitness_goal: float = simulation_args.fitness_goal
         self.__evolver: Evolver = Evolver(self.__letters)
-        self.__scheduler = Scheduler(simulation_args.mutation.mutation_percentage, 
-                                     decay=simulation_args.mutation.mutation_decay, 
-                                     min_val=simulation_args.mutation.mutation_min_percentage)
-        self.__memory = Memory()
+        if simulation_args.operator_selection == OperatorSelection.ADAPTIVE:
+            self.__crossovers = OperatorBandit([CrossoverType.PMX, CrossoverType.ORDER, CrossoverType.ONE_POINT])
+            self.__mutations = OperatorBandit([MutationType.SWAP, MutationType.SCRAMBLE])
+            self.__scheduler = StagnationScheduler(simulation_args.mutation.mutation_percentage,
+                                                   decay=simulation_args.mutation.mutation_decay,
+                                                   min_val=simulation_args.mutation.mutation_min_percentage)
+        else:
+            # A single arm gets all the offspring
+            self.__crossovers = OperatorBandit([simulation_args.crossover_type])
+            self.__mutations = OperatorBandit([simulation_args.mutation.mutation_type])
+            self.__scheduler = Scheduler(simulation_args.mutation.mutation_percentage, 
+                                         decay=simulation_args.mutation.mutation_decay, 
+                                         min_val=simulation_args.mutation.mutation_min_percentage)
+        self.__memory = Memory(simulation_args.memory.memory_backend, simulation_args.memory.memory_capacity,
+                               simulation_args.memory.memory_false_positive_rate, letters=self.__letters)
         self.algo_type = algo_type
-        self.__strategy = GeneticAlgorithmType.get_strategy(algo_type, self.dictionary, self.enc, self.__letters, freq_1_letter, freq_2_letter)
+        fidelity = None
+        if simulation_args.fidelity_min_fraction > 0:
+            fidelity = MultiFidelity(simulation_args.elite_percentile, simulation_args.fidelity_min_fraction,
+                                     simulation_args.fidelity_margin)
+        self.__strategy = GeneticAlgorithmType.get_strategy(algo_type, self.dictionary, corpus.cipher, self.__letters, freq_1_letter, freq_2_letter,
+                                                            bigram_weight=simulation_args.bigram_weight, workers=simulation_args.workers,
+                                                            cache_size=simulation_args.fitness_cache_size,
+                                                            local_search=simulation_args.local_search,
+                                                            local_search_rounds=simulation_args.local_search_rounds,
+                                                            fidelity=fidelity)
+        self.__metrics: Metrics = metrics if metrics is not None else Metrics()
+        self.__strategy.metrics = self.__metrics
         self.__num_samples = num_samples
         self.__elite_percentile = simulation_args.elite_percentile
+        if checkpointer is not None and (simulation_args.run_workers > 1 or algo_type == GeneticAlgorithmType.ISLAND):
+            raise ValueError('Checkpoints are only supported for serial runs of the regular, darwin and lamarck GA')
+        self.__checkpointer = checkpointer
+        self.__seeder: KeySeeder = None
+        if simulation_args.seed_random_fraction < 1:
+            self.__seeder = KeySeeder(self.dictionary, corpus.cipher, self.__letters, freq_1_letter)
+        # perm.txt and plain.txt of the best run are written here
+        self.__output_dir = output_dir
+        # (completed runs, best fitness scores, best samples, best history) of the serial runs so far
+        self.__progress = (0, [0], [], SimulationHistory())
+
+    @property
+    def args(self) -> SimulationArgs:
+        return self.__args
+
+    @property
+    def letters(self) -> List[str]:
+        return self.__letters
+
+    @property
+    def fitness_goal(self) -> float:
+        return self.__fitness_goal
+
+    @property
+    def counters(self) -> Dict[str, int]:
+        return self.__strategy.counters
+
+    def counters_since(self, counters: Dict[str, int]) -> Dict[str, int]:
+        return {k: v - counters[k] for k, v in self.__strategy.counters.items()}
+
+    def close(self) -> None:
+        self.__strategy.close()
 
     def __should_run(self, step: int, history: SimulationHistory, 
-                     fitness_scores: List[float], fitness_goals: Dict[int, float] = None):
+                     fitness_scores: np.ndarray, fitness_goals: Dict[int, float] = None, stop_event=None):
+        if stop_event is not None and stop_event.is_set():
+            return False
+
         if fitness_goals:
-            max_fitness = max(fitness_scores)
+            max_fitness = fitness_scores.max()
             for k, v in sorted(fitness_goals.items(), reverse=True):
                 if step >= k and max_fitness < v:
                     return False
 
-        tolerance = self.__args.generation_tolerance
-        if step > tolerance and history.last_n_best_change(tolerance) < self.__args.generation_tolerance_percentage:
+        if self.__stagnated(step, history):
             return False
 
-        return max(fitness_scores) < self.__fitness_goal
+        return fitness_scores.max() < self.__fitness_goal
+
+    def __stagnated(self, step: int, history: SimulationHistory) -> bool:
+        # Stagnation is measured from the last partial restart
+        tolerance = self.__args.generation_tolerance
+        since = history.restarts[-1] + 1 if history.restarts else 0
+        return step - since > tolerance and history.last_n_best_change(tolerance) < self.__args.generation_tolerance_percentage
+
+    def __plot_title(self, iteration: int) -> str:
+        return f'Method: {GeneticAlgorithmType.map_to_str(self.algo_type)}, Iteration: {iteration}#, Population Size: {self.__num_samples},\n Fitness Calls: {self.__strategy.fitness_calls}, Mutation Ratio: {self.__args.mutation.mutation_percentage * 100}%'
 
     def __plot_current(self, history: SimulationHistory, iteration: int):
-        plt.title(f'Method: {GeneticAlgorithmType.map_to_str(self.algo_type)}, Iteration: {iteration}#, Population Size: {self.__num_samples},\n Fitness Calls: {self.__strategy.fitness_calls}, Mutation Ratio: {self.__args.mutation.mutation_percentage * 100}%')
-        plt.plot(history.worst, label='Worst Fitness')
-        plt.plot(history.average, label='Avg Fitness')
-        plt.plot(history.best, label='Best Fitness')
-        plt.xlabel('Generation number')
-        plt.ylabel('Fitness Score %')
-        plt.legend(loc='upper right', bbox_to_anchor=(1, 1))
-        plt.draw()
-        plt.pause(0.01)
-
-    def __generate_crossovers(self, samples: List[Sample], fitness_scores: List[float], n: int) -> List[Sample]:
+        self.__observer.update(self.__plot_title(iteration), history)
+
+    def __initial_population(self, n_samples: int = None) -> List[Sample]:
+        n_samples = self.__num_samples if n_samples is None else n_samples
+        if self.__seeder is None:
+            return generate_random(self.__letters, n_samples)
+        return self.__seeder.population(n_samples, self.__args.seed_random_fraction, self.__args.seed_max_swaps)
+
+    def __should_restart(self, step: int, history: SimulationHistory, fitness_scores: np.ndarray) -> bool:
+        # A collapsed population, or one that stagnated and would end the run, is restarted while restarts are left
+        if self.__args.diversity_threshold <= 0 or len(history.restarts) >= self.__args.max_restarts:
+            return False
+        if fitness_scores.max() >= self.__fitness_goal:
+            return False
+        return history.diversity[-1] < self.__args.diversity_threshold or self.__stagnated(step + 1, history)
+
+    def __partial_restart(self, population: Population) -> Population:
         """
-        Generate n crossovers from given elite samples.
+        Keep the elites of a converged population and seed the rest of it again.
+        """
+        elite = Selector.elite_indices(population.scores, self.__elite_percentile)
+        seeded = Population.from_samples(self.__letters, self.__initial_population(self.__num_samples - len(elite)))
+        population = Population(self.__letters, np.concatenate([seeded.perms, population.perms[elite]]),
+                                np.concatenate([seeded.scores, population.scores[elite]]),
+                                np.concatenate([seeded.dirty, population.dirty[elite]]))
+        with self.__metrics.phase(Phase.FITNESS):
+            self.__strategy.population_fitness(population)
+        self.__metrics.count(Count.PARTIAL_RESTARTS, 1)
+        self.__scheduler.reset()
+        return population
+
+    def __generate_crossovers(self, perms: np.ndarray, fitness_scores: np.ndarray,
+                              n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Generate n crossovers from given permutations, shared between the crossover operators.
 
         Args:
-            elite_samples (List[Sample]): samples on which to generate crossovers
+            perms (np.ndarray): (pop_size, n_letters) permutation matrix on which to generate crossovers
+            fitness_scores (np.ndarray): fitness scores the parents are selected by
             n (int): number of samples to generate
 
         Returns:
-            List[Sample]: valid crossover samples
+            np.ndarray: (n, n_letters) permutation matrix of new valid crossovers
+            np.ndarray: (n,) crossover arm of every crossover, -1 for random fills
+            np.ndarray: (n,) best fitness score of the parents of every crossover
         """
-        new_samples: List[Sample] = []
-        samples_len = 0
-
-        while samples_len < n:
-            co = self.__evolver.generate_pmx_crossover(samples, fitness_scores)
-
-            for o in co:
-                if o not in self.__memory:
-                    new_samples.append(Sample(self.__letters, decode_letters=o))
-                    self.__memory.add(o)
-
-            samples_len += len(co)
-
-        return new_samples
+        with self.__metrics.phase(Phase.SELECTION):
+            selection = SelectionEngine(fitness_scores, self.__args.selection.selection_type,
+                                        self.__args.selection.tournament_size)
+            parents = selection.draw((n, 2))
+
+        with self.__metrics.phase(Phase.CROSSOVER):
+            counts = self.__crossovers.allocate(n)
+            batches = []
+            start = 0
+            for arm, count in enumerate(counts):
+                begin = time.process_time()
+                pairs = parents[start:start + count]
+                batches.append(self.__evolver.batch_crossover(self.__crossovers.arms[arm], perms[pairs[:, 0]], perms[pairs[:, 1]]))
+                self.__crossovers.spend(arm, time.process_time() - begin)
+                start += count
+            batch = np.concatenate(batches)
+            batch_arms = np.repeat(np.arange(len(counts)), counts)
+            batch_parent_fitness = fitness_scores[parents].max(axis=1)
+
+            children = np.empty((0, len(self.__letters)), dtype=np.uint8)
+            arms = np.empty(0, dtype=np.int64)
+            parent_fitness = np.empty(0)
+            for _ in range(self.MAX_OFFSPRING_ROUNDS):
+                new = self.__memory.add_new(batch)
+                children = np.concatenate([children, batch[new]])
+                arms = np.concatenate([arms, batch_arms[new]])
+                parent_fitness = np.concatenate([parent_fitness, batch_parent_fitness[new]])
+                self.__metrics.count(Count.DEDUP_REJECTIONS, len(new) - int(new.sum()))
+                if len(children) >= n:
+                    break
+                # Children that were generated before are mutated until they are new
+                batch = self.__evolver.batch_mutation(self.__args.mutation.mutation_type, batch[~new][:n - len(children)])
+                batch_arms = batch_arms[~new][:len(batch)]
+                batch_parent_fitness = batch_parent_fitness[~new][:len(batch)]
+            else:
+                # The population converged, fill it up with random permutations
+                batch = np.argsort(np.random.random((n - len(children), len(self.__letters))), axis=1).astype(np.uint8)
+                self.__memory.add_new(batch)
+                children = np.concatenate([children, batch])
+                arms = np.concatenate([arms, np.full(len(batch), -1)])
+                parent_fitness = np.concatenate([parent_fitness, np.zeros(len(batch))])
+                self.__metrics.count(Count.RANDOM_FILLS, len(batch))
+
+        return children[:n], arms[:n], parent_fitness[:n]
 
     def __save(self, samples: List[Sample], fitness_scores: List[float]):
         i = np.argmax(fitness_scores)
         best: Sample = samples[i]
 
-        with open('perm.txt', '+wt', encoding='utf-8') as f:
+        with open(os.path.join(self.__output_dir, 'perm.txt'), '+wt', encoding='utf-8') as f:
             f.write(best.get_dec_map_as_table(self.__letters))
 
-        with open('plain.txt', '+wt', encoding='utf-8') as f:
-            f.writelines(Decoder.decode_words(self.enc, best.dec_map_int))
+        with open(os.path.join(self.__output_dir, 'plain.txt'), '+wt', encoding='utf-8') as f:
+            f.writelines(decode_chunks(self.enc_path, best.dec_map_int))
 
-    def __save_test(self, samples: List[Sample], dec: List[str], fitness_scores: List[float], generations: int, run_num: int = 0) -> None:
+    def __save_test(self, samples: List[Sample], fitness_scores: List[float], generations: int, run_num: int = 0) -> None:
         i = np.argmax(fitness_scores)
         best = samples[i]
 
@@ -166,7 +456,8 @@ class Simulator:
             f.write(f'strategy: {GeneticAlgorithmType.map_to_str(self.algo_type)}{os.linesep}')
             f.write(f'sample size: {self.__num_samples}{os.linesep}')
             f.write(f'fitness score: {fitness_scores[i] * 100:.3f}{os.linesep}')
-            f.write(f'fitness calls: {self.__strategy.fitness_calls}{os.linesep}')
+            f.write(f'fitness calls: {self.__strategy.fitness_calls}, cheap: {self.__strategy.cheap_fitness_calls}{os.linesep}')
+            f.write(f'fitness cache hits: {self.__strategy.cache_hits}, misses: {self.__strategy.cache_misses}{os.linesep}')
             f.write(f'generations: {generations}{os.linesep}')
             f.write(f'elite percentage: {self.__elite_percentile}{os.linesep}')
             f.write(f'initial mutation rate: {self.__args.mutation.mutation_percentage}{os.linesep}')
@@ -174,94 +465,281 @@ class Simulator:
             f.write(f'mutation decay: {self.__scheduler.decay}{os.linesep}')
             f.write(f'letters: {self.__letters}{os.linesep}')
             f.write(f'dec: {best.decode_letters}{os.linesep}')
-            f.writelines(Decoder.decode_words(self.enc, best.dec_map_int))
+            f.writelines(decode_chunks(self.enc_path, best.dec_map_int))
 
-        plt.savefig(os.path.join(OUTPUT_DIR_PATH, f'plot_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.png'), format='png')
 
-    def __add_current_iteration_data(self, fitness_scores: List[float], 
-                                     history: SimulationHistory):
+    def __add_current_iteration_data(self, population: Population, history: SimulationHistory):
+        fitness_scores = population.scores.tolist()
         worst: float = min(fitness_scores) * 100
         average: float = statistics.mean(fitness_scores) * 100
         best: float = max(fitness_scores) * 100
-        history.add(worst, average, best)
+        diversity: float = population.diversity() * 100
+        history.add(worst, average, best, diversity)
 
-    def __step(self, step: int, samples: List[Sample], fitness_scores: List[float]):
+    def __step(self, step: int, population: Population, fitness_scores: np.ndarray) -> Population:
         # Selection
-        elite_samples = Selector.select_elite(samples, fitness_scores, self.__elite_percentile)
+        with self.__metrics.phase(Phase.SELECTION):
+            elite = Selector.elite_indices(fitness_scores, self.__elite_percentile)
         
         # Crossover
-        samples = self.__generate_crossovers(samples, fitness_scores, self.__num_samples - len(elite_samples))
+        children, crossover_arms, parent_fitness = self.__generate_crossovers(population.perms, fitness_scores,
+                                                                              self.__num_samples - len(elite))
         
         # Mutation
-        mutation_prob = self.__scheduler.calculate(step)
-        mutation_amount = int(len(samples) * mutation_prob)
-
-        for i in Selector.choose_n_random(samples, mutation_amount):
-            s = samples[i]
-            mutation, swaps = self.__evolver.swap_mutation(s.dec_map)
-            if mutation not in self.__memory:
-                s.swap(swaps)
-                self.__memory.add(mutation)
+        with self.__metrics.phase(Phase.MUTATION):
+            mutation_prob = self.__scheduler.calculate(step)
+            mutation_amount = int(len(children) * mutation_prob)
+
+            mutated_idx = np.random.choice(len(children), mutation_amount, replace=False)
+            counts = self.__mutations.allocate(mutation_amount)
+            batches = []
+            start = 0
+            for arm, count in enumerate(counts):
+                begin = time.process_time()
+                batches.append(self.__evolver.batch_mutation(self.__mutations.arms[arm], children[mutated_idx[start:start + count]]))
+                self.__mutations.spend(arm, time.process_time() - begin)
+                start += count
+            mutated = np.concatenate(batches)
+            new = self.__memory.add_new(mutated)
+            children[mutated_idx[new]] = mutated[new]
+            self.__metrics.count(Count.DEDUP_REJECTIONS, len(new) - int(new.sum()))
 
-        samples.extend(elite_samples)
         # Compute fitness
-        fitness_scores = self.__strategy.fitness(samples)
+        with self.__metrics.phase(Phase.FITNESS):
+            begin = time.process_time()
+            population = Population(self.__letters, np.concatenate([children, population.perms[elite]]),
+                                    np.concatenate([np.full(len(children), np.nan), population.scores[elite]]),
+                                    np.concatenate([np.ones(len(children), dtype=bool), population.dirty[elite]]))
+            fitness_scores = self.__strategy.population_fitness(population)
+            seconds_per_child = (time.process_time() - begin) / len(population)
+
+        # A mutated child is credited to its mutation, the others to their crossover
+        gains = np.maximum(fitness_scores[:len(children)] - parent_fitness, 0.0)
+        mutation_arms = np.full(len(children), -1)
+        mutation_arms[mutated_idx[new]] = np.repeat(np.arange(len(counts)), counts)[new]
+        crossover_arms[mutated_idx[new]] = -1
+        self.__crossovers.update(crossover_arms, gains, seconds_per_child)
+        self.__mutations.update(mutation_arms, gains, seconds_per_child)
 
         print(f'Current Mutation rate: {mutation_prob}')
+        if self.__args.operator_selection == OperatorSelection.ADAPTIVE:
+            print(f'Operator shares: {self.__crossovers.shares}, {self.__mutations.shares}')
+
+        return population
 
-        return samples, fitness_scores
+    def generation(self, step: int, population: Population) -> Population:
+        """
+        Breed the next generation of a scored population and apply the strategy's local optimization to it.
+        """
+        return self.__strategy.activate(lambda p, f: self.__step(step, p, f), population)
 
-    def run(self, iteration: int, fitness_goals: Dict[int, float] = None):
-        history: SimulationHistory = SimulationHistory()
-        step = 0
+    def __run_islands(self, iteration: int, plot: bool = True, **kwargs):
+        """
+        Run every island's generations in its own worker process, exchanging migrants between them.
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        island_count = self.__args.island.island_count
+        context = multiprocessing.get_context('forkserver' if os.name == 'posix' else 'spawn')
+        stop_event = context.Event()
+        inboxes = [context.Queue() for _ in range(island_count)]
+        seeds = [random.randint(0, 2 ** 63) for _ in range(island_count)]
+        topology_seed = random.randint(0, 2 ** 31)
+
+        with ProcessPoolExecutor(max_workers=island_count, mp_context=context, initializer=_init_island_worker,
+                                 initargs=(self, stop_event, inboxes)) as executor:
+            futures = [executor.submit(_island_worker, i, seeds[i], topology_seed, kwargs) for i in range(island_count)]
+            results = [f.result() for f in futures]
+
+        fitness_scores: List[float] = []
+        samples: List[Sample] = []
+        for island_fitness, island_samples, _, counters in results:
+            fitness_scores.extend(island_fitness)
+            samples.extend(island_samples)
+            self.__strategy.add_counters(counters)
+
+        history = SimulationHistory.combine([r[2] for r in results])
+        if plot:
+            self.__plot_current(history, iteration)
 
-        plt.title(f'Initial mutation percentage: {self.__args.mutation.mutation_percentage * 100}%, elite percentile: {self.__elite_percentile * 100}%')
-        
-        # Generate initial population
-        samples: List[Sample] = generate_random(self.__letters, self.__num_samples)
-        
-        # Compute fitness
-        fitness_scores = self.__strategy.fitness(samples)
-        
-        self.__add_current_iteration_data(fitness_scores, history)
-        self.__plot_current(history, iteration)
-        plt.cla()
+        print(f'Best: {max(fitness_scores) * 100}%, Worst: {min(fitness_scores) * 100}%, Mean: {statistics.mean(fitness_scores) * 100}%')
+        print(f'fitness calls: {self.__strategy.fitness_calls}, cheap: {self.__strategy.cheap_fitness_calls}')
+        print(f'fitness cache hits: {self.__strategy.cache_hits}, misses: {self.__strategy.cache_misses}')
+        print(f'islands: {island_count}, generations: {len(history)}')
+
+        return fitness_scores, samples, history
 
-        while self.__should_run(step, history, fitness_scores, fitness_goals):
-            step_func = lambda s, f: self.__step(step, s, f)
-            samples, fitness_scores = self.__strategy.activate(step_func, samples, fitness_scores)
+    def run(self, iteration: int, fitness_goals: Dict[int, float] = None, stop_event=None, plot: bool = True,
+            migration: Migration = None, state: RunState = None):
+        if self.algo_type == GeneticAlgorithmType.ISLAND and migration is None:
+            return self.__run_islands(iteration, plot=plot, fitness_goals=fitness_goals)
+
+        self.__metrics.start_run(iteration, self.__strategy.counters)
+        if state is not None:
+            # Continue a checkpointed run
+            history: SimulationHistory = state.history
+            step = state.step
+            population = Population(self.__letters, state.perms, state.scores)
+        else:
+            history: SimulationHistory = SimulationHistory()
+            step = 0
+            self.__scheduler.reset()
+
+            # Generate initial population
+            population = Population.from_samples(self.__letters, self.__initial_population())
+            
+            # Compute fitness
+            with self.__metrics.phase(Phase.FITNESS):
+                self.__strategy.population_fitness(population)
             
-            self.__add_current_iteration_data(fitness_scores, history)
+            self.__add_current_iteration_data(population, history)
+
+        if plot:
             self.__plot_current(history, iteration)
-            plt.cla()
 
-            print(f'Best: {max(fitness_scores) * 100}%, Worst: {min(fitness_scores) * 100}%, Mean: {statistics.mean(fitness_scores) * 100}%')
-            print(f'fitness calls: {self.__strategy.fitness_calls}')
+        while self.__should_run(step, history, population.scores, fitness_goals, stop_event):
+            population = self.generation(step, population)
+            if migration is not None:
+                population = migration(step, population)
+            
+            self.__add_current_iteration_data(population, history)
+            print(f'Best: {history.best[-1]}%, Worst: {history.worst[-1]}%, Mean: {history.average[-1]}%')
+            print(f'Diversity: {history.diversity[-1]}%')
+            generation_scores = population.scores.tolist()
+            if self.__should_restart(step, history, population.scores):
+                print(f'Partially restarting the population, diversity: {history.diversity[-1]}%')
+                population = self.__partial_restart(population)
+                history.add_restart(step)
+
+            self.__metrics.end_generation(step, generation_scores, self.__strategy.counters)
+            if len(history) > self.STAGNATION_WINDOW:
+                self.__scheduler.observe(history.last_n_best_change(self.STAGNATION_WINDOW))
+            if plot:
+                self.__plot_current(history, iteration)
+
+            print(f'fitness calls: {self.__strategy.fitness_calls}, cheap: {self.__strategy.cheap_fitness_calls}')
+            print(f'fitness cache hits: {self.__strategy.cache_hits}, misses: {self.__strategy.cache_misses}')
             print(f'generation: {step}')
 
             step += 1
+            if self.__checkpointer is not None and migration is None and self.__checkpointer.due(step):
+                self.__checkpoint(RunState(iteration, step, population.perms, population.scores, history))
 
-        return fitness_scores, samples, history
+        return population.scores.tolist(), population.to_samples(), history
 
-    def run_multiple(self, num_runs, **kwargs):
-        best_fitness = [0]
-        best_samples = []
-        best_history = SimulationHistory()
+    def __checkpoint(self, run: RunState = None) -> None:
+        completed, best_fitness, best_samples, best_history = self.__progress
+        best_perms = Population.from_samples(self.__letters, best_samples).perms
+        checkpoint = Checkpoint(self.__config(), completed, best_perms, best_fitness, best_history, run,
+                                self.__memory, self.__strategy.state(), random.getstate(), np.random.get_state(),
+                                (self.__crossovers, self.__mutations, self.__scheduler))
+        self.__checkpointer.save(checkpoint)
 
-        for i in range(num_runs):
-            fitnesses, samples, history = self.run(i + 1, **kwargs)
+    def __config(self) -> tuple:
+        return int(self.algo_type), self.__num_samples, tuple(self.__letters)
+
+    def __restore(self, checkpoint: Checkpoint) -> RunState:
+        """
+        Load the state of a checkpoint and return its unfinished run, if any.
+        """
+        if checkpoint.config != self.__config():
+            raise ValueError(f'Checkpoint {self.__checkpointer.path} was written by another configuration: '
+                             f'{checkpoint.config}')
+
+        best_samples = Population(self.__letters, checkpoint.best_perms, checkpoint.best_scores).to_samples()
+        self.__progress = (checkpoint.completed_runs, checkpoint.best_scores, best_samples, checkpoint.best_history)
+        self.__memory = checkpoint.memory
+        self.__crossovers, self.__mutations, self.__scheduler = checkpoint.operators
+        self.__strategy.load_state(checkpoint.strategy_state)
+        random.setstate(checkpoint.random_state)
+        np.random.set_state(checkpoint.np_random_state)
+        return checkpoint.run
+
+    def __run_serial(self, num_runs, state: RunState = None, **kwargs) -> Tuple[List[float], List[Sample], SimulationHistory, int]:
+        completed, best_fitness, best_samples, best_history = self.__progress
+
+        for i in range(completed, num_runs):
+            self.__progress = (i, best_fitness, best_samples, best_history)
+            fitnesses, samples, history = self.run(i + 1, state=state, **kwargs)
+            state = None
+            completed = i + 1
 
             if max(fitnesses) > max(best_fitness):
                 best_fitness = fitnesses
                 best_samples = samples
                 best_history = history
 
+            self.__progress = (completed, best_fitness, best_samples, best_history)
+            if max(best_fitness) >= self.__fitness_goal:
+                break
+            if self.__checkpointer is not None:
+                self.__checkpoint()
+
+        return best_fitness, best_samples, best_history, completed
+
+    def __run_concurrent(self, num_runs, **kwargs) -> Tuple[List[float], List[Sample], SimulationHistory, int]:
+        """
+        Run the restarts in a process pool and cancel the rest once one of them reaches the fitness goal.
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        best_fitness = [0]
+        best_samples = []
+        best_history = SimulationHistory()
+        completed = 0
+
+        stop_event = multiprocessing.Event()
+        seeds = [random.randint(0, 2 ** 63) for _ in range(num_runs)]
+
+        with ProcessPoolExecutor(max_workers=self.__args.run_workers, initializer=_init_run_worker,
+                                 initargs=(self, stop_event)) as executor:
+            futures = [executor.submit(_run_worker, i + 1, seeds[i], kwargs) for i in range(num_runs)]
+
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+
+                fitnesses, samples, history, counters = future.result()
+                self.__strategy.add_counters(counters)
+                completed += 1
+
+                if max(fitnesses) > max(best_fitness):
+                    best_fitness = fitnesses
+                    best_samples = samples
+                    best_history = history
+
                 if max(best_fitness) >= self.__fitness_goal:
-                    break
+                    stop_event.set()
+                    for f in futures:
+                        f.cancel()
 
-        dec, dec_words = self.__strategy.decode(best_samples)
-        print(f'Best Words Fitness: {100 * max([check_words_in_dict_ratio(dec, self.dictionary) for dec in dec_words])}%')
+        return best_fitness, best_samples, best_history, completed
 
-        self.__plot_current(best_history, i + 1)
-        # self.__save_test(best_samples, dec, best_fitness, len(best_history), run_num=i)
+    def run_multiple(self, num_runs, resume: bool = False, **kwargs):
+        """
+        Run up to num_runs restarts and save the best one.
+
+        :param resume: Continue from the checkpointer's last checkpoint, if there is one
+        :return: the samples and fitness scores of the best run
+        """
+        if self.__args.run_workers > 1:
+            best_fitness, best_samples, best_history, i = self.__run_concurrent(num_runs, **kwargs)
+        else:
+            state = None
+            self.__progress = (0, [0], [], SimulationHistory())
+            checkpoint = self.__checkpointer.load() if resume and self.__checkpointer is not None else None
+            if checkpoint is not None:
+                state = self.__restore(checkpoint)
+                print(f'Resuming from {self.__checkpointer.path} after {checkpoint.completed_runs} runs')
+            best_fitness, best_samples, best_history, i = self.__run_serial(num_runs, state=state, **kwargs)
+
+        print(f'Best Words Fitness: {100 * max(self.__strategy.words_in_dict_ratio(best_samples))}%')
+
+        self.__observer.finish(self.__plot_title(i), best_history)
+        # self.__save_test(best_samples, best_fitness, len(best_history), run_num=i - 1)
         self.__save(best_samples, best_fitness)
+        if self.__checkpointer is not None:
+            self.__checkpointer.remove()
+        return best_samples, best_fitness
@@ -1,11 +1,15 @@
-import copy
+import numpy as np
 from enum import IntEnum
-from string import punctuation
-from typing import Callable, Dict, List, Set, Tuple
+from random import randint, sample
+from typing import Any, Callable, Dict, List, Set, Tuple
 
-from src.evolver import Evolver
-from src.fitness import minus_freq_diff, check_words_in_dict_ratio, letters_freq_ratio
-from src.decoder import Decoder
+from src.fitness_cache import FitnessCache
+from src.cipher_text import CipherStats
+from src.fitness_engine import FitnessEngine
+from src.metrics import Metrics, Phase
+from src.local_search import BatchLocalSearch, LocalSearchType
+from src.multi_fidelity import MultiFidelity
+from src.population import Population
 from src.sample import Sample
 
 
@@ -13,14 +17,15 @@ class GeneticAlgorithmType(IntEnum):
     REGULAR = 0
     DARWIN = 1
     LAMARCK = 2
+    ISLAND = 3
 
     @staticmethod
-    def get_strategy(strategy: int, dictionary: Set[str], enc: str, enc_letters: List[str], unigram_freq: Dict[str, float], bigram_freq: Dict[str, float]):
+    def get_strategy(strategy: int, dictionary: Set[str], enc: CipherStats, enc_letters: List[str], unigram_freq: Dict[str, float], bigram_freq: Dict[str, float], bigram_weight: float = 0.0, workers: int = 1, cache_size: int = 0, local_search: str = LocalSearchType.RANDOM, local_search_rounds: int = 1, fidelity: MultiFidelity = None):
         if strategy == 1:
-            return DarwinStrategy(dictionary, enc, enc_letters, unigram_freq, bigram_freq)
+            return DarwinStrategy(dictionary, enc, enc_letters, unigram_freq, bigram_freq, bigram_weight, workers, cache_size, local_search, local_search_rounds, fidelity)
         if strategy == 2:
-            return LamarckStrategy(dictionary, enc, enc_letters, unigram_freq, bigram_freq)
-        return RegularStrategy(dictionary, enc, enc_letters, unigram_freq, bigram_freq)
+            return LamarckStrategy(dictionary, enc, enc_letters, unigram_freq, bigram_freq, bigram_weight, workers, cache_size, local_search, local_search_rounds, fidelity)
+        return RegularStrategy(dictionary, enc, enc_letters, unigram_freq, bigram_freq, bigram_weight, workers, cache_size, local_search, local_search_rounds, fidelity)
 
     @staticmethod
     def map_to_str(strategy: int) -> str:
@@ -28,83 +33,248 @@ class GeneticAlgorithmType(IntEnum):
             GeneticAlgorithmType.REGULAR: 'REGULAR',
             GeneticAlgorithmType.DARWIN: 'DARWIN',
             GeneticAlgorithmType.LAMARCK: 'LAMARCK',
+            GeneticAlgorithmType.ISLAND: 'ISLAND',
         }
 
         return m.get(strategy, '')
 
 
 class BaseStrategy:
-    def __init__(self, dictionary: Set[str], enc: str, enc_letters: List[str], unigram_freq: Dict[str, float], bigram_freq: Dict[str, float]) -> None:
-        self.__enc = enc
+    def __init__(self, dictionary: Set[str], enc: CipherStats, enc_letters: List[str], unigram_freq: Dict[str, float], bigram_freq: Dict[str, float], bigram_weight: float = 0.0, workers: int = 1, cache_size: int = 0, local_search: str = LocalSearchType.RANDOM, local_search_rounds: int = 1, fidelity: MultiFidelity = None) -> None:
         self.__dictionary = dictionary
         self.unigram_freq = unigram_freq
         self.bigram_freq = bigram_freq
-        self.__evolver: Evolver = Evolver(enc_letters)
+        self.__letters = enc_letters
+        self.__engine: FitnessEngine = FitnessEngine(dictionary, enc, enc_letters, unigram_freq, bigram_freq, bigram_weight)
+        self.__parallel: 'ParallelEvaluator' = None
+        if workers > 1:
+            # The worker pool machinery is only imported when it is used
+            from src.parallel import ParallelEvaluator
+            self.__parallel = ParallelEvaluator(self.__engine, workers)
+        self.__cache: FitnessCache = FitnessCache(cache_size) if cache_size > 0 else None
+        self.__batch_search: BatchLocalSearch = None
+        if local_search != LocalSearchType.RANDOM:
+            self.__batch_search = BatchLocalSearch(self.__evaluate, len(enc_letters), local_search, local_search_rounds)
+        self.__fidelity = fidelity
+        self.__best_fitness = 0.0
         self.fitness_calls = 0
+        self.cheap_fitness_calls = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Times the local optimization, set by the simulator
+        self.metrics: Metrics = Metrics()
 
-    def decode(self, samples: List[Sample]) -> Tuple[List[str], List[List[str]]]:
-        dec = [Decoder.decode_words(self.__enc, s.dec_map_int).strip().translate(str.maketrans('', '', f'{punctuation}\n\r')) for s in samples]
-        dec_words = [d.split(' ') for d in dec]
-        return dec, dec_words
+    @property
+    def counters(self) -> Dict[str, int]:
+        return {'fitness_calls': self.fitness_calls, 'cheap_fitness_calls': self.cheap_fitness_calls,
+                'cache_hits': self.cache_hits, 'cache_misses': self.cache_misses}
+
+    def add_counters(self, counters: Dict[str, int]) -> None:
+        """
+        Add counters of work done by a copy of this strategy in another process.
+        """
+        for k, v in counters.items():
+            setattr(self, k, getattr(self, k) + v)
+
+    def state(self) -> Dict[str, Any]:
+        """
+        The counters, the fitness cache and the best fitness seen, which steers the multi-fidelity screening.
+        """
+        return {'counters': self.counters, 'cache': self.__cache, 'best_fitness': self.__best_fitness}
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        for k, v in state['counters'].items():
+            setattr(self, k, v)
+        self.__cache = state['cache']
+        self.__best_fitness = state['best_fitness']
+
+    def close(self) -> None:
+        """
+        Stop the fitness worker processes, they are started again if needed.
+        """
+        if self.__parallel is not None:
+            self.__parallel.close()
+
+    def words_in_dict_ratio(self, samples: List[Sample]) -> List[float]:
+        """
+        Ratio of the decoded words of every sample that are in the dictionary.
+        """
+        return self.__engine.words_in_dict_ratio(self.__engine.encode(samples)).tolist()
+
+    def __evaluate(self, perms: np.ndarray) -> np.ndarray:
+        self.fitness_calls += len(perms)
+        if len(perms) == 0:
+            return np.zeros(0)
+
+        if self.__parallel is not None:
+            return self.__parallel.fitness(perms)
+        return self.__engine.fitness(perms)
+
+    def __screen(self, perms: np.ndarray, missing: List[int], fitness_scores: List[float], dirty: List[int]) -> List[int]:
+        """
+        Score the missing individuals on a sample of the words, and keep only the ones that could be elites
+        to be scored in full. The others keep their sample score, which is not cached, and stay dirty.
+        """
+        if self.__fidelity is None or len(missing) < 2:
+            return missing
+
+        words = self.__engine.stratified_words(self.__fidelity.fraction(self.__best_fitness))
+        if len(words) == self.__engine.n_unique_words:
+            return missing
+
+        self.cheap_fitness_calls += len(missing)
+        if self.__parallel is not None:
+            cheap_scores = self.__parallel.fitness(perms[missing], words)
+        else:
+            cheap_scores = self.__engine.fitness(perms[missing], words)
+        missing_set = set(dirty[k] for k in missing)
+        known_scores = np.array([f for i, f in enumerate(fitness_scores) if i not in missing_set], dtype=np.float64)
+
+        full = self.__fidelity.candidates(cheap_scores, known_scores)
+        for k, f in zip(missing, cheap_scores.tolist()):
+            fitness_scores[dirty[k]] = f
+        return [k for k, is_full in zip(missing, full) if is_full]
+
+    def __score(self, perms: np.ndarray, fitness_scores, dirty: List[int]) -> List[int]:
+        """
+        Score the dirty individuals into fitness_scores.
+
+        :param perms: Permutation of every dirty individual
+        :param fitness_scores: Scores of all individuals, a list or an array
+        :param dirty: Index in fitness_scores of every row of perms
+        :return: List[int]: the indices in fitness_scores that got a full score, the others only have a screening score
+        """
+        keys = [p.tobytes() for p in perms]
+        missing: List[int] = []
+
+        for k, (i, key) in enumerate(zip(dirty, keys)):
+            cached = self.__cache.get(key) if self.__cache is not None else None
+            if cached is None:
+                missing.append(k)
+            else:
+                fitness_scores[i] = cached
+
+        if self.__cache is not None:
+            self.cache_hits += len(dirty) - len(missing)
+            self.cache_misses += len(missing)
+
+        screened = set(missing)
+        missing = self.__screen(perms, missing, fitness_scores, dirty)
+        screened.difference_update(missing)
+
+        for k, f in zip(missing, self.__evaluate(perms[missing]).tolist()):
+            fitness_scores[dirty[k]] = f
+            self.__best_fitness = max(self.__best_fitness, f)
+            if self.__cache is not None:
+                self.__cache.put(keys[k], f)
+
+        return [i for k, i in enumerate(dirty) if k not in screened]
 
     def fitness(self, samples: List[Sample]) -> List[float]:
-        self.fitness_calls += len(samples)
-        decs, dec_words = self.decode(samples)
-        words_in_dict_measure = [check_words_in_dict_ratio(dec, self.__dictionary) for dec in dec_words]
-        minus_diff_unigrams_freq_measure = [letters_freq_ratio(dec, self.unigram_freq, minus_freq_diff) for dec in decs]
+        # Samples that did not change since they were scored keep their score
+        fitness_scores: List[float] = [s.score for s in samples]
+        dirty = [i for i, s in enumerate(samples) if s.dirty]
+        if not dirty:
+            return fitness_scores
 
-        fitness_scores = [(a * 9 + b * 1) / 10 for
-                          a, b in zip(words_in_dict_measure, minus_diff_unigrams_freq_measure)]
+        for i in self.__score(self.__engine.encode([samples[i] for i in dirty]), fitness_scores, dirty):
+            samples[i].set_score(fitness_scores[i])
 
         return fitness_scores
 
-    def optimize(self, samples: List[Sample], fitness_scores: List[float]) -> List[Sample]:
-        optimized: List[Sample] = list()
-        prev_fitness = 0
+    def population_fitness(self, population: Population) -> np.ndarray:
+        """
+        Score the dirty individuals of a population in place. Individuals that only got a screening score stay dirty.
+
+        :return: np.ndarray: the scores of all individuals
+        """
+        dirty = np.flatnonzero(population.dirty).tolist()
+        if dirty:
+            population.dirty[self.__score(population.perms[dirty], population.scores, dirty)] = False
+        return population.scores
+
+    def delta_fitness(self, sample: Sample, swaps: List[Tuple[str, str]]) -> float:
+        """
+        Apply swaps to a sample and return the fitness change.
+        The sample keeps its scoring state, so only the words that contain a swapped letter are scored again.
+        """
+        state = sample.fitness_state
+        if state is None:
+            state = self.__engine.states(Population.from_samples(self.__letters, [sample]).perms)[0]
+
+        index = {c: i for i, c in enumerate(self.__letters)}
+        delta = self.__engine.swap(state, [(index[c1], index[c2]) for c1, c2 in swaps])
+
+        sample.swap(swaps)
+        sample.fitness_state = state
+        sample.set_score(state.fitness)
+        return delta
+
+    def __local_search(self, population: Population) -> Population:
+        if self.__batch_search is not None:
+            perms, scores = self.__batch_search.run(population.perms, population.scores, randint(0, 2 ** 31))
+            return Population(self.__letters, perms, scores)
+
+        if self.__parallel is not None:
+            perms, scores = self.__parallel.optimize(population.perms, 10, randint(0, 2 ** 31))
+            return Population(self.__letters, perms, scores)
 
-        for s, f in zip(samples, fitness_scores):
-            new_sample = s
-            temp: Sample = copy.deepcopy(s)
+        n_letters = len(self.__letters)
+        perms, scores = np.empty_like(population.perms), np.empty(len(population))
+        for k, state in enumerate(self.__engine.states(population.perms)):
             for _ in range(10):
-                mutation, swaps = self.__evolver.swap_mutation(temp.dec_map)
-                temp.swap(swaps)
+                self.__engine.swap(state, [sample(range(n_letters), 2)])
 
-            new_fitness = self.fitness([Sample(mutation)])[0]
+            perms[k] = state.perm
+            scores[k] = state.fitness
+
+        return Population(self.__letters, perms, scores)
+
+    def optimize(self, population: Population) -> Population:
+        if not len(population):
+            return population
+
+        # The batch search counts its own evaluations and only moves to better neighbours
+        batch = self.__batch_search is not None
+        if not batch:
+            self.fitness_calls += len(population)
+
+        with self.metrics.phase(Phase.LOCAL_SEARCH):
+            candidates = self.__local_search(population)
+
+        accepted = np.zeros(len(population), dtype=bool)
+        prev_fitness = 0
+        for k, (f, new_fitness) in enumerate(zip(population.scores.tolist(), candidates.scores.tolist())):
             # Accept mutation only if it is better
-            if new_fitness >= f and new_fitness > prev_fitness:
-                new_sample = temp
+            if (new_fitness > f) if batch else (new_fitness >= f and new_fitness > prev_fitness):
+                accepted[k] = True
                 prev_fitness = new_fitness
-            
-            optimized.append(new_sample)
-        
-        return optimized
+
+        perms = np.where(accepted[:, None], candidates.perms, population.perms)
+        scores = np.where(accepted, candidates.scores, population.scores)
+        return Population(self.__letters, perms, scores, population.dirty & ~accepted)
 
 
 class RegularStrategy(BaseStrategy):
-    def __init__(self, dictionary: Set[str], enc: str, enc_letters: List[str], unigram_freq: Dict[str, float], bigram_freq: Dict[str, float]) -> None:
-        super().__init__(dictionary, enc, enc_letters, unigram_freq, bigram_freq)
+    def __init__(self, dictionary: Set[str], enc: CipherStats, enc_letters: List[str], unigram_freq: Dict[str, float], bigram_freq: Dict[str, float], bigram_weight: float = 0.0, workers: int = 1, cache_size: int = 0, local_search: str = LocalSearchType.RANDOM, local_search_rounds: int = 1, fidelity: MultiFidelity = None) -> None:
+        super().__init__(dictionary, enc, enc_letters, unigram_freq, bigram_freq, bigram_weight, workers, cache_size, local_search, local_search_rounds, fidelity)
 
-    def activate(self, step_func: Callable[[List[Sample], List[float]], Tuple[List[Sample], List[float]]], samples: List[Sample], fitness_scores: List[float]) -> Tuple[List[Sample], List[float]]:
-        return step_func(samples, fitness_scores)
+    def activate(self, step_func: Callable[[Population, np.ndarray], Population], population: Population) -> Population:
+        return step_func(population, population.scores)
 
 
 class DarwinStrategy(BaseStrategy):
-    def __init__(self, dictionary: Set[str], enc: str, enc_letters: List[str], unigram_freq: Dict[str, float], bigram_freq: Dict[str, float]) -> None:
-        super().__init__(dictionary, enc, enc_letters, unigram_freq, bigram_freq)
+    def __init__(self, dictionary: Set[str], enc: CipherStats, enc_letters: List[str], unigram_freq: Dict[str, float], bigram_freq: Dict[str, float], bigram_weight: float = 0.0, workers: int = 1, cache_size: int = 0, local_search: str = LocalSearchType.RANDOM, local_search_rounds: int = 1, fidelity: MultiFidelity = None) -> None:
+        super().__init__(dictionary, enc, enc_letters, unigram_freq, bigram_freq, bigram_weight, workers, cache_size, local_search, local_search_rounds, fidelity)
 
-    def activate(self, step_func: Callable[[List[Sample], List[float]], Tuple[List[Sample], List[float]]], samples: List[Sample], fitness_scores: List[float]) -> Tuple[List[Sample], List[float]]:
-        optimized_samples = self.optimize(samples, fitness_scores)
-        optimized_fitness = self.fitness(optimized_samples)
-        samples, fitness_scores = step_func(samples, optimized_fitness)
-        return samples, fitness_scores
+    def activate(self, step_func: Callable[[Population, np.ndarray], Population], population: Population) -> Population:
+        return step_func(population, self.optimize(population).scores)
 
 
 class LamarckStrategy(BaseStrategy):
-    def __init__(self, dictionary: Set[str], enc: str, enc_letters: List[str], unigram_freq: Dict[str, float], bigram_freq: Dict[str, float]) -> None:
-        super().__init__(dictionary, enc, enc_letters, unigram_freq, bigram_freq)
-
-    def activate(self, step_func: Callable[[List[Sample], List[float]], Tuple[List[Sample], List[float]]], samples: List[Sample], fitness_scores: List[float]) -> Tuple[List[Sample], List[float]]:
-        optimized_samples = self.optimize(samples, fitness_scores)
-        optimized_fitness = self.fitness(optimized_samples)
-        samples, fitness_scores = step_func(optimized_samples, optimized_fitness)
-        return samples, fitness_scores
+    def __init__(self, dictionary: Set[str], enc: CipherStats, enc_letters: List[str], unigram_freq: Dict[str, float], bigram_freq: Dict[str, float], bigram_weight: float = 0.0, workers: int = 1, cache_size: int = 0, local_search: str = LocalSearchType.RANDOM, local_search_rounds: int = 1, fidelity: MultiFidelity = None) -> None:
+        super().__init__(dictionary, enc, enc_letters, unigram_freq, bigram_freq, bigram_weight, workers, cache_size, local_search, local_search_rounds, fidelity)
+
+    def activate(self, step_func: Callable[[Population, np.ndarray], Population], population: Population) -> Population:
+        optimized = self.optimize(population)
+        return step_func(optimized, optimized.scores)
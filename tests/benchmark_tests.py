@@ -0,0 +1,30 @@
+import unittest
+
+from src.benchmark import BenchmarkCase, compare, run_benchmarks, synthetic_cipher
+from src.files_parser import parse_dict
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_synthetic_cipher(self):
+        dictionary = [w for w in parse_dict('dict.txt') if w]
+        text = synthetic_cipher(dictionary, 1000, seed=3)
+
+        assert len(text) <= 1000 and len(text) > 950
+        assert text == synthetic_cipher(dictionary, 1000, seed=3)
+        assert text != synthetic_cipher(dictionary, 1000, seed=4)
+
+    def test_run_and_compare(self):
+        results = run_benchmarks(cipher_sizes=(1 << 10,), populations=(20,), repeats=1)
+        names = {r['name'] for r in results['results']}
+
+        assert BenchmarkCase.FITNESS in names and BenchmarkCase.GENERATION in names
+        assert BenchmarkCase.PMX_CROSSOVER in names and BenchmarkCase.SELECTION in names
+
+        slower = {'results': [dict(r, median_s=r['median_s'] * 2) for r in results['results']]}
+        assert not any(c['regressed'] for c in compare(results, results))
+        assert all(c['regressed'] for c in compare(slower, results))
+        assert all(not c['regressed'] for c in compare(results, slower))
+
+
+if __name__ == '__main__':
+    unittest.main()
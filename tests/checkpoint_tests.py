@@ -0,0 +1,106 @@
+import io
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import unittest
+import contextlib
+import numpy as np
+
+from src.benchmark import synthetic_corpus
+from src.checkpoint import Checkpointer
+from src.memory import ExactMemory
+from src.progress import ProgressObserver
+from src.simulator import SimulationArgs, Simulator
+from src.strategy import GeneticAlgorithmType
+
+
+class Interrupt(Exception):
+    pass
+
+
+class Recorder(ProgressObserver):
+    """
+    Keeps the best run's history, and interrupts the simulation at the given update.
+    """
+    def __init__(self, interrupt_at: int = 0) -> None:
+        self.interrupt_at = interrupt_at
+        self.updates = 0
+        self.best = None
+
+    def update(self, title: str, history) -> None:
+        self.updates += 1
+        if self.updates == self.interrupt_at:
+            raise Interrupt()
+
+    def finish(self, title: str, history) -> None:
+        self.best = list(history.best)
+
+
+class TestCheckpoint(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.corpus = synthetic_corpus(3000)
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+        self.path = os.path.join(self.dir, 'checkpoint.pkl')
+        self.args = SimulationArgs(1.0, 0.9, 0.2, 1e-3, 0.2, generation_tolerance=5, generation_tolerance_percentage=0.5,
+                                   fidelity_min_fraction=0.3)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir)
+
+    def run_multiple(self, observer: Recorder, checkpointer: Checkpointer = None, resume: bool = False) -> None:
+        simulator = Simulator(GeneticAlgorithmType.LAMARCK, 40, self.args, observer=observer, corpus=self.corpus,
+                              checkpointer=checkpointer)
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulator.run_multiple(3, resume=resume)
+
+    def test_resume_same_trajectory(self):
+        random.seed(1)
+        np.random.seed(1)
+        uninterrupted = Recorder()
+        self.run_multiple(uninterrupted)
+
+        random.seed(1)
+        np.random.seed(1)
+        with self.assertRaises(Interrupt):
+            self.run_multiple(Recorder(interrupt_at=12), Checkpointer(self.path, every_generations=3))
+        assert os.path.exists(self.path)
+
+        # The random state comes from the checkpoint
+        random.seed(2)
+        np.random.seed(2)
+        resumed = Recorder()
+        self.run_multiple(resumed, Checkpointer(self.path, every_generations=3), resume=True)
+
+        assert resumed.best == uninterrupted.best
+        assert not os.path.exists(self.path)
+
+    def test_other_configuration_is_refused(self):
+        with self.assertRaises(Interrupt):
+            self.run_multiple(Recorder(interrupt_at=5), Checkpointer(self.path, every_generations=1))
+
+        simulator = Simulator(GeneticAlgorithmType.DARWIN, 40, self.args, corpus=self.corpus,
+                              checkpointer=Checkpointer(self.path))
+        with self.assertRaises(ValueError):
+            simulator.run_multiple(3, resume=True)
+
+    def test_exact_memory_pickles_compactly(self):
+        memory = ExactMemory()
+        rows = np.argsort(np.random.random((1000, 26)), axis=1).astype(np.uint8)
+        memory.add_rows(rows)
+
+        data = pickle.dumps(memory)
+        restored = pickle.loads(data)
+        assert len(data) < 1000 * 26 + 1000
+        assert restored.contains_rows(rows).all() and len(restored) == len(memory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+from src.cipher_text import CipherStats, decode_chunks, stream_cipher_stats
+
+
+TEXTS = [
+    'you are great,\n\nof course  you are.\n\nand me',
+    '\n\n  Leading and trailing whitespace \t\n ',
+    'Line\r\nbreaks, punctuation... and   spaces',
+    'ünïcödé wörds ßplit across chunks',
+    '',
+    ' \n ',
+]
+
+
+class TestCipherText(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'enc.txt')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, text: str):
+        with open(self.path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+
+    def test_stream_matches_whole_text(self):
+        with open('enc.txt', encoding='utf-8') as f:
+            texts = TEXTS + [f.read()]
+
+        for text in texts:
+            self.write(text)
+            expected = CipherStats.from_text(text.lower()).words_count
+            for chunk_size in (1, 2, 3, 7, 64, 1 << 20):
+                assert stream_cipher_stats(self.path, chunk_size).words_count == expected, (text, chunk_size)
+
+    def test_decode_chunks(self):
+        self.write('Abc\r\nba, c')
+        dec_map = {ord('a'): ord('b'), ord('b'): ord('a')}
+
+        assert ''.join(decode_chunks(self.path, dec_map, chunk_size=2)) == 'bac\r\nab, c'
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.corpus import load_corpus
+
+
+SOURCES = ['enc.txt', 'dict.txt', 'Letter_Freq.txt', 'Letter2_Freq.txt']
+
+
+class TestCorpus(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for name in SOURCES:
+            shutil.copy(name, self.dir)
+        self.paths = [os.path.join(self.dir, name) for name in SOURCES]
+        self.cache_path = os.path.join(self.dir, 'corpus.pkl')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def load(self):
+        return load_corpus(*self.paths, cache_path=self.cache_path)
+
+    def test_cache_matches_parsing(self):
+        parsed = load_corpus(*self.paths, cache_path=None)
+        self.load()
+        cached = self.load()
+
+        assert os.path.exists(self.cache_path)
+        assert cached.cipher.words_count == parsed.cipher.words_count
+        assert cached.dictionary == parsed.dictionary
+        assert cached.unigram_freq == parsed.unigram_freq
+        assert cached.bigram_freq == parsed.bigram_freq
+
+    def test_cache_invalidated_by_content(self):
+        self.load()
+        dict_path = self.paths[1]
+
+        # A new mtime with the same content keeps the cache
+        os.utime(dict_path, ns=(0, 0))
+        assert 'zzzz' not in self.load().dictionary
+
+        with open(dict_path, 'a', encoding='utf-8') as f:
+            f.write('zzzz\n')
+        assert 'zzzz' in self.load().dictionary
+
+
+if __name__ == '__main__':
+    unittest.main()
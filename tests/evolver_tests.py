@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+from string import ascii_lowercase
+
+from src.evolver import Evolver
+from src.generator import generate_random, is_valid
+
+
+LETTERS = list(ascii_lowercase)
+
+
+def random_perms(n: int) -> np.ndarray:
+    return np.argsort(np.random.random((n, len(LETTERS))), axis=1).astype(np.uint8)
+
+
+def is_permutation(perms: np.ndarray) -> bool:
+    return bool((np.sort(perms, axis=1) == np.arange(len(LETTERS))).all())
+
+
+class TestEvolver(unittest.TestCase):
+    def setUp(self):
+        self.evolver = Evolver(LETTERS)
+        self.p1, self.p2 = random_perms(500), random_perms(500)
+
+    def test_batch_crossovers_are_valid(self):
+        for children in (self.evolver.batch_pmx_crossover(self.p1, self.p2),
+                         self.evolver.batch_order_crossover(self.p1, self.p2),
+                         self.evolver.batch_one_point_crossover(self.p1, self.p2)):
+            assert children.shape == self.p1.shape
+            assert is_permutation(children)
+
+    def test_batch_pmx_keeps_parents_positions(self):
+        children = self.evolver.batch_pmx_crossover(self.p1, self.p2)
+        # Every position comes from one of the parents unless it was mapped out of p1's segment
+        assert ((children == self.p1) | (children == self.p2)).mean() > 0.8
+
+    def test_batch_one_point_matches_repair(self):
+        children = self.evolver.batch_one_point_crossover(self.p1, self.p2)
+        for p1, p2, child in zip(self.p1, self.p2, children):
+            # The child starts with a prefix of p1, then takes p2's values that are not in that prefix
+            i = int(np.argmin(np.append(child == p1, False)))
+            assert i >= 1
+            assert all(child[j] == p2[j] for j in range(i, len(LETTERS)) if p2[j] not in p1[:i])
+
+    def test_batch_mutations_are_valid(self):
+        swapped = self.evolver.batch_swap_mutation(self.p1)
+        assert is_permutation(swapped)
+        assert ((swapped != self.p1).sum(axis=1) == 2).all()
+        assert is_permutation(self.evolver.batch_scramble_mutation(self.p1))
+
+    def test_generate_valid_crossover(self):
+        samples = generate_random(LETTERS, 10)
+        for _ in range(20):
+            co1, co2 = self.evolver.generate_valid_crossover(samples, [1.0] * len(samples))
+            assert is_valid(co1) and is_valid(co2)
+            assert len(co1) == len(co2) == len(LETTERS)
+
+
+if __name__ == '__main__':
+    unittest.main()
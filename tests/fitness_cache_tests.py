@@ -0,0 +1,23 @@
+import unittest
+
+from src.fitness_cache import FitnessCache
+
+
+class TestFitnessCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = FitnessCache(2)
+        cache.put(b'a', 0.1)
+        cache.put(b'b', 0.2)
+
+        # Reading 'a' makes 'b' the least recently used entry
+        assert cache.get(b'a') == 0.1
+        cache.put(b'c', 0.3)
+
+        assert len(cache) == 2
+        assert cache.get(b'b') is None
+        assert cache.get(b'a') == 0.1
+        assert cache.get(b'c') == 0.3
+
+
+if __name__ == '__main__':
+    unittest.main()
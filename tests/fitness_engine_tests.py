@@ -0,0 +1,104 @@
+import unittest
+import numpy as np
+
+from src.cipher_text import clean_text
+from src.decoder import Decoder
+from src.fitness import MSE, NMSE, abs_diff, bigrams_matrix, check_words_in_dict_ratio, count_bigrams, letters_freq_ratio, \
+    minus_freq_diff
+from src.fitness_engine import FitnessEngine
+from src.generator import generate_random
+from tests.fixtures import BIGRAM_FREQ, DICTIONARY, ENC, LETTERS, UNIGRAM_FREQ
+
+
+def reference_fitness(sample) -> float:
+    dec = clean_text(Decoder.decode_words(ENC, sample.dec_map_int))
+    words = dec.split(' ')
+    return (check_words_in_dict_ratio(words, DICTIONARY) * 9 + letters_freq_ratio(dec, UNIGRAM_FREQ, minus_freq_diff)) / 10
+
+
+class TestFitnessEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = FitnessEngine(DICTIONARY, ENC, LETTERS, UNIGRAM_FREQ)
+
+    def test_identity_dict_words(self):
+        perms = np.arange(len(LETTERS), dtype=np.uint8)[None]
+
+        found = self.engine.words_in_dict(perms)
+        # Line breaks are removed without a space, so 'greatof' and 'areand' are not dictionary words
+        assert found.shape == (1, 7)
+        assert found.sum() == 5
+        self.assertAlmostEqual(self.engine.words_in_dict_ratio(perms)[0], 6 / 8)
+
+    def test_matches_reference(self):
+        samples = generate_random(LETTERS, 50)
+        scores = self.engine.fitness(self.engine.encode(samples))
+
+        for s, score in zip(samples, scores):
+            self.assertAlmostEqual(score, reference_fitness(s), places=12)
+
+    def test_unigram_measures_match_reference(self):
+        samples = generate_random(LETTERS, 20)
+
+        for measure in [minus_freq_diff, MSE, NMSE, abs_diff]:
+            engine = FitnessEngine(DICTIONARY, ENC, LETTERS, UNIGRAM_FREQ, unigram_measure=measure)
+            scores = engine.letters_freq_ratio(engine.encode(samples))
+
+            for s, score in zip(samples, scores):
+                dec = clean_text(Decoder.decode_words(ENC, s.dec_map_int))
+                self.assertAlmostEqual(score, letters_freq_ratio(dec, UNIGRAM_FREQ, measure), places=12)
+
+    def test_bigrams_match_decoded_text(self):
+        engine = FitnessEngine(DICTIONARY, ENC, LETTERS, UNIGRAM_FREQ, BIGRAM_FREQ, bigram_weight=0.5)
+        samples = generate_random(LETTERS, 20)
+        scores = engine.bigrams_freq_ratio(engine.encode(samples))
+        corpus_freq = bigrams_matrix(BIGRAM_FREQ, LETTERS)
+
+        for s, score in zip(samples, scores):
+            dec = clean_text(Decoder.decode_words(ENC, s.dec_map_int))
+            count = count_bigrams(dec.split(' '), LETTERS)
+            expected = 1 - np.abs(count / count.sum() - corpus_freq).sum() / 2
+            self.assertAlmostEqual(score, expected, places=12)
+
+    def test_zero_bigram_weight_keeps_scores(self):
+        engine = FitnessEngine(DICTIONARY, ENC, LETTERS, UNIGRAM_FREQ, BIGRAM_FREQ, bigram_weight=0.0)
+        samples = generate_random(LETTERS, 20)
+
+        assert engine.fitness(engine.encode(samples)).tolist() == self.engine.fitness(self.engine.encode(samples)).tolist()
+
+    def test_swap_matches_full_fitness(self):
+        engine = FitnessEngine(DICTIONARY, ENC, LETTERS, UNIGRAM_FREQ, BIGRAM_FREQ, bigram_weight=0.5)
+        perms = engine.encode(generate_random(LETTERS, 10))
+
+        for state in engine.states(perms):
+            for i, j in [(0, 4), (14, 20), (24, 0), (3, 3)]:
+                prev = state.fitness
+                delta = engine.swap(state, [(i, j)])
+
+                self.assertAlmostEqual(state.fitness, engine.fitness(state.perm[None])[0], places=12)
+                self.assertAlmostEqual(delta, state.fitness - prev, places=12)
+
+    def test_swap_chain_matches_full_fitness(self):
+        rng = np.random.default_rng(3)
+        for measure in (minus_freq_diff, MSE, NMSE, abs_diff):
+            for bigram_weight in (0.0, 0.3):
+                engine = FitnessEngine(DICTIONARY, ENC, LETTERS, UNIGRAM_FREQ, BIGRAM_FREQ, bigram_weight=bigram_weight,
+                                       unigram_measure=measure)
+                state = engine.states(engine.encode(generate_random(LETTERS, 1)))[0]
+                for _ in range(200):
+                    engine.swap(state, [tuple(rng.choice(len(LETTERS), 2, replace=False))])
+
+                full = engine.fitness(state.perm[None])[0]
+                self.assertAlmostEqual(state.fitness, full, places=9)
+
+    def test_stratified_words(self):
+        perms = self.engine.encode(generate_random(LETTERS, 10))
+        small, large = self.engine.stratified_words(0.3), self.engine.stratified_words(0.7)
+        every = self.engine.stratified_words(1.0)
+
+        assert set(small) <= set(large)
+        assert len(every) == self.engine.n_unique_words
+        assert self.engine.fitness(perms, every).tolist() == self.engine.fitness(perms).tolist()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,14 +9,14 @@ class TestFitness(unittest.TestCase):
         d = ['of', 'course', 'I', 'am', 'great', 'I', 'am', 'you', 'and', 'you', 'are', 'me']
 
         res = check_words_in_dict_ratio(dec, d)
-        assert res == 100
+        assert res == 1
 
     def test_fitness_50(self):
         dec = ['you', 'are', 'great', 'also']
         d = ['of', 'course', 'I', 'am', 'great', 'I', 'am', 'you']
 
         res = check_words_in_dict_ratio(dec, d)
-        assert res == 50
+        assert res == 0.5
 
     def test_fitness_0(self):
         dec = ['you', 'are', 'great', 'also']
@@ -26,16 +26,16 @@ class TestFitness(unittest.TestCase):
         assert res == 0
 
     def test_MSE_not_0(self):
-        d_f = {'a': 0.3, 'b': 0.01}
+        dec = 'aab ab'
         c_f = {'a': 0.2, 'b': 0.4}
 
-        assert letters_freq_ratio(d_f, c_f, MSE) != 0
+        assert letters_freq_ratio(dec, c_f, MSE) != 0
 
     def test_MSE_0(self):
-        d_f = {'a': 0.2, 'b': 0.4}
-        c_f = {'a': 0.2, 'b': 0.4}
+        dec = 'abb b ab'
+        c_f = {'a': 1 / 3, 'b': 2 / 3}
 
-        assert letters_freq_ratio(d_f, c_f, MSE) == 0
+        self.assertAlmostEqual(letters_freq_ratio(dec, c_f, MSE), 0)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,8 @@
+from string import ascii_lowercase
+
+
+LETTERS = list(ascii_lowercase)
+UNIGRAM_FREQ = {c: (i + 1) / 351 for i, c in enumerate(LETTERS)}
+BIGRAM_FREQ = {c1 + c2: (i + j + 1) / 676 for i, c1 in enumerate(LETTERS) for j, c2 in enumerate(LETTERS)}
+DICTIONARY = {'', 'you', 'are', 'great', 'of', 'course', 'and', 'me'}
+ENC = 'you are great,\n\nof course  you are.\n\nand me'
@@ -1,17 +1,27 @@
 import unittest
 
-from generator import Sample, Generator
+from src.evolver import Evolver
+from src.generator import generate_random, is_valid
+from src.sample import Sample
 
 
 class GeneratorTests(unittest.TestCase):
+    def test_generate_random(self):
+        samples = generate_random(['a', 'b', 'c'], 5)
+
+        assert len(samples) == 5
+        assert all(is_valid(s.decode_string) for s in samples)
+
     def test_mutation(self):
-        s1 = Sample(['a', 'b'])
-        s1.dec_map = {'a': 'b', 'b': 'a'}
+        s1 = Sample(['a', 'b'], decode_letters='ba')
         s1_map = s1.dec_map.copy()
 
-        g = Generator(['a', 'b'], 2)
+        mutation, swaps = Evolver(['a', 'b']).swap_mutation(s1.dec_map)
+        s1.swap(swaps)
 
-        s2 = g.generate_mutation(s1)
+        assert mutation == 'ab'
+        assert s1.dec_map != s1_map
 
-        assert s2.dec_map != s1_map
 
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import os
+import json
+import shutil
+import asyncio
+import tempfile
+import unittest
+
+from src.benchmark import synthetic_cipher
+from src.corpus import load_language
+from src.files_parser import parse_dict
+from src.job_server import Job, JobEvent, JobServer
+
+
+ARGS = {'generation_tolerance': 3, 'generation_tolerance_percentage': 1}
+
+
+class TestJobServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.language = load_language()
+        cls.cipher = synthetic_cipher([w for w in parse_dict('dict.txt') if w], 2000, seed=5)
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.jobs_dir = os.path.join(self.dir, 'jobs')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_job_arguments(self):
+        job = Job.from_json({'cipher': 'abc', 'algorithm': 'lamarck', 'args': {'bigram_weight': 0.5}})
+
+        assert job.args['bigram_weight'] == 0.5 and job.args['fitness_goal'] == 0.99
+        with self.assertRaises(TypeError):
+            Job.from_json({'cipher': 'abc', 'args': {'unknown': 1}})
+        with self.assertRaises(ValueError):
+            Job.from_json({'population': 10})
+        for job_id in ('', '.', '..', '../victim', '/', 'a/b', '.hidden'):
+            with self.assertRaises(ValueError):
+                Job.from_json({'cipher': 'abc', 'id': job_id})
+        assert Job.from_json({'cipher': 'abc', 'id': 'text.v2'}).id == 'text.v2'
+
+    def test_socket(self):
+        async def run():
+            path = os.path.join(self.dir, 'server.sock')
+            async with JobServer(self.language, 2, self.jobs_dir) as server:
+                socket_server = await server.serve_socket(path)
+                reader, writer = await asyncio.open_unix_connection(path)
+                for i in range(2):
+                    job = {'id': f'job{i}', 'cipher': self.cipher, 'population': 30, 'seed': i, 'args': ARGS}
+                    writer.write(json.dumps(job).encode('utf-8') + b'\n')
+                writer.write(b'{"population": 30}\n')
+                writer.write_eof()
+
+                events = []
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    events.append(json.loads(line))
+                socket_server.close()
+            return events
+
+        events = asyncio.run(run())
+        for job_id in ('job0', 'job1'):
+            job_events = [e['event'] for e in events if e.get('job') == job_id]
+            assert job_events[0] == JobEvent.QUEUED and job_events[-1] == JobEvent.DONE
+            assert JobEvent.PROGRESS in job_events
+
+        done = [e for e in events if e['event'] == JobEvent.DONE]
+        assert all(len(e['perm'].splitlines()) == 26 and len(e['plain']) == len(self.cipher) for e in done)
+        assert sum(e['event'] == JobEvent.ERROR for e in events) == 1
+        assert not os.listdir(self.jobs_dir)
+
+    def test_traversal_id_touches_nothing(self):
+        victim = os.path.join(self.dir, 'victim')
+        os.makedirs(victim)
+        with open(os.path.join(victim, 'keep.txt'), 'w') as f:
+            f.write('keep')
+
+        async def run():
+            path = os.path.join(self.dir, 'server.sock')
+            async with JobServer(self.language, 1, self.jobs_dir) as server:
+                socket_server = await server.serve_socket(path)
+                reader, writer = await asyncio.open_unix_connection(path)
+                for job_id in ('../victim', '/', '.', ''):
+                    job = {'id': job_id, 'cipher': self.cipher, 'population': 30, 'args': ARGS}
+                    writer.write(json.dumps(job).encode('utf-8') + b'\n')
+                writer.write_eof()
+                events = [json.loads(line) for line in (await reader.read()).splitlines()]
+                socket_server.close()
+            return events
+
+        events = asyncio.run(run())
+        assert [e['event'] for e in events] == [JobEvent.ERROR] * 4
+        assert os.listdir(victim) == ['keep.txt']
+        assert sorted(os.listdir(self.dir)) == ['server.sock', 'victim']
+
+    def test_spool(self):
+        spool_dir = os.path.join(self.dir, 'spool')
+        os.makedirs(spool_dir)
+        with open(os.path.join(spool_dir, 'text.json'), 'w') as f:
+            json.dump({'id': 'other', 'cipher': self.cipher, 'population': 30, 'args': ARGS}, f)
+
+        async def run():
+            async with JobServer(self.language, 1, self.jobs_dir) as server:
+                stop = asyncio.Event()
+                watcher = asyncio.ensure_future(server.watch_spool(spool_dir, interval=0.05, stop=stop))
+                while not os.path.exists(os.path.join(spool_dir, 'done', 'text.json')):
+                    await asyncio.sleep(0.05)
+                stop.set()
+                await watcher
+
+        asyncio.run(run())
+        done_dir = os.path.join(spool_dir, 'done')
+        assert sorted(os.listdir(done_dir)) == ['text.json', 'text.jsonl', 'text.perm.txt', 'text.plain.txt']
+        with open(os.path.join(done_dir, 'text.jsonl')) as f:
+            events = [json.loads(line) for line in f]
+        assert events[-1]['event'] == JobEvent.DONE
+        assert all(e['job'] == 'text' for e in events)
+
+    def test_spool_errors(self):
+        spool_dir = os.path.join(self.dir, 'spool')
+        os.makedirs(spool_dir)
+        with open(os.path.join(spool_dir, 'broken.json'), 'w') as f:
+            f.write('{"cipher": ')
+        with open(os.path.join(spool_dir, 'unknown.json'), 'w') as f:
+            json.dump({'cipher': self.cipher, 'args': {'unknown': 1}}, f)
+
+        async def run():
+            async with JobServer(self.language, 1, self.jobs_dir) as server:
+                stop = asyncio.Event()
+                watcher = asyncio.ensure_future(server.watch_spool(spool_dir, interval=0.05, stop=stop))
+                while not all(os.path.exists(os.path.join(spool_dir, 'done', f'{stem}.json'))
+                              for stem in ('broken', 'unknown')):
+                    await asyncio.sleep(0.05)
+                stop.set()
+                await watcher
+
+        asyncio.run(run())
+        for stem, error in (('broken', 'JSONDecodeError'), ('unknown', 'TypeError')):
+            with open(os.path.join(spool_dir, 'done', f'{stem}.jsonl')) as f:
+                event = json.loads(f.read())
+            assert event['job'] == stem and event['event'] == JobEvent.ERROR
+            assert event['error'].startswith(error)
+        assert os.listdir(spool_dir) == ['done']
+
+
+if __name__ == '__main__':
+    unittest.main()
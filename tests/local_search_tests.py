@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+
+from src.fitness_engine import FitnessEngine
+from src.generator import generate_random
+from src.local_search import BatchLocalSearch, LocalSearchType, neighbours, pair_swaps
+from tests.fixtures import DICTIONARY, ENC, LETTERS, UNIGRAM_FREQ
+
+
+class TestLocalSearch(unittest.TestCase):
+    def setUp(self):
+        self.engine = FitnessEngine(DICTIONARY, ENC, LETTERS, UNIGRAM_FREQ)
+        self.perms = self.engine.encode(generate_random(LETTERS, 6))
+        self.scores = self.engine.fitness(self.perms)
+
+    def test_neighbours(self):
+        swaps = pair_swaps(len(LETTERS))
+        candidates = neighbours(self.perms, swaps)
+
+        assert swaps.shape == (325, 2)
+        assert candidates.shape == (6, 325, len(LETTERS))
+        k, (a, b) = 100, swaps[100]
+        expected = self.perms[2].copy()
+        expected[[a, b]] = expected[[b, a]]
+        assert (candidates[2, k] == expected).all()
+
+    def test_steepest_takes_best_swap(self):
+        search = BatchLocalSearch(self.engine.fitness, len(LETTERS), LocalSearchType.STEEPEST, 1)
+        perms, scores = search.run(self.perms, self.scores)
+
+        candidates = neighbours(self.perms, pair_swaps(len(LETTERS)))
+        best = self.engine.fitness(candidates.reshape(-1, len(LETTERS))).reshape(6, -1).max(axis=1)
+        assert np.allclose(scores, np.maximum(best, self.scores))
+        assert np.allclose(scores, self.engine.fitness(perms))
+
+    def test_first_improves(self):
+        search = BatchLocalSearch(self.engine.fitness, len(LETTERS), LocalSearchType.FIRST, 3)
+        perms, scores = search.run(self.perms, self.scores, seed=1)
+
+        assert (scores >= self.scores).all()
+        assert (scores > self.scores).any()
+        assert np.allclose(scores, self.engine.fitness(perms))
+
+
+if __name__ == '__main__':
+    unittest.main()
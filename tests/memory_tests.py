@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+from random import shuffle
+from string import ascii_lowercase
+from unittest import mock
+
+from src.memory import Memory, MemoryBackend
+
+
+LETTERS = list(ascii_lowercase)
+
+
+def random_permutations(n: int):
+    letters = LETTERS[:]
+    for _ in range(n):
+        shuffle(letters)
+        yield ''.join(letters)
+
+
+class TestMemory(unittest.TestCase):
+    def test_exact(self):
+        memory = Memory(MemoryBackend.EXACT, letters=LETTERS)
+        memory.add('bacdefghijklmnopqrstuvwxyz')
+
+        assert 'bacdefghijklmnopqrstuvwxyz' in memory
+        assert bytes([1, 0] + list(range(2, 26))) in memory
+        assert 'abcdefghijklmnopqrstuvwxyz' not in memory
+
+    def test_strings_need_letters(self):
+        memory = Memory(MemoryBackend.EXACT)
+        memory.add(bytes([1, 0, 2]))
+
+        assert bytes([1, 0, 2]) in memory
+        with self.assertRaises(ValueError):
+            memory.add('bac')
+
+    def test_bloom_has_no_false_negatives(self):
+        memory = Memory(MemoryBackend.BLOOM, capacity=1000, false_positive_rate=0.01, letters=LETTERS)
+        records = list(random_permutations(1000))
+        for r in records:
+            memory.add(r)
+
+        assert all(r in memory for r in records)
+        false_positives = sum(r in memory for r in random_permutations(2000))
+        assert false_positives < 100
+
+    def test_add_new_rows(self):
+        for backend in (MemoryBackend.EXACT, MemoryBackend.BLOOM):
+            memory = Memory(backend, capacity=1000, false_positive_rate=0.001)
+            rows = np.array([[0, 1, 2], [1, 0, 2], [0, 1, 2]], dtype=np.uint8)
+            memory.add(bytes([1, 0, 2]))
+
+            assert memory.add_new(rows).tolist() == [True, False, False]
+            assert not memory.add_new(rows[:1]).any()
+            assert bytes([0, 1, 2]) in memory
+
+    def test_batch_dedup_ignores_hash_collisions(self):
+        memory = Memory(MemoryBackend.EXACT)
+        rows = np.array([[0, 1, 2], [1, 0, 2], [0, 1, 2], [2, 1, 0]], dtype=np.uint8)
+
+        # Every row hashes the same, yet only the exact repeat is dropped
+        with mock.patch('src.memory.hash_rows', lambda r, seed=0: np.zeros(len(r), dtype=np.uint64)):
+            assert memory.add_new(rows).tolist() == [True, True, False, True]
+
+    def test_rows_found_by_string(self):
+        for backend in (MemoryBackend.EXACT, MemoryBackend.BLOOM):
+            memory = Memory(backend, capacity=1000, false_positive_rate=0.001, letters=LETTERS)
+            strings = list(random_permutations(20))
+            rows = np.array([[LETTERS.index(c) for c in s] for s in strings], dtype=np.uint8)
+
+            assert memory.add_new(rows).all()
+            assert all(s in memory for s in strings)
+            memory.add('abcdefghijklmnopqrstuvwxyz')
+            assert not memory.add_new(np.arange(26, dtype=np.uint8)[None]).any()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from src.benchmark import synthetic_corpus
+from src.metrics import Count, JsonlMetrics, Metrics, MetricsType, Phase, PrometheusMetrics, get_metrics
+from src.simulator import SimulationArgs, Simulator
+from src.strategy import GeneticAlgorithmType
+
+
+COUNTERS = {'fitness_calls': 10}
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_disabled(self):
+        metrics = get_metrics(MetricsType.NONE)
+
+        assert type(metrics) is Metrics
+        with metrics.phase(Phase.FITNESS):
+            pass
+        assert metrics.phase(Phase.FITNESS) is metrics.phase(Phase.SELECTION)
+
+    def test_jsonl_records(self):
+        path = os.path.join(self.dir, 'metrics.jsonl')
+        metrics = JsonlMetrics(path)
+        metrics.start_run(1, COUNTERS)
+        for generation in range(3):
+            with metrics.phase(Phase.CROSSOVER):
+                metrics.count(Count.DEDUP_REJECTIONS, 2)
+            with metrics.phase(Phase.FITNESS):
+                pass
+            metrics.end_generation(generation, [0.1, 0.5], {'fitness_calls': 10 + 4 * (generation + 1)})
+        metrics.close()
+
+        with open(path) as f:
+            records = [json.loads(line) for line in f]
+        assert [r['generation'] for r in records] == [0, 1, 2]
+        assert records[1]['counts'] == {'fitness_calls': 4, Count.DEDUP_REJECTIONS: 2}
+        assert records[1]['phases'][Phase.CROSSOVER]['calls'] == 1
+        assert records[2]['best'] == 0.5 and records[2]['worst'] == 0.1
+        assert records[2]['generations_per_second'] > 0
+
+    def test_prometheus_totals(self):
+        path = os.path.join(self.dir, 'metrics.prom')
+        metrics = PrometheusMetrics(path)
+        metrics.start_run(1, COUNTERS)
+        for generation in range(2):
+            with metrics.phase(Phase.MUTATION):
+                metrics.count(Count.DEDUP_REJECTIONS, 3)
+            metrics.end_generation(generation, [0.2], {'fitness_calls': 10 + 5 * (generation + 1)})
+
+        with open(path) as f:
+            lines = f.read().splitlines()
+        assert 'genetic_generations_total 2' in lines
+        assert 'genetic_fitness_calls_total 10' in lines
+        assert 'genetic_dedup_rejections_total 6' in lines
+        assert 'genetic_phase_calls_total{phase="mutation"} 2' in lines
+        assert 'genetic_generation 1' in lines
+
+    def test_simulator_phases(self):
+        path = os.path.join(self.dir, 'metrics.jsonl')
+        metrics = JsonlMetrics(path)
+        args = SimulationArgs(1.0, elite_percentile=0.9, mutation_percentage=0.2, mutation_decay=1e-3,
+                              mutation_min_percentage=0.2, generation_tolerance=3, generation_tolerance_percentage=1)
+        simulator = Simulator(GeneticAlgorithmType.DARWIN, 30, args, corpus=synthetic_corpus(2000), metrics=metrics)
+        simulator.run(1, fitness_goals={0: 0.0}, plot=False)
+        metrics.close()
+
+        with open(path) as f:
+            records = [json.loads(line) for line in f]
+        assert records
+        assert set(records[-1]['phases']) == {Phase.SELECTION, Phase.CROSSOVER, Phase.MUTATION,
+                                              Phase.LOCAL_SEARCH, Phase.FITNESS}
+        assert sum(r['counts']['fitness_calls'] for r in records) == simulator.counters['fitness_calls']
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import queue
+import threading
+import unittest
+from string import ascii_lowercase
+
+from src.generator import generate_random
+from src.migration import Migration, MigrationTopology, migration_targets
+from src.population import Population
+
+
+LETTERS = list(ascii_lowercase)
+
+
+def population(score: float, n: int = 6):
+    # The best individual of a population is scored as its island and epoch
+    return Population(LETTERS, Population.from_samples(LETTERS, generate_random(LETTERS, n)).perms,
+                      [0.0] * (n - 1) + [score])
+
+
+class TestMigration(unittest.TestCase):
+    def test_ring_targets(self):
+        assert migration_targets(4, MigrationTopology.RING, 1, 0) == [1, 2, 3, 0]
+
+    def test_random_targets_are_a_cycle(self):
+        for epoch in range(20):
+            targets = migration_targets(5, MigrationTopology.RANDOM, epoch, 7)
+
+            # Every island sends to another island and receives exactly once
+            assert sorted(targets) == list(range(5))
+            assert all(t != i for i, t in enumerate(targets))
+            assert targets == migration_targets(5, MigrationTopology.RANDOM, epoch, 7)
+
+    def test_two_islands_exchange(self):
+        inboxes = [queue.Queue(), queue.Queue()]
+        stop_event = threading.Event()
+        received = [[], []]
+
+        def island(i: int) -> None:
+            migration = Migration(i, inboxes, LETTERS, interval=2, size=1, topology=MigrationTopology.RANDOM,
+                                  seed=3, stop_event=stop_event)
+            for step in range(8):
+                migrated = migration(step, population(10 * (i + 1) + (step + 1) // 2))
+                if (step + 1) % 2 == 0:
+                    # The worst individual was replaced by the other island's best
+                    received[i].append(migrated.scores[0])
+                    assert not migrated.dirty[0]
+
+        threads = [threading.Thread(target=island, args=(i,)) for i in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+
+        assert received[0] == [21, 22, 23, 24]
+        assert received[1] == [11, 12, 13, 14]
+
+    def test_finished_island_is_not_waited_for(self):
+        inboxes = [queue.Queue(), queue.Queue()]
+        stop_event = threading.Event()
+        received = [[], []]
+
+        def island(i: int, steps: int) -> None:
+            migration = Migration(i, inboxes, LETTERS, interval=2, size=1, topology=MigrationTopology.RING, seed=0,
+                                  stop_event=stop_event)
+            for step in range(steps):
+                migrated = migration(step, population(10 * (i + 1) + (step + 1) // 2))
+                if (step + 1) % 2 == 0:
+                    received[i].append(migrated.scores[0])
+            migration.finish()
+
+        # The first island stops after one migration, the second one runs on alone
+        threads = [threading.Thread(target=island, args=(i, steps)) for i, steps in enumerate((2, 8))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+
+        assert not any(t.is_alive() for t in threads)
+        assert not stop_event.is_set()
+        assert received[0] == [21]
+        assert received[1] == [11, 0.0, 0.0, 0.0]
+
+    def test_early_migrants_wait_for_their_epoch(self):
+        inboxes = [queue.Queue(), queue.Queue()]
+        migration = Migration(0, inboxes, LETTERS, interval=2, size=1, topology=MigrationTopology.RING, seed=0,
+                              stop_event=threading.Event())
+        perm = population(0.5, 1).perms[0].tobytes()
+        inboxes[0].put((2, 1, [(perm, 2.0)]))
+        inboxes[0].put((1, 1, [(perm, 1.0)]))
+
+        assert migration(1, population(0.1)).scores[0] == 1.0
+        migrated = migration(3, population(0.1))
+        assert migrated.scores[0] == 2.0
+        assert migrated.perms[0].tobytes() == perm
+        assert inboxes[1].qsize() == 2
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+import numpy as np
+
+from src.multi_fidelity import MultiFidelity
+
+
+class TestMultiFidelity(unittest.TestCase):
+    def test_fraction_grows_with_fitness(self):
+        fidelity = MultiFidelity(0.9, min_fraction=0.2)
+        fractions = [fidelity.fraction(f) for f in (0.0, 0.3, 0.6, 0.95)]
+
+        assert fractions == sorted(fractions)
+        assert fractions[0] == 0.2 and fractions[-1] == 1.0
+
+    def test_candidates_could_be_elites(self):
+        fidelity = MultiFidelity(0.8, margin=0.05)
+        known = np.array([0.9, 0.5, 0.4, 0.3, 0.2, 0.1])
+        cheap = np.array([0.95, 0.87, 0.5, 0.0])
+
+        # The elite set is the top 2 of 10, the cheap 0.95 and the known 0.9
+        assert fidelity.candidates(cheap, known).tolist() == [True, True, False, False]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+
+from src.operator_bandit import OperatorBandit
+from src.scheduler import StagnationScheduler
+
+
+class TestOperatorBandit(unittest.TestCase):
+    def test_allocate(self):
+        bandit = OperatorBandit(['a', 'b', 'c'])
+        for n in (0, 1, 10, 301):
+            counts = bandit.allocate(n)
+            assert counts.sum() == n
+            assert counts.max() - counts.min() <= 1
+        assert OperatorBandit(['a']).allocate(7).tolist() == [7]
+        with self.assertRaises(ValueError):
+            OperatorBandit(['a', 'b', 'c'], min_share=0.5)
+
+    def test_pursues_best_rate(self):
+        bandit = OperatorBandit(['a', 'b'], min_share=0.1)
+        arms = np.array([0] * 50 + [1] * 50 + [-1] * 10)
+        gains = np.array([0.01] * 50 + [0.02] * 50 + [1.0] * 10)
+        for _ in range(30):
+            bandit.spend(0, 0.1)
+            bandit.spend(1, 0.1)
+            bandit.update(arms, gains, seconds_per_child=0.001)
+
+        assert abs(bandit.shares['b'] - 0.9) < 1e-3 and abs(bandit.shares['a'] - 0.1) < 1e-3
+        assert bandit.allocate(100).tolist() == [10, 90]
+
+        # A costlier arm loses to a cheaper one with the same gains
+        for _ in range(30):
+            bandit.spend(0, 0.1)
+            bandit.spend(1, 10.0)
+            bandit.update(arms, np.where(arms >= 0, 0.01, 0.0))
+        assert bandit.shares['a'] > 0.85
+
+
+class TestStagnationScheduler(unittest.TestCase):
+    def test_boost_on_stagnation(self):
+        scheduler = StagnationScheduler(0.2, decay=0.0, min_val=0.1, threshold=0.1, boost=2.0, max_val=0.9)
+        assert scheduler.calculate(0) == 0.2
+
+        scheduler.observe(0.05)
+        assert abs(scheduler.calculate(0) - 0.4) < 1e-9
+        for _ in range(10):
+            scheduler.observe(0.0)
+        assert scheduler.calculate(0) == 0.9
+
+        scheduler.observe(1.0)
+        assert scheduler.calculate(0) == 0.2
+        scheduler.observe(0.0)
+        scheduler.reset()
+        assert scheduler.calculate(0) == 0.2
+
+
+if __name__ == '__main__':
+    unittest.main()
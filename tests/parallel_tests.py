@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+
+from src.fitness_engine import FitnessEngine
+from src.generator import generate_random
+from src.parallel import ParallelEvaluator
+from tests.fixtures import DICTIONARY, ENC, LETTERS, UNIGRAM_FREQ
+
+
+class TestParallelEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.engine = FitnessEngine(DICTIONARY, ENC, LETTERS, UNIGRAM_FREQ)
+        self.evaluator = ParallelEvaluator(self.engine, workers=2)
+
+    def tearDown(self):
+        self.evaluator.close()
+
+    def test_fitness_matches_engine(self):
+        perms = self.engine.encode(generate_random(LETTERS, 33))
+
+        assert np.allclose(self.evaluator.fitness(perms), self.engine.fitness(perms))
+        # A bigger population grows the shared buffers
+        perms = np.concatenate([perms, perms])
+        assert np.allclose(self.evaluator.fitness(perms), self.engine.fitness(perms))
+
+    def test_fitness_on_stratified_words(self):
+        perms = self.engine.encode(generate_random(LETTERS, 12))
+        words = self.engine.stratified_words(0.5)
+
+        assert np.allclose(self.evaluator.fitness(perms, words), self.engine.fitness(perms, words))
+
+    def test_optimize_scores_returned_permutations(self):
+        perms = self.engine.encode(generate_random(LETTERS, 20))
+        new_perms, scores = self.evaluator.optimize(perms, 10, seed=1)
+
+        assert (np.sort(new_perms, axis=1) == np.arange(len(LETTERS))).all()
+        assert np.allclose(scores, self.engine.fitness(new_perms))
+
+
+if __name__ == '__main__':
+    unittest.main()
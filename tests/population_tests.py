@@ -0,0 +1,33 @@
+import unittest
+from string import ascii_lowercase
+
+from src.generator import generate_random
+from src.population import Population
+
+
+LETTERS = list(ascii_lowercase)
+
+
+class TestPopulation(unittest.TestCase):
+    def test_round_trip(self):
+        samples = generate_random(LETTERS, 10)
+        samples[3].set_score(0.5)
+        population = Population.from_samples(LETTERS, samples)
+
+        assert population.perms.shape == (10, len(LETTERS))
+        assert [s.decode_string for s in population.to_samples()] == [s.decode_string for s in samples]
+        assert population.sample(3).score == 0.5
+        assert population.sample(4).dirty
+
+    def test_diversity(self):
+        population = Population.from_samples(LETTERS, generate_random(LETTERS, 40))
+        perms = population.perms
+        pairs = [(perms[i] != perms[j]).mean() for i in range(len(perms)) for j in range(i + 1, len(perms))]
+
+        assert abs(population.diversity() - sum(pairs) / len(pairs)) < 1e-9
+        assert Population(LETTERS, perms[[0] * 10]).diversity() == 0.0
+        assert Population(LETTERS, perms[:1]).diversity() == 0.0
+
+
+if __name__ == '__main__':
+    unittest.main()
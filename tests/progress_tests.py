@@ -0,0 +1,31 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from src.progress import LivePlotObserver, PngObserver
+from src.simulator import SimulationHistory
+
+
+class TestProgress(unittest.TestCase):
+    def setUp(self):
+        self.history = SimulationHistory()
+        for i in range(5):
+            self.history.add(i, i + 1, i + 2)
+
+    def test_png_written_on_finish(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            observer = PngObserver(output_dir)
+            observer.update('title', self.history)
+            assert not os.listdir(output_dir)
+
+            observer.finish('title', self.history)
+            assert os.path.getsize(observer.path) > 0
+
+    def test_live_plot_pickles_without_plotter(self):
+        observer = pickle.loads(pickle.dumps(LivePlotObserver(max_fps=1)))
+        observer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
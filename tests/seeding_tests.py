@@ -0,0 +1,48 @@
+import unittest
+import numpy as np
+
+from src.corpus import load_corpus
+from src.fitness_engine import FitnessEngine
+from src.generator import is_valid
+from src.seeding import KeySeeder, PatternIndex, word_pattern
+
+
+class TestSeeding(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.corpus = load_corpus(cache_path=None)
+        cls.letters = sorted(cls.corpus.unigram_freq.keys())
+        cls.seeder = KeySeeder(cls.corpus.dictionary, cls.corpus.cipher, cls.letters, cls.corpus.unigram_freq)
+
+    def test_word_pattern(self):
+        assert word_pattern('that') == (0, 1, 2, 0)
+        assert word_pattern('see') == word_pattern('all')
+
+        index = PatternIndex({'that', 'high', 'the', ''}, self.letters)
+        assert index.candidates('abca') == ['high', 'that']
+        assert index.candidates('xyz') == ['the']
+        assert index.candidates('xx') == []
+
+    def test_key_decodes_words(self):
+        engine = FitnessEngine(self.corpus.dictionary, self.corpus.cipher, self.letters, self.corpus.unigram_freq)
+        ratios = engine.words_in_dict_ratio(np.stack([self.seeder.frequency_key, self.seeder.key]))
+
+        assert sorted(self.seeder.key) == list(range(len(self.letters)))
+        assert ratios[1] > ratios[0]
+        assert ratios[1] > 0.9
+
+    def test_population(self):
+        samples = self.seeder.population(50, random_fraction=0.2, max_swaps=2)
+        key = self.seeder.key.tobytes()
+
+        assert len(samples) == 50
+        assert bytes(samples[0].perm) == key
+        assert all(is_valid(s.decode_string) for s in samples)
+        # Perturbed keys differ from the key by at most 2 swaps
+        differences = [sum(a != b for a, b in zip(s.perm, key)) for s in samples[1:40]]
+        assert all(0 <= d <= 4 for d in differences)
+        assert len(self.seeder.population(10, random_fraction=1.0)) == 10
+
+
+if __name__ == '__main__':
+    unittest.main()
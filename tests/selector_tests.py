@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+
+from src.selector import SelectionEngine, SelectionType, Selector
+
+
+class TestSelector(unittest.TestCase):
+    def test_select_elite(self):
+        scores = [0.3, 0.9, 0.1, 0.5, 0.7, 0.2, 0.8, 0.4, 0.6, 0.0]
+        samples = [f's{i}' for i in range(len(scores))]
+
+        assert Selector.select_elite(samples, scores, 0.7) == ['s4', 's6', 's1']
+
+    def test_roulette_matches_weights(self):
+        np.random.seed(0)
+        scores = np.array([1.0, 2.0, 3.0, 4.0, 0.0])
+        drawn = SelectionEngine(scores, SelectionType.ROULETTE).draw(100000)
+
+        freq = np.bincount(drawn, minlength=len(scores)) / len(drawn)
+        assert np.allclose(freq, scores / scores.sum(), atol=0.01)
+
+    def test_rank_and_tournament(self):
+        np.random.seed(0)
+        scores = np.array([0.5, 0.1, 0.9])
+
+        rank = np.bincount(SelectionEngine(scores, SelectionType.RANK).draw(60000), minlength=3) / 60000
+        assert np.allclose(rank, [2 / 6, 1 / 6, 3 / 6], atol=0.01)
+
+        tournament = SelectionEngine(scores, SelectionType.TOURNAMENT, tournament_size=3).draw((1000, 2))
+        assert tournament.shape == (1000, 2)
+        # The worst sample only wins a tournament against itself
+        assert (tournament == 1).mean() < 1 / 27 + 0.02
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import io
+import unittest
+import contextlib
+
+from src.benchmark import synthetic_corpus
+from src.simulator import SimulationArgs, SimulationHistory, Simulator
+from src.strategy import GeneticAlgorithmType
+
+
+class TestSimulator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.corpus = synthetic_corpus(2000)
+
+    def test_history_diversity(self):
+        args = SimulationArgs(1.0, 0.9, 0.2, 1e-3, 0.2, generation_tolerance=3, generation_tolerance_percentage=1)
+        simulator = Simulator(GeneticAlgorithmType.REGULAR, 30, args, corpus=self.corpus)
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, _, history = simulator.run(1, plot=False)
+
+        assert len(history.diversity) == len(history) > 1
+        assert all(0 <= d <= 100 for d in history.diversity)
+        assert history.diversity[0] > 80
+        assert not history.restarts
+
+    def test_partial_restarts(self):
+        # Every generation is under the threshold, so the run restarts until none are left
+        args = SimulationArgs(1.0, 0.9, 0.2, 1e-3, 0.2, generation_tolerance=3, generation_tolerance_percentage=1,
+                              diversity_threshold=1.0, max_restarts=2)
+        simulator = Simulator(GeneticAlgorithmType.REGULAR, 30, args, corpus=self.corpus)
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, _, history = simulator.run(1, plot=False)
+
+        assert history.restarts == [0, 1]
+        # The elites are kept, so the best fitness never drops
+        assert all(b >= a for a, b in zip(history.best, history.best[1:]))
+        # The stagnation tolerance counts from the last restart
+        assert len(history) > 1 + 3 + 1
+
+    def test_combine(self):
+        histories = [SimulationHistory(), SimulationHistory()]
+        for i, h in enumerate(histories):
+            h.add(1, 2, 3 + i, 40 + 10 * i)
+            h.add_restart(i)
+
+        combined = SimulationHistory.combine(histories)
+        assert combined.best == [4] and combined.diversity == [45]
+        assert combined.restarts == [0, 1]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from src.cipher_text import CipherStats
+from src.generator import generate_random
+from src.multi_fidelity import MultiFidelity
+from src.population import Population
+from src.sample import Sample
+from src.strategy import GeneticAlgorithmType
+from tests.fixtures import BIGRAM_FREQ, DICTIONARY, ENC, LETTERS, UNIGRAM_FREQ
+
+
+class TestStrategy(unittest.TestCase):
+    def setUp(self):
+        self.strategy = GeneticAlgorithmType.get_strategy(GeneticAlgorithmType.REGULAR, DICTIONARY,
+                                                          CipherStats.from_text(ENC), LETTERS, UNIGRAM_FREQ,
+                                                          BIGRAM_FREQ, bigram_weight=0.3)
+
+    def test_delta_fitness_matches_full_fitness(self):
+        for sample in generate_random(LETTERS, 5):
+            before = self.strategy.fitness([sample])[0]
+            for swaps in [[('a', 'e')], [('o', 'u'), ('y', 'a')], [('m', 'm')]]:
+                delta = self.strategy.delta_fitness(sample, swaps)
+                after = sample.score
+
+                fresh = Sample(LETTERS, perm=bytes(sample.perm))
+                self.assertAlmostEqual(after, self.strategy.fitness([fresh])[0], places=12)
+                self.assertAlmostEqual(delta, after - before, places=12)
+                before = after
+
+    def test_plain_swap_drops_fitness_state(self):
+        sample = generate_random(LETTERS, 1)[0]
+        self.strategy.delta_fitness(sample, [('a', 'e')])
+        assert sample.fitness_state is not None
+
+        sample.swap([('o', 'u')])
+        assert sample.fitness_state is None
+
+    def test_screened_samples_stay_dirty(self):
+        strategy = GeneticAlgorithmType.get_strategy(GeneticAlgorithmType.REGULAR, DICTIONARY, CipherStats.from_text(ENC),
+                                                     LETTERS, UNIGRAM_FREQ, BIGRAM_FREQ,
+                                                     fidelity=MultiFidelity(0.8, min_fraction=0.2, margin=0.0))
+        samples = generate_random(LETTERS, 20)
+        fitness_scores = strategy.fitness(samples)
+        population = Population.from_samples(LETTERS, generate_random(LETTERS, 20))
+        strategy.population_fitness(population)
+
+        assert strategy.cheap_fitness_calls == 40
+        assert 0 < strategy.fitness_calls < 40
+        # Only full scores are kept, the screening scores are still returned
+        assert sum(not s.dirty for s in samples) + int((~population.dirty).sum()) == strategy.fitness_calls
+        assert all(s.score == f for s, f in zip(samples, fitness_scores) if not s.dirty)
+        assert all(s.score is None for s in samples if s.dirty)
+        assert None not in fitness_scores
+
+
+if __name__ == '__main__':
+    unittest.main()